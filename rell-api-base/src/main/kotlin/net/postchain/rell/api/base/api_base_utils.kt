@@ -37,6 +37,13 @@ object RellApiBaseUtils {
             }
         }
 
+        if (!quiet && res.foldedConstants.isNotEmpty()) {
+            for (folded in res.foldedConstants) {
+                cliEnv.error(folded.toString())
+            }
+            cliEnv.error("Folded constant expressions: ${res.foldedConstants.size}")
+        }
+
         val app = res.app
         if (app == null) {
             if (errCnt == 0) {
@@ -59,8 +59,9 @@ object RellApiGtxUtils {
             DriverManager.getConnection(dbUrl, jdbcProperties).use { con ->
                 con.autoCommit = true
                 PostchainBaseUtils.createDatabaseAccess().checkCollation(con, suppressError = false)
-                val sqlMgr = ConnectionSqlManager(con, sqlLog)
-                runWithSqlManager(schema, sqlMgr, sqlErrorLog, code)
+                ConnectionSqlManager(con, sqlLog).use { sqlMgr ->
+                    runWithSqlManager(schema, sqlMgr, sqlErrorLog, code)
+                }
             }
         } else if (dbProperties != null) {
             val appCfg = AppConfig.fromPropertiesFile(dbProperties)
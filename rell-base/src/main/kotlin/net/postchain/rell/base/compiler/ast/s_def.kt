@@ -84,45 +84,117 @@ class S_AttributeClause(private val attr: S_AttributeDefinition): S_RelClause()
     }
 }
 
-class S_KeyIndexClause(val pos: S_Pos, val kind: R_KeyIndexKind, val attrs: List<S_AttributeDefinition>): S_RelClause() {
-    override fun compile(ctx: C_EntityContext) {
-        val cAttrs = attrs.map {
-            val cHeader = it.header.compile(ctx.defCtx)
-            AttrRec(cHeader, it)
+sealed class S_KeyIndexItem: S_Node() {
+    abstract fun compile(ctx: C_EntityContext): C_KeyIndexColumn
+}
+
+class S_KeyIndexItem_Attr(val attr: S_AttributeDefinition): S_KeyIndexItem() {
+    override fun compile(ctx: C_EntityContext): C_KeyIndexColumn {
+        val cHeader = attr.header.compile(ctx.defCtx)
+        ctx.addAttribute(attr, cHeader, false)
+        return C_KeyIndexColumn(cHeader.pos, R_IndexColumn(cHeader.rName, null), null)
+    }
+}
+
+class S_KeyIndexItem_Function(val attr: S_Name, val fn: S_Name): S_KeyIndexItem() {
+    override fun compile(ctx: C_EntityContext): C_KeyIndexColumn {
+        val attrHand = attr.compile(ctx.defCtx)
+        val fnHand = fn.compile(ctx.defCtx)
+
+        val rFn = R_IndexFunction.forCode(fnHand.str)
+        if (rFn == null) {
+            fnHand.setIdeInfo(C_IdeSymbolInfo.UNKNOWN)
+            ctx.msgCtx.error(fnHand.pos, "entity:index:fn:unknown:${fnHand.str}",
+                "Function '${fnHand.str}' cannot be used in an index")
+        } else {
+            fnHand.setIdeInfo(C_IdeSymbolInfo.get(IdeSymbolKind.DEF_FUNCTION_SYSTEM))
         }
 
-        for (attr in cAttrs) {
-            ctx.addAttribute(attr.sAttr, attr.header, false)
+        val column = R_IndexColumn(attrHand.rName, rFn)
+        val attrRef = C_IndexAttrRef(attrHand, rFn, null)
+        return C_KeyIndexColumn(attrHand.pos, column, attrRef)
+    }
+}
+
+class S_IndexCondition(
+    val attr: S_Name,
+    val not: Boolean,
+    val op: S_PosValue<R_IndexCmpOp>?,
+    val value: S_LiteralExpr?,
+): S_Node() {
+    fun compile(ctx: C_EntityContext): C_IndexAttrRef {
+        val attrHand = attr.compile(ctx.defCtx)
+        val rCondition = R_IndexCondition(attrHand.rName, not, op?.value, value?.value())
+        return C_IndexAttrRef(attrHand, null, rCondition)
+    }
+}
+
+class S_KeyIndexClause(
+    val pos: S_Pos,
+    val kind: R_KeyIndexKind,
+    val items: List<S_KeyIndexItem>,
+    val include: List<S_Name>,
+    val where: List<S_IndexCondition>,
+): S_RelClause() {
+    override fun compile(ctx: C_EntityContext) {
+        val cColumns = items.map { it.compile(ctx) }
+
+        val columnSet = mutableSetOf<String>()
+        for (column in cColumns) {
+            val code = column.rColumn.strCode()
+            C_Errors.check(ctx.msgCtx, columnSet.add(code), column.pos) {
+                "entity_keyindex_dup:$code" toCodeMsg "Duplicate attribute: '$code'"
+            }
         }
 
-        val nameSet = mutableSetOf<R_Name>()
-        for (attr in cAttrs) {
-            val name = attr.header.rName
-            C_Errors.check(ctx.msgCtx, nameSet.add(name), attr.header.pos) {
-                "entity_keyindex_dup:$name" toCodeMsg "Duplicate attribute: '$name'"
+        if (items.size > 1) {
+            items.zip(cColumns).all { (item, column) ->
+                val attrName = column.rColumn.attr
+                item !is S_KeyIndexItem_Attr || item.attr.checkMultiAttrKeyIndex(ctx.msgCtx, kind, attrName)
             }
         }
 
-        if (cAttrs.size > 1) {
-            cAttrs.all { it.sAttr.checkMultiAttrKeyIndex(ctx.msgCtx, kind, it.header.rName) }
+        val includeRefs = include.map { name ->
+            val hand = name.compile(ctx.defCtx)
+            C_Errors.check(ctx.msgCtx, columnSet.add(hand.str), hand.pos) {
+                "entity:index:include:dup:${hand.str}" toCodeMsg "Duplicate attribute: '${hand.str}'"
+            }
+            C_IndexAttrRef(hand, null, null)
         }
 
-        val attrNames = cAttrs.map { it.header.rName }
+        val whereRefs = where.map { it.compile(ctx) }
+
+        val attrNames = cColumns.map { it.rColumn.attr }
+        val extRefs = cColumns.mapNotNull { it.attrRef } + includeRefs + whereRefs
+
+        val ext = if (extRefs.isEmpty()) null else {
+            R_IndexExt(
+                cColumns.map { it.rColumn },
+                includeRefs.map { it.name.rName },
+                whereRefs.map { it.condition!! },
+            )
+        }
 
         when (kind) {
-            R_KeyIndexKind.KEY -> ctx.addKey(pos, attrNames)
-            R_KeyIndexKind.INDEX -> ctx.addIndex(pos, attrNames)
+            R_KeyIndexKind.KEY -> {
+                if (ext != null) {
+                    ctx.msgCtx.error(pos, "entity:key:ext",
+                        "Key cannot have function calls, included attributes or a condition; use an index instead")
+                }
+                ctx.addKey(pos, attrNames)
+            }
+            R_KeyIndexKind.INDEX -> ctx.addIndex(pos, attrNames, ext)
         }
+
+        ctx.addIndexAttrRefs(extRefs)
     }
 
     override fun ideBuildOutlineTree(b: IdeOutlineTreeBuilder) {
-        for (attr in attrs) {
-            val name = attr.header.ideOutlineTreeNodeName()
-            b.node(attr, name, IdeOutlineNodeType.KEY_INDEX)
+        for (item in items.filterIsInstance<S_KeyIndexItem_Attr>()) {
+            val name = item.attr.header.ideOutlineTreeNodeName()
+            b.node(item.attr, name, IdeOutlineNodeType.KEY_INDEX)
         }
     }
-
-    private class AttrRec(val header: C_AttrHeaderHandle, val sAttr: S_AttributeDefinition)
 }
 
 class S_AttributeDefinition(val mutablePos: S_Pos?, val header: S_AttrHeader, val expr: S_Expr?): S_Node() {
@@ -399,6 +399,7 @@ class S_AtExpr(
     val cardinality: S_PosValue<R_AtCardinality>,
     val where: S_AtExprWhere,
     val what: S_AtExprWhat,
+    val modifiers: S_Modifiers,
     val limit: S_Expr?,
     val offset: S_Expr?,
 ): S_Expr(from.startPos) {
@@ -433,18 +434,29 @@ class S_AtExpr(
         val vWhere = where.compile(innerCtx, atExprId, subValues)
 
         val cWhat = what.compile(innerCtx, hint, cFrom, subValues)
-        val cResult = compileAtResult(cWhat.allFields)
 
-        val vLimit = compileLimitOffset(limit, "limit", ctx, subValues)
-        val vOffset = compileLimitOffset(offset, "offset", ctx, subValues)
+        val mods = C_ModifierValues(C_ModifierTargetType.EXPRESSION, null)
+        val modUnordered = mods.field(C_ModifierFields.UNORDERED)
+        val modPage = mods.field(C_ModifierFields.PAGE)
+        val modifierCtx = C_ModifierContext(ctx.msgCtx, ctx.symCtx)
+        modifiers.compile(modifierCtx, mods)
+        val unordered = modUnordered.pos()
+        val page = modPage.pos()
+
+        val cResult = compileAtResult(cWhat.allFields, page != null)
+
+        // With @page, the offset is the continuation token returned by the previous page.
+        val offsetType = if (page == null) R_IntegerType else C_AtExprResult.PAGE_TOKEN_TYPE
+        val vLimit = compileLimitOffset(limit, "limit", R_IntegerType, ctx, subValues)
+        val vOffset = compileLimitOffset(offset, "offset", offsetType, ctx, subValues)
 
         val base = C_AtExprBase(cWhat, vWhere)
         val facts = C_ExprVarFacts.forSubExpressions(subValues)
 
-        return C_AtDetails(startPos, cardinality, base, vLimit, vOffset, cResult, facts)
+        return C_AtDetails(startPos, cardinality, base, vLimit, vOffset, unordered, page, cResult, facts)
     }
 
-    private fun compileAtResult(whatFields: List<V_DbAtWhatField>): C_AtExprResult {
+    private fun compileAtResult(whatFields: List<V_DbAtWhatField>, page: Boolean): C_AtExprResult {
         val selFieldsIndexes = whatFields.withIndex().filter { !it.value.flags.omit }.map { it.index }.toImmList()
         val selFields = selFieldsIndexes.map { whatFields[it] }
 
@@ -472,7 +484,11 @@ class S_AtExpr(
             recordType = R_CtErrorType
         }
 
-        val resultType = C_AtExprResult.calcResultType(recordType, cardinality.value)
+        val resultType = if (page) {
+            C_AtExprResult.calcPageResultType(recordType)
+        } else {
+            C_AtExprResult.calcResultType(recordType, cardinality.value)
+        }
 
         return C_AtExprResult(
                 recordType,
@@ -484,7 +500,13 @@ class S_AtExpr(
         )
     }
 
-    private fun compileLimitOffset(sExpr: S_Expr?, msg: String, ctx: C_ExprContext, subValues: MutableList<V_Expr>): V_Expr? {
+    private fun compileLimitOffset(
+        sExpr: S_Expr?,
+        msg: String,
+        type: R_Type,
+        ctx: C_ExprContext,
+        subValues: MutableList<V_Expr>,
+    ): V_Expr? {
         if (sExpr == null) {
             return null
         }
@@ -493,7 +515,7 @@ class S_AtExpr(
         val vExpr = sExpr.compile(subCtx).value()
         subValues.add(vExpr)
 
-        C_Types.match(R_IntegerType, vExpr.type, sExpr.startPos) { "expr_at_${msg}_type" toCodeMsg "Wrong $msg type" }
+        C_Types.match(type, vExpr.type, sExpr.startPos) { "expr_at_${msg}_type" toCodeMsg "Wrong $msg type" }
         return vExpr
     }
 
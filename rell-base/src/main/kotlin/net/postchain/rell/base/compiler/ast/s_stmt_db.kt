@@ -150,8 +150,8 @@ class S_UpdateTarget_Expr(private val expr: S_Expr): S_UpdateTarget() {
         val cLambda = cLambdaB.build()
 
         val whereLeft = Db_EntityExpr(rAtEntity)
-        val whereRight = Db_CollectionInterpretedExpr(cLambda.compileVarRExpr(cFrom.innerExprCtx().blkCtx.blockUid))
-        val where = Db_BinaryExpr(R_BooleanType, Db_BinaryOp_In, whereLeft, whereRight)
+        val whereRight = cLambda.compileVarRExpr(cFrom.innerExprCtx().blkCtx.blockUid)
+        val where = Db_InCollectionExpr(whereLeft, whereRight, entityType, false)
         val rTarget = R_UpdateTarget_Expr_Many(rAtEntity, where, tCtx.rExpr, cLambda.rLambda, set, listType)
         return C_UpdateTarget(rTarget, cFrom)
     }
@@ -63,7 +63,8 @@ abstract class S_Node {
     val attachment: Any? = getAttachment()
 
     companion object {
-        private val ATTACHMENT_PROVIDER_LOCAL = ThreadLocalContext<Supplier<Any?>>(Supplier { null })
+        private val NO_ATTACHMENT_PROVIDER = Supplier<Any?> { null }
+        private val ATTACHMENT_PROVIDER_LOCAL = ThreadLocalContext(NO_ATTACHMENT_PROVIDER)
 
         @JvmStatic
         fun runWithAttachmentProvider(provider: Supplier<Any?>, code: Runnable) {
@@ -72,6 +73,10 @@ abstract class S_Node {
             }
         }
 
+        /** True if a provider is set for the current thread, so new nodes get attachments specific to the caller. */
+        @JvmStatic
+        fun hasAttachmentProvider(): Boolean = ATTACHMENT_PROVIDER_LOCAL.get() !== NO_ATTACHMENT_PROVIDER
+
         private fun getAttachment(): Any? {
             val provider = ATTACHMENT_PROVIDER_LOCAL.get()
             val res = provider.get()
@@ -170,7 +170,7 @@ enum class C_AtAttrShadowing {
 }
 
 // Instantiated in Eclipse IDE, change parameters carefully.
-class C_CompilerOptions(
+class C_CompilerOptions @JvmOverloads constructor(
     val compatibility: R_LangVersion?,
     val gtv: Boolean,
     val deprecatedError: Boolean,
@@ -187,6 +187,9 @@ class C_CompilerOptions(
     val ide: Boolean,
     val ideDocSymbolsEnabled: Boolean,
     val ideDefIdConflictError: Boolean,
+    val constantFolding: Boolean = false,
+    val parseCache: Boolean = false,
+    val parallelParsing: Boolean = false,
 ) {
     fun toBuilder() = Builder(this)
 
@@ -209,6 +212,9 @@ class C_CompilerOptions(
         putNotNull(map, "compatibility", compatibility?.str())
         putNotDefault(map, "ideDocSymbolsEnabled", DEFAULT.ideDocSymbolsEnabled, ideDocSymbolsEnabled)
         putNotDefault(map, "ideDefIdConflictError", DEFAULT.ideDefIdConflictError, ideDefIdConflictError)
+        putNotDefault(map, "constantFolding", DEFAULT.constantFolding, constantFolding)
+        putNotDefault(map, "parseCache", DEFAULT.parseCache, parseCache)
+        putNotDefault(map, "parallelParsing", DEFAULT.parallelParsing, parallelParsing)
 
         return map.toImmMap()
     }
@@ -243,6 +249,9 @@ class C_CompilerOptions(
             ide = false,
             ideDocSymbolsEnabled = false,
             ideDefIdConflictError = false,
+            constantFolding = false,
+            parseCache = false,
+            parallelParsing = false,
         )
 
         @JvmStatic fun builder() = Builder()
@@ -270,6 +279,9 @@ class C_CompilerOptions(
                         getBoolOpt(map, "useTestDependencyExtensions", DEFAULT.useTestDependencyExtensions),
                 ideDocSymbolsEnabled = getBoolOpt(map, "ideDocSymbolsEnabled", DEFAULT.ideDocSymbolsEnabled),
                 ideDefIdConflictError = getBoolOpt(map, "ideDefIdConflictError", DEFAULT.ideDefIdConflictError),
+                constantFolding = getBoolOpt(map, "constantFolding", DEFAULT.constantFolding),
+                parseCache = getBoolOpt(map, "parseCache", DEFAULT.parseCache),
+                parallelParsing = getBoolOpt(map, "parallelParsing", DEFAULT.parallelParsing),
             )
         }
 
@@ -297,6 +309,9 @@ class C_CompilerOptions(
         private var ide = proto.ide
         private var ideDocSymbolsEnabled = proto.ideDocSymbolsEnabled
         private var ideDefIdConflictError = proto.ideDefIdConflictError
+        private var constantFolding = proto.constantFolding
+        private var parseCache = proto.parseCache
+        private var parallelParsing = proto.parallelParsing
 
         @Suppress("UNUSED") fun compatibility(v: R_LangVersion) = apply { compatibility = v }
         @Suppress("UNUSED") fun gtv(v: Boolean) = apply { gtv = v }
@@ -314,6 +329,9 @@ class C_CompilerOptions(
         @Suppress("UNUSED") fun ide(v: Boolean) = apply { ide = v }
         @Suppress("UNISED") fun ideDocSymbolsEnabled(v: Boolean) = apply { ideDocSymbolsEnabled = v }
         @Suppress("UNUSED") fun ideDefIdConflictError(v: Boolean) = apply { ideDefIdConflictError = v }
+        @Suppress("UNUSED") fun constantFolding(v: Boolean) = apply { constantFolding = v }
+        @Suppress("UNUSED") fun parseCache(v: Boolean) = apply { parseCache = v }
+        @Suppress("UNUSED") fun parallelParsing(v: Boolean) = apply { parallelParsing = v }
 
         fun build() = C_CompilerOptions(
             compatibility = compatibility,
@@ -332,6 +350,9 @@ class C_CompilerOptions(
             ide = ide,
             ideDocSymbolsEnabled = ideDocSymbolsEnabled,
             ideDefIdConflictError = ideDefIdConflictError,
+            constantFolding = constantFolding,
+            parseCache = parseCache,
+            parallelParsing = parallelParsing,
         )
     }
 }
@@ -419,7 +440,8 @@ object C_Compiler {
         val errors = messages.filter { it.type == C_MessageType.ERROR }
 
         val rApp = if (errors.isEmpty()) app else null
-        return C_CompilationResult(rApp, messages, files, ideSymbolInfos)
+        val foldedConstants = msgCtx.globalCtx.constantFolding.finish()
+        return C_CompilationResult(rApp, messages, files, ideSymbolInfos, foldedConstants)
     }
 
     private fun compileMidModules(
@@ -542,9 +564,11 @@ class C_CompilationResult(
     messages: List<C_Message>,
     files: List<C_SourcePath>,
     ideSymbolInfos: Map<S_Pos, IdeSymbolInfo>,
+    foldedConstants: List<C_FoldedConstant> = immListOf(),
 ): C_AbstractResult(messages) {
     val files = files.toImmList()
     val ideSymbolInfos = ideSymbolInfos.toImmMap()
+    val foldedConstants = foldedConstants.toImmList()
 }
 
 abstract class C_CompilerExecutor {
@@ -23,6 +23,7 @@ import net.postchain.rell.base.compiler.base.namespace.C_NsAsm_ComponentAssemble
 import net.postchain.rell.base.compiler.base.namespace.C_UserNsProtoBuilder
 import net.postchain.rell.base.compiler.base.utils.*
 import net.postchain.rell.base.model.*
+import net.postchain.rell.base.runtime.Rt_Value
 import net.postchain.rell.base.utils.*
 import net.postchain.rell.base.utils.doc.DocSymbolFactory
 import net.postchain.rell.base.utils.doc.DocSymbolKind
@@ -39,6 +40,7 @@ class C_GlobalContext(
     val sourceDir: C_SourceDir,
 ) {
     val docFactory: DocSymbolFactory = C_DocUtils.getDocFactory(compilerOptions)
+    val constantFolding = C_ConstantFoldingCollector()
 
     companion object {
         private val appUidGen = C_UidGen { id, _ -> R_AppUid(id) }
@@ -46,6 +48,22 @@ class C_GlobalContext(
     }
 }
 
+/** An expression replaced by its compile-time value (see [C_CompilerOptions.constantFolding]). */
+class C_FoldedConstant(val pos: S_Pos, val value: String) {
+    override fun toString() = "$pos folded: $value"
+}
+
+class C_ConstantFoldingCollector {
+    // Keyed by position, as an expression can be converted to an R_Expr more than once.
+    private val folded = sortedMapOf<S_Pos, C_FoldedConstant>()
+
+    fun add(pos: S_Pos, value: Rt_Value) {
+        folded[pos] = C_FoldedConstant(pos, value.strCode())
+    }
+
+    fun finish(): List<C_FoldedConstant> = folded.values.toImmList()
+}
+
 class C_MessageContext(val globalCtx: C_GlobalContext) {
     val msgMgr = C_MessageManager()
 
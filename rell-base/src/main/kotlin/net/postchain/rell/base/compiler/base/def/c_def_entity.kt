@@ -237,6 +237,11 @@ private class C_EntityAttributeClause(
     )
 }
 
+class C_KeyIndexColumn(val pos: S_Pos, val rColumn: R_IndexColumn, val attrRef: C_IndexAttrRef?)
+
+/** A reference to an attribute from an extended index; checked once all attributes of the entity are known. */
+class C_IndexAttrRef(val name: C_NameHandle, val fn: R_IndexFunction?, val condition: R_IndexCondition?)
+
 class C_EntityContext(
         val defCtx: C_DefinitionContext,
         private val entityName: String,
@@ -252,6 +257,8 @@ class C_EntityContext(
     private val indices = mutableListOf<R_Index>()
     private val uniqueKeys = mutableSetOf<Set<R_Name>>()
     private val uniqueIndices = mutableSetOf<Set<R_Name>>()
+    private val uniqueExtIndices = mutableSetOf<String>()
+    private val indexAttrRefs = mutableListOf<C_IndexAttrRef>()
 
     init {
         for (sysAttr in sysAttributes) {
@@ -291,24 +298,89 @@ class C_EntityContext(
         keys.add(R_Key(attrs))
     }
 
-    fun addIndex(pos: S_Pos, attrs: List<R_Name>) {
-        addUniqueKeyIndex(pos, uniqueIndices, attrs, R_KeyIndexKind.INDEX)
-        indices.add(R_Index(attrs))
+    fun addIndex(pos: S_Pos, attrs: List<R_Name>, ext: R_IndexExt?) {
+        if (ext == null) {
+            addUniqueKeyIndex(pos, uniqueIndices, attrs, R_KeyIndexKind.INDEX)
+        } else if (checkKeyIndexAllowed(pos, R_KeyIndexKind.INDEX)) {
+            val code = ext.strCode()
+            C_Errors.check(msgCtx, uniqueExtIndices.add(code), pos) {
+                "entity:key_index:dup_ext:$code" toCodeMsg "Duplicate index: $code"
+            }
+        }
+        indices.add(R_Index(attrs, ext))
+    }
+
+    fun addIndexAttrRefs(attrRefs: List<C_IndexAttrRef>) {
+        indexAttrRefs.addAll(attrRefs)
     }
 
     fun createEntityBody(): R_EntityBody {
         val cAttributes = compileAttributes()
         val rAttributes = cAttributes.mapValues { it.value.rAttr }
+        for (ref in indexAttrRefs) {
+            checkIndexAttrRef(ref, rAttributes[ref.name.rName])
+        }
         return R_EntityBody(keys.toList(), indices.toList(), rAttributes)
     }
 
+    private fun checkIndexAttrRef(ref: C_IndexAttrRef, attr: R_Attribute?) {
+        val name = ref.name.str
+
+        if (attr == null) {
+            ref.name.setIdeInfo(C_IdeSymbolInfo.UNKNOWN)
+            msgCtx.error(ref.name.pos, "entity:index:attr:unknown:$name", "Unknown attribute: '$name'")
+            return
+        }
+
+        val ideKind = C_AttrUtils.getIdeSymbolKind(persistent, attr.mutable, attr.keyIndexKind)
+        ref.name.setIdeInfo(C_IdeSymbolInfo.get(ideKind))
+
+        val type = attr.type
+        if (type == R_CtErrorType) {
+            return
+        }
+
+        if (ref.fn != null && type != R_TextType) {
+            val fn = ref.fn.code
+            msgCtx.error(ref.name.pos, "entity:index:fn:type:$fn:${type.strCode()}",
+                "Function '$fn' cannot be used with attribute '$name' of type ${type.str()}")
+        }
+
+        val cond = ref.condition
+        if (cond != null) {
+            checkIndexCondition(ref.name.pos, name, type, cond)
+        }
+    }
+
+    private fun checkIndexCondition(pos: S_Pos, name: String, type: R_Type, cond: R_IndexCondition) {
+        val op = cond.op
+        val value = cond.value
+
+        if (op == null || value == null) {
+            if (type != R_BooleanType) {
+                msgCtx.error(pos, "entity:index:where:type:$name:${type.strCode()}",
+                    "Attribute '$name' of type ${type.str()} cannot be used as a condition")
+            }
+        } else if (type != R_BooleanType && type != R_IntegerType && type != R_TextType) {
+            msgCtx.error(pos, "entity:index:where:attr_type:$name:${type.strCode()}",
+                "Attribute '$name' of type ${type.str()} cannot be compared in an index condition")
+        } else if (value.type() != type) {
+            val valueType = value.type()
+            msgCtx.error(pos, "entity:index:where:value_type:$name:${type.strCode()}:${valueType.strCode()}",
+                "Attribute '$name' of type ${type.str()} cannot be compared with a value of type ${valueType.str()}")
+        } else if (type == R_BooleanType && op != R_IndexCmpOp.EQ && op != R_IndexCmpOp.NE) {
+            msgCtx.error(pos, "entity:index:where:op:$name:${op.code}",
+                "Operator '${op.code}' cannot be used with attribute '$name' of type ${type.str()}")
+        }
+    }
+
     fun createStructBody(): Map<R_Name, C_CompiledAttribute> {
         return compileAttributes()
     }
 
     private fun compileAttributes(): Map<R_Name, C_CompiledAttribute> {
         val keyMap = keyIndexMap(keys)
-        val indexMap = keyIndexMap(indices)
+        val indexMap = keyIndexMap(indices.filter { it.ext == null })
 
         val cAttrs = mutableListOf<C_CompiledAttribute>()
 
@@ -327,8 +399,7 @@ class C_EntityContext(
     }
 
     private fun addUniqueKeyIndex(pos: S_Pos, set: MutableSet<Set<R_Name>>, names: List<R_Name>, kind: R_KeyIndexKind) {
-        if (defCtx.definitionType == C_DefinitionType.OBJECT) {
-            msgCtx.error(pos, "object:key_index:${entityName}:$kind", "Object cannot have ${kind.nameMsg.normal}")
+        if (!checkKeyIndexAllowed(pos, kind)) {
             return
         }
 
@@ -340,4 +411,12 @@ class C_EntityContext(
             msgCtx.error(pos, "$errCode:${nameLst.joinToString(",")}", "$errMsg: ${nameLst.joinToString()}")
         }
     }
+
+    private fun checkKeyIndexAllowed(pos: S_Pos, kind: R_KeyIndexKind): Boolean {
+        if (defCtx.definitionType == C_DefinitionType.OBJECT) {
+            msgCtx.error(pos, "object:key_index:${entityName}:$kind", "Object cannot have ${kind.nameMsg.normal}")
+            return false
+        }
+        return true
+    }
 }
@@ -112,6 +112,18 @@ class C_AtExprResult(
                 recordType
             }
         }
+
+        /** Type of the continuation token of a paginated (`@page`) at-expression; `null` means the first page. */
+        val PAGE_TOKEN_TYPE: R_Type = R_NullableType(R_GtvType)
+
+        /** A paginated at-expression returns records of the page and the token of the next page, if there is one. */
+        fun calcPageResultType(recordType: R_Type): R_Type {
+            val fields = listOf(
+                R_TupleField(R_IdeName(R_Name.of("items"), C_IdeSymbolInfo.MEM_TUPLE_ATTR), R_ListType(recordType)),
+                R_TupleField(R_IdeName(R_Name.of("next"), C_IdeSymbolInfo.MEM_TUPLE_ATTR), PAGE_TOKEN_TYPE),
+            )
+            return R_TupleType(fields)
+        }
     }
 }
 
@@ -121,6 +133,10 @@ class C_AtDetails(
         val base: C_AtExprBase,
         val limit: V_Expr?,
         val offset: V_Expr?,
+        /** Position of the `@unordered` annotation, if specified: the default ordering by rowid is not applied. */
+        val unordered: S_Pos?,
+        /** Position of the `@page` annotation, if specified: the offset is a continuation token (keyset pagination). */
+        val page: S_Pos?,
         val res: C_AtExprResult,
         val exprFacts: C_ExprVarFacts
 )
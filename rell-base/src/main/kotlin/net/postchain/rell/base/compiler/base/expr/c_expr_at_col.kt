@@ -96,6 +96,16 @@ class C_AtFrom_Iterable(
         val what = compileWhat(details)
         val extras = V_AtExprExtras(details.limit, details.offset)
 
+        if (details.unordered != null) {
+            val msg = "Annotation @unordered can be used only with database at-expressions"
+            outerExprCtx.msgCtx.error(details.unordered, "at:unordered:col", msg)
+        }
+
+        if (details.page != null) {
+            val msg = "Annotation @page can be used only with database at-expressions"
+            outerExprCtx.msgCtx.error(details.page, "at:page:col", msg)
+        }
+
         val cBlock = innerBlkCtx.buildBlock()
 
         return V_ColAtExpr(
@@ -7,6 +7,7 @@ package net.postchain.rell.base.compiler.base.expr
 import net.postchain.rell.base.compiler.ast.S_Pos
 import net.postchain.rell.base.compiler.base.core.C_AppContext
 import net.postchain.rell.base.compiler.base.core.C_BlockEntry_AtEntity
+import net.postchain.rell.base.compiler.base.core.C_DefinitionType
 import net.postchain.rell.base.compiler.base.core.C_IdeSymbolInfo
 import net.postchain.rell.base.compiler.base.utils.C_CodeMsg
 import net.postchain.rell.base.compiler.base.utils.toCodeMsg
@@ -122,6 +123,13 @@ class C_AtFrom_Entities(
 
     override fun compile(details: C_AtDetails): V_Expr {
         val vBase = compileBase(details)
+
+        if (details.page != null) {
+            return compilePage(details, details.page, vBase)
+        }
+
+        checkUnordered(details)
+
         val extras = V_AtExprExtras(details.limit, details.offset)
 
         if (parentAtCtx?.dbAt != true) {
@@ -181,6 +189,68 @@ class C_AtFrom_Entities(
         )
     }
 
+    private fun compilePage(details: C_AtDetails, pagePos: S_Pos, vBase: V_AtExprBase): V_Expr {
+        checkPage(details, pagePos)
+
+        val cBlock = innerBlkCtx.buildBlock()
+        val internals = R_DbAtExprInternals(cBlock.rBlock, details.res.rowDecoder)
+
+        return V_PageDbAtExpr(
+            outerExprCtx,
+            details.startPos,
+            details.res.resultType,
+            vBase,
+            limit = details.limit,
+            token = details.offset,
+            internals,
+            details.exprFacts,
+        )
+    }
+
+    private fun checkPage(details: C_AtDetails, pagePos: S_Pos) {
+        val cardinality = details.cardinality
+        if (cardinality.value != R_AtCardinality.ZERO_MANY) {
+            msgCtx.error(cardinality.pos, "at:page:cardinality:${cardinality.value}",
+                "Only '@*' can be used with @page")
+        }
+
+        if (parentAtCtx?.dbAt == true) {
+            msgCtx.error(pagePos, "at:page:nested", "@page cannot be used in a nested at-expression")
+        }
+
+        if (details.unordered != null) {
+            msgCtx.error(details.unordered, "at:page:unordered", "@page cannot be combined with @unordered")
+        }
+
+        // Records of a page are always ordered by rowid, the token being the rowid of the last one.
+        for (field in details.base.what.allFields) {
+            val sortPos = field.flags.sort?.pos
+            if (sortPos != null) {
+                msgCtx.error(sortPos, "at:page:sort", "Sorting cannot be used with @page")
+            }
+            val summarizationPos = field.flags.group ?: field.flags.aggregate
+            if (summarizationPos != null) {
+                val msg = "Grouping and aggregation cannot be used with @page"
+                msgCtx.error(summarizationPos, "at:page:aggregate", msg)
+            }
+        }
+    }
+
+    private fun checkUnordered(details: C_AtDetails) {
+        val pos = details.unordered ?: return
+
+        // An operation (or a function called from one) could make database changes depend on the order of records,
+        // which is not the same on all nodes.
+        if (outerExprCtx.defCtx.definitionType != C_DefinitionType.QUERY) {
+            msgCtx.error(pos, "at:unordered:def", "Annotation @unordered can be used only in a query")
+        }
+
+        // Limit and offset would select arbitrary records, even with explicit sorting by non-unique values.
+        if (details.limit != null || details.offset != null) {
+            msgCtx.error(pos, "at:unordered:limit", "Annotation @unordered cannot be combined with limit or offset")
+        }
+    }
+
     private fun compileBase(details: C_AtDetails): V_AtExprBase {
         val rFrom = entities.map { it.toRAtEntity() }
         return V_AtExprBase(
@@ -188,6 +258,8 @@ class C_AtFrom_Entities(
             details.base.what.materialFields,
             details.base.where,
             isMany = details.cardinality.value.many,
+            unordered = details.unordered != null,
+            page = details.page != null,
         )
     }
 
@@ -18,6 +18,7 @@ import net.postchain.rell.base.compiler.base.lib.*
 import net.postchain.rell.base.compiler.base.utils.C_CodeMsg
 import net.postchain.rell.base.compiler.base.utils.C_Errors
 import net.postchain.rell.base.compiler.base.utils.toCodeMsg
+import net.postchain.rell.base.compiler.vexpr.V_ConstantValueEvalContext
 import net.postchain.rell.base.compiler.vexpr.V_Expr
 import net.postchain.rell.base.compiler.vexpr.V_MemberFunctionCall
 import net.postchain.rell.base.compiler.vexpr.V_TypeValueMember
@@ -176,6 +177,7 @@ class C_TypeValueMember_Function(
         override fun postVarFacts() = call.postVarFacts()
         override fun vExprs() = call.vExprs()
         override fun globalConstantRestriction() = call.globalConstantRestriction()
+        override fun constantValue(ctx: V_ConstantValueEvalContext, baseValue: Rt_Value) = call.constantValue(ctx, baseValue)
         override fun safeCallable() = false
 
         override fun calculator() = call.calculator()
@@ -8,6 +8,7 @@ import net.postchain.rell.base.compiler.ast.S_Pos
 import net.postchain.rell.base.compiler.base.core.C_DefinitionName
 import net.postchain.rell.base.compiler.base.core.C_IdeSymbolInfo
 import net.postchain.rell.base.compiler.base.expr.C_ExprContext
+import net.postchain.rell.base.model.R_ContextFreeSysFunction
 import net.postchain.rell.base.model.R_IdeName
 import net.postchain.rell.base.model.R_ModuleName
 import net.postchain.rell.base.model.R_Name
@@ -52,7 +53,7 @@ class C_SysFunctionBody(val pure: Boolean, val rFn: R_SysFunction, val dbFn: Db_
             pure: Boolean = false,
             rCode: (Rt_Value, Rt_Value) -> Rt_Value,
         ): C_SysFunctionBody {
-            val rFn = R_SysFunction { _, args ->
+            val rFn = R_ContextFreeSysFunction { args ->
                 Rt_Utils.checkEquals(args.size, 2)
                 rCode(args[0], args[1])
             }
@@ -72,7 +73,7 @@ abstract class C_SysFunction {
 
     companion object {
         fun rSimple(rCode: (Rt_Value) -> Rt_Value): R_SysFunction {
-            return R_SysFunction { _, args ->
+            return R_ContextFreeSysFunction { args ->
                 Rt_Utils.checkEquals(args.size, 1)
                 rCode(args[0])
             }
@@ -38,6 +38,8 @@ object C_ModifierFields {
     val EXTEND = C_Annotation_Extend.FIELD
 
     val OMIT = C_ModifierField.flagAnnotation("omit")
+    val UNORDERED = C_ModifierField.flagAnnotation("unordered")
+    val PAGE = C_ModifierField.flagAnnotation("page")
     val SORT = C_ModifierField.choiceAnnotations(mapOf(C_Annotations.SORT to R_AtWhatSort.ASC, C_Annotations.SORT_DESC to R_AtWhatSort.DESC))
     val SUMMARIZATION = C_ModifierField.choiceAnnotations(C_AtSummarizationKind.values().associateBy { it.annotation })
 }
@@ -144,6 +144,7 @@ class C_ModuleLoader(
 
     private fun discoverModulesTree(rootModule: R_ModuleName, test: Boolean) {
         val handler = C_ModulesTreeHandler(rootModule, test)
+        moduleReader.startParsingTree(rootModule)
 
         val source = moduleReader.readModuleSource(rootModule)
         if (source != null) {
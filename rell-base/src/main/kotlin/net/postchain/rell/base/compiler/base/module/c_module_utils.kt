@@ -5,6 +5,7 @@
 package net.postchain.rell.base.compiler.base.module
 
 import com.google.common.collect.Multimap
+import net.postchain.rell.base.compiler.ast.S_Node
 import net.postchain.rell.base.compiler.ast.S_Pos
 import net.postchain.rell.base.compiler.ast.S_RellFile
 import net.postchain.rell.base.compiler.base.core.*
@@ -18,6 +19,12 @@ import net.postchain.rell.base.utils.*
 import net.postchain.rell.base.utils.doc.DocModifiers
 import net.postchain.rell.base.utils.doc.DocSymbol
 import net.postchain.rell.base.utils.ide.*
+import java.util.concurrent.Callable
+import java.util.concurrent.ExecutionException
+import java.util.concurrent.ExecutorService
+import java.util.concurrent.Executors
+import java.util.concurrent.Future
+import java.util.concurrent.atomic.AtomicInteger
 
 object C_ModuleUtils {
     const val FILE_SUFFIX = ".rell"
@@ -73,6 +80,7 @@ class C_ModuleReader(
     fun dirExists(moduleName: R_ModuleName) = dirTree.dirExists(moduleName)
     fun fileSubModules(moduleName: R_ModuleName) = dirTree.fileSubModules(moduleName)
     fun dirSubModules(moduleName: R_ModuleName) = dirTree.dirSubModules(moduleName)
+    fun startParsingTree(moduleName: R_ModuleName) = dirTree.startParsingTree(moduleName)
 
     fun readModuleSource(name: R_ModuleName): C_ModuleSource? {
         val entry = cache.computeIfAbsent(name) {
@@ -103,6 +111,13 @@ private class C_ModuleDirTree(
         private val readerCtx: C_ModuleReaderContext,
         private val sourceDir: C_SourceDir,
 ) {
+    private val parseCache = readerCtx.msgCtx.globalCtx.compilerOptions.parseCache
+
+    // AST nodes take attachments from the provider of the compiler thread (used by the IDE), which is not necessarily
+    // thread-safe, so such files are parsed on the compiler thread.
+    private val parallelParsing = readerCtx.msgCtx.globalCtx.compilerOptions.parallelParsing
+            && !S_Node.hasAttachmentProvider()
+
     private val rootDir = DirNode(C_SourcePath.EMPTY, R_ModuleName.EMPTY)
 
     fun dirExists(moduleName: R_ModuleName): Boolean {
@@ -120,6 +135,17 @@ private class C_ModuleDirTree(
         return dirNode?.dirSubModules() ?: immListOf()
     }
 
+    /**
+     * When parallel parsing is on, starts parsing all files in the directory of the module and its subdirectories.
+     * Directories are listed on the calling thread; parse errors are reported when an AST is requested, as usual.
+     */
+    fun startParsingTree(moduleName: R_ModuleName) {
+        if (parallelParsing) {
+            val dirNode = getDirNode(moduleName.parts)
+            dirNode?.startParsingTree()
+        }
+    }
+
     fun readModuleSource(name: R_ModuleName): C_ModuleSource? {
         val (rawFile, rawDir) = if (name.isEmpty()) {
             null to readDirModule(rootDir)
@@ -210,6 +236,14 @@ private class C_ModuleDirTree(
         fun dirSubModules() = dirSubModulesLazy
         fun fileSubModules() = fileSubModulesLazy
 
+        fun startParsingTree() {
+            loadAllFileNodesLazy
+            dirSubModulesLazy
+            for (subDir in subDirs.values.toList()) {
+                subDir.startParsingTree()
+            }
+        }
+
         fun subDir(name: R_Name): DirNode? {
             return subNode(name, subDirs) {
                 val subModule = moduleName.append(name)
@@ -254,6 +288,12 @@ private class C_ModuleDirTree(
                     }
                 }
             }
+
+            if (parallelParsing) {
+                for (fileNode in subFiles.values) {
+                    fileNode.startParsing()
+                }
+            }
         }
 
         private fun calcModuleSource(): C_ModuleSource? {
@@ -318,20 +358,29 @@ private class C_ModuleDirTree(
     ): TreeNode(path) {
         val idePath = sourceFile.idePath()
 
-        private val astLazy: S_RellFile? by lazy {
+        private val astLazy: Lazy<S_RellFile?> = lazy {
             calcAst()
         }
 
+        private var parseFuture: Future<S_RellFile>? = null
+
         private val moduleSourceLazy: C_ModuleSource? by lazy {
             calcModuleSource()
         }
 
-        fun getAst() = astLazy
+        fun getAst() = astLazy.value
         fun getModuleSource() = moduleSourceLazy
 
+        fun startParsing() {
+            if (parseFuture == null && !astLazy.isInitialized()) {
+                parseFuture = C_ParseWorkers.submit { parse() }
+            }
+        }
+
         private fun calcAst(): S_RellFile? {
             return try {
-                sourceFile.readAst()
+                val future = parseFuture
+                if (future == null) parse() else C_ParseWorkers.await(future)
             } catch (e: C_Error) {
                 readerCtx.msgCtx.error(e)
                 null
@@ -342,12 +391,21 @@ private class C_ModuleDirTree(
             }
         }
 
+        /** May be called on a worker thread. */
+        private fun parse(): S_RellFile {
+            return if (parseCache) {
+                C_ParseCache.parse(path, idePath, sourceFile.readText())
+            } else {
+                sourceFile.readAst()
+            }
+        }
+
         private fun calcModuleSource(): C_ModuleSource? {
             if (rName == null || fileName == C_ModuleUtils.MODULE_FILE) {
                 return null
             }
 
-            val ast = astLazy
+            val ast = astLazy.value
 
             return if (ast != null && ast.header == null) null else {
                 val moduleName = dirModuleName.append(rName)
@@ -357,6 +415,32 @@ private class C_ModuleDirTree(
     }
 }
 
+/** Worker threads parsing source files when [C_CompilerOptions.parallelParsing] is on, shared by all compilations. */
+private object C_ParseWorkers {
+    private val POOL_SIZE = Runtime.getRuntime().availableProcessors().coerceIn(1, 8)
+
+    private val executor: ExecutorService by lazy {
+        val counter = AtomicInteger()
+        Executors.newFixedThreadPool(POOL_SIZE) { r ->
+            val t = Thread(r, "rell-parser-${counter.incrementAndGet()}")
+            t.isDaemon = true
+            t
+        }
+    }
+
+    fun submit(code: () -> S_RellFile): Future<S_RellFile> {
+        return executor.submit(Callable { code() })
+    }
+
+    fun await(future: Future<S_RellFile>): S_RellFile {
+        return try {
+            future.get()
+        } catch (e: ExecutionException) {
+            throw e.cause ?: e
+        }
+    }
+}
+
 class S_AppContext(
     val msgCtx: C_MessageContext,
     val symCtxProvider: C_SymbolContextProvider,
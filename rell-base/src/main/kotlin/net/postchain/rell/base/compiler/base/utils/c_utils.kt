@@ -8,6 +8,7 @@ import com.github.h0tk3y.betterParse.parser.ParseException
 import com.github.h0tk3y.betterParse.parser.Parser
 import com.github.h0tk3y.betterParse.parser.parseToEnd
 import net.postchain.rell.base.compiler.ast.S_BasicPos
+import net.postchain.rell.base.compiler.ast.S_Node
 import net.postchain.rell.base.compiler.ast.S_Pos
 import net.postchain.rell.base.compiler.ast.S_RellFile
 import net.postchain.rell.base.compiler.ast.S_ReplCommand
@@ -32,6 +33,7 @@ import net.postchain.rell.base.utils.doc.DocModifiers
 import net.postchain.rell.base.utils.doc.DocSymbolFactory
 import net.postchain.rell.base.utils.ide.IdeFilePath
 import net.postchain.rell.base.utils.ide.IdeSymbolKind
+import java.security.MessageDigest
 import java.util.*
 
 typealias C_CodeMsgSupplier = () -> C_CodeMsg
@@ -483,6 +485,61 @@ object C_Parser {
     fun currentFile(): C_ParserFilePath = currentFileLocal.get()
 }
 
+/**
+ * Process-wide cache of parsed files, used when [C_CompilerOptions.parseCache] is on. A file is looked up by its paths
+ * and the SHA-256 of its text, so an edited file is parsed again. ASTs are immutable and do not depend on compiler
+ * options, so they can be shared between compilations. Files with syntax errors are not cached. The cache is bypassed
+ * when an attachment provider is set (see [S_Node.runWithAttachmentProvider]): node attachments belong to the caller.
+ */
+object C_ParseCache {
+    private const val MAX_SIZE = 10000
+
+    private data class Key(val filePath: C_ParserFilePath, val textHash: Bytes)
+
+    private val cache = object: LinkedHashMap<Key, S_RellFile>(16, 0.75f, true) {
+        override fun removeEldestEntry(eldest: MutableMap.MutableEntry<Key, S_RellFile>) = size > MAX_SIZE
+    }
+
+    private var hits = 0L
+    private var misses = 0L
+
+    fun parse(filePath: C_SourcePath, idePath: IdeFilePath, sourceCode: String): S_RellFile {
+        if (S_Node.hasAttachmentProvider()) {
+            return C_Parser.parse(filePath, idePath, sourceCode)
+        }
+
+        val textHash = Bytes.of(MessageDigest.getInstance("SHA-256").digest(sourceCode.toByteArray()))
+        val key = Key(C_ParserFilePath(filePath, idePath), textHash)
+
+        val cached = synchronized(this) {
+            val ast = cache[key]
+            if (ast != null) hits++ else misses++
+            ast
+        }
+        if (cached != null) {
+            return cached
+        }
+
+        val ast = C_Parser.parse(filePath, idePath, sourceCode)
+        synchronized(this) {
+            cache[key] = ast
+        }
+        return ast
+    }
+
+    fun stats(): C_ParseCacheStats = synchronized(this) {
+        C_ParseCacheStats(size = cache.size, hits = hits, misses = misses)
+    }
+
+    fun clear() {
+        synchronized(this) {
+            cache.clear()
+        }
+    }
+}
+
+data class C_ParseCacheStats(val size: Int, val hits: Long, val misses: Long)
+
 object C_GraphUtils {
     fun <T> findCycles(graph: Map<T, Collection<T>>): List<List<T>> {
         val graphEx = graph.mapValues { vert ->
@@ -10,6 +10,7 @@ import com.github.h0tk3y.betterParse.grammar.parser
 import com.github.h0tk3y.betterParse.parser.Parser
 import net.postchain.rell.base.compiler.ast.*
 import net.postchain.rell.base.compiler.base.core.C_Name
+import net.postchain.rell.base.model.R_IndexCmpOp
 import net.postchain.rell.base.model.R_KeyIndexKind
 import net.postchain.rell.base.model.expr.R_AtCardinality
 import net.postchain.rell.base.utils.immListOf
@@ -236,9 +237,46 @@ object S_Grammar : Grammar<S_RellFile>() {
             or ( INDEX mapNode { R_KeyIndexKind.INDEX } )
     )
 
-    private val relKeyIndexClause by ( keyIndexKind * separatedTerms(baseAttributeDefinition, COMMA, false) * -SEMI ) map {
-        (kind, attrs) ->
-        S_KeyIndexClause(kind.pos, kind.value, attrs)
+    private val keyIndexFunctionItem by ( name * -DOT * name * -LPAR * -RPAR ) map {
+        (attr, fn) ->
+        S_KeyIndexItem_Function(attr, fn)
+    }
+
+    private val keyIndexAttrItem by baseAttributeDefinition map { S_KeyIndexItem_Attr(it) }
+
+    private val keyIndexItem by keyIndexFunctionItem or keyIndexAttrItem
+
+    private val indexCmpOp by (
+            ( EQ mapNode { R_IndexCmpOp.EQ } )
+            or ( NE mapNode { R_IndexCmpOp.NE } )
+            or ( LE mapNode { R_IndexCmpOp.LE } )
+            or ( GE mapNode { R_IndexCmpOp.GE } )
+            or ( LT mapNode { R_IndexCmpOp.LT } )
+            or ( GT mapNode { R_IndexCmpOp.GT } )
+    )
+
+    private val indexConditionNot by ( -NOT * -DOT * name ) map { S_IndexCondition(it, true, null, null) }
+
+    private val indexConditionCmp by ( -DOT * name * optional(indexCmpOp * parser(S_Grammar::literalExpr)) ) map {
+        (attr, cmp) ->
+        S_IndexCondition(attr, false, cmp?.t1, cmp?.t2)
+    }
+
+    private val indexCondition by indexConditionNot or indexConditionCmp
+
+    private val indexInclude by -INCLUDE * -LPAR * separatedTerms(name, COMMA, false) * -RPAR
+
+    private val indexWhere by -AT * -LCURL * separatedTerms(indexCondition, COMMA, false) * -RCURL
+
+    private val relKeyIndexClause by (
+            keyIndexKind
+            * separatedTerms(keyIndexItem, COMMA, false)
+            * optional(indexInclude)
+            * optional(indexWhere)
+            * -SEMI
+    ) map {
+        (kind, items, include, where) ->
+        S_KeyIndexClause(kind.pos, kind.value, items, include ?: immListOf(), where ?: immListOf())
     }
 
     private val relAnyClause by relAttributeClause or relKeyIndexClause
@@ -477,10 +515,13 @@ object S_Grammar : Grammar<S_RellFile>() {
         G_BaseExprTail_Call(args)
     }
 
-    private val baseExprTailAt by ( atExprAt * atExprWhere * optional(atExprWhat) * optional(atExprModifiers) ) map {
-        ( cardinality, where, whatOpt, mods ) ->
+    private val baseExprTailAt by (
+            atExprAt * atExprWhere * optional(atExprWhat) * zeroOrMore(annotation) * optional(atExprModifiers)
+    ) map {
+        ( cardinality, where, whatOpt, annotations, mods ) ->
         val what = whatOpt ?: S_AtExprWhat_Default()
-        G_BaseExprTail_At(cardinality.pos, cardinality.value, where, what, mods?.limit, mods?.offset)
+        val modifiers = S_Modifiers(annotations)
+        G_BaseExprTail_At(cardinality.pos, cardinality.value, where, what, modifiers, mods?.limit, mods?.offset)
     }
 
     private val baseExprTailNoCallNoAt by (
@@ -69,11 +69,12 @@ class G_BaseExprTail_At(
     val cardinality: R_AtCardinality,
     val where: S_AtExprWhere,
     val what: S_AtExprWhat,
+    val modifiers: S_Modifiers,
     val limit: S_Expr?,
     val offset: S_Expr?
 ): G_BaseExprTail() {
     override fun toExpr(base: S_Expr): S_Expr {
-        return S_AtExpr(base, S_PosValue(pos, cardinality), where, what, limit, offset)
+        return S_AtExpr(base, S_PosValue(pos, cardinality), where, what, modifiers, limit, offset)
     }
 }
 
@@ -18,9 +18,11 @@ import net.postchain.rell.base.compiler.base.utils.C_PosCodeMsg
 import net.postchain.rell.base.model.*
 import net.postchain.rell.base.model.expr.Db_Expr
 import net.postchain.rell.base.model.expr.R_BlockCheckExpr
+import net.postchain.rell.base.model.expr.R_ConstantValueExpr
 import net.postchain.rell.base.model.expr.R_Expr
 import net.postchain.rell.base.model.expr.R_StackTraceExpr
-import net.postchain.rell.base.runtime.Rt_Value
+import net.postchain.rell.base.runtime.*
+import net.postchain.rell.base.utils.One
 import net.postchain.rell.base.utils.immSetOf
 import net.postchain.rell.base.utils.toImmList
 import net.postchain.rell.base.utils.toImmSet
@@ -92,6 +94,36 @@ class V_ConstantValueEvalContext {
     }
 }
 
+object V_ConstantFolding {
+    /** Values bigger than this (in characters, bytes or elements) are computed at run-time rather than folded. */
+    const val MAX_VALUE_SIZE = 10_000
+
+    fun isFoldableSize(value: Rt_Value): Boolean = valueSize(value, MAX_VALUE_SIZE) <= MAX_VALUE_SIZE
+
+    private fun valueSize(value: Rt_Value, limit: Int): Int {
+        return when (value) {
+            is Rt_TextValue -> value.value.length
+            is Rt_ByteArrayValue -> value.asByteArray().size
+            is Rt_JsonValue -> value.asJsonString().length
+            is Rt_BigIntegerValue -> value.value.bitLength() / 8
+            is Rt_DecimalValue -> value.value.precision()
+            is Rt_TupleValue -> elementsSize(value.elements, limit)
+            is Rt_ListValue, is Rt_SetValue -> elementsSize(value.asCollection(), limit)
+            is Rt_MapValue -> elementsSize(value.asMap().entries.flatMap { listOf(it.key, it.value) }, limit)
+            else -> 1
+        }
+    }
+
+    private fun elementsSize(values: Collection<Rt_Value>, limit: Int): Int {
+        var res = values.size
+        for (value in values) {
+            if (res > limit) break
+            res += valueSize(value, limit - res)
+        }
+        return res
+    }
+}
+
 class V_GlobalConstantRestriction(val code: String, val msg: String?)
 
 class V_ExprWrapper(
@@ -135,7 +167,7 @@ abstract class V_Expr(protected val exprCtx: C_ExprContext, val pos: S_Pos) {
     protected open fun toDbExpr0(): Db_Expr = throw C_Errors.errExprDbNotAllowed(pos)
 
     fun toRExpr(): R_Expr {
-        var rExpr = toRExpr0()
+        var rExpr = foldConstant() ?: toRExpr0()
         val filePos = pos.toFilePos()
         rExpr = R_StackTraceExpr(rExpr, filePos)
         if (exprCtx.globalCtx.compilerOptions.blockCheck) {
@@ -144,6 +176,22 @@ abstract class V_Expr(protected val exprCtx: C_ExprContext, val pos: S_Pos) {
         return rExpr
     }
 
+    private fun foldConstant(): R_Expr? {
+        if (!exprCtx.globalCtx.compilerOptions.constantFolding || !isConstantFoldable()) return null
+        if (type.completeFlags().mutable || type.isError()) return null
+
+        val value = try {
+            constantValue(V_ConstantValueEvalContext())
+        } catch (e: Throwable) {
+            // Not folded: the error must happen at run-time, and only if the expression is evaluated.
+            null
+        }
+        if (value == null || !V_ConstantFolding.isFoldableSize(value)) return null
+
+        exprCtx.globalCtx.constantFolding.add(pos, value)
+        return R_ConstantValueExpr(type, value)
+    }
+
     fun toDbExpr(): Db_Expr {
         if (info.dependsOnDbAtEntity) {
             return toDbExpr0()
@@ -272,7 +320,27 @@ abstract class V_Expr(protected val exprCtx: C_ExprContext, val pos: S_Pos) {
         }
     }
 
-    open fun constantValue(ctx: V_ConstantValueEvalContext): Rt_Value? = null
+    // Memoized, as the value of an expression is needed by every enclosing expression which tries to fold itself.
+    private var constantValueMemo: One<Rt_Value?>? = null
+    private var constantValueError: Throwable? = null
+
+    fun constantValue(ctx: V_ConstantValueEvalContext): Rt_Value? {
+        constantValueError?.let { throw it }
+        constantValueMemo?.let { return it.value }
+
+        val value = try {
+            constantValue0(ctx)
+        } catch (e: Throwable) {
+            constantValueError = e
+            throw e
+        }
+
+        constantValueMemo = One(value)
+        return value
+    }
+
+    protected open fun constantValue0(ctx: V_ConstantValueEvalContext): Rt_Value? = null
+    protected open fun isConstantFoldable(): Boolean = true
 
     open fun isAtExprItem(): Boolean = false
     open fun implicitTargetAttrName(): R_Name? = null
@@ -96,6 +96,8 @@ class V_AtExprBase(
     what: List<V_DbAtWhatField>,
     private val where: V_Expr?,
     private val isMany: Boolean,
+    private val unordered: Boolean,
+    private val page: Boolean,
 ) {
     private val from = from.toImmList()
     private val what = what.toImmList()
@@ -109,7 +111,7 @@ class V_AtExprBase(
     fun toDbBase(nested: Boolean): Db_AtExprBase {
         val dbWhat = what.map { it.toDbField(nested) }
         val dbWhere = where?.toDbExpr()
-        return Db_AtExprBase(from, dbWhat, dbWhere, isMany)
+        return Db_AtExprBase(from, dbWhat, dbWhere, isMany, unordered, page)
     }
 }
 
@@ -135,6 +137,29 @@ class V_TopDbAtExpr(
     }
 }
 
+class V_PageDbAtExpr(
+    exprCtx: C_ExprContext,
+    pos: S_Pos,
+    private val resultType: R_Type,
+    private val base: V_AtExprBase,
+    private val limit: V_Expr?,
+    private val token: V_Expr?,
+    private val internals: R_DbAtExprInternals,
+    private val resVarFacts: C_ExprVarFacts,
+): V_Expr(exprCtx, pos) {
+    override fun exprInfo0() = V_ExprInfo(resultType, base.innerExprs() + listOfNotNull(limit, token))
+    override fun varFacts0() = resVarFacts
+
+    override fun globalConstantRestriction() = V_GlobalConstantRestriction("at_expr", null)
+
+    override fun toRExpr0(): R_Expr {
+        val dbBase = base.toDbBase(false)
+        val rLimit = limit?.toRExpr()
+        val rToken = token?.toRExpr()
+        return R_DbAtPageExpr(resultType, dbBase, rLimit, rToken, internals)
+    }
+}
+
 class V_NestedDbAtExpr(
         exprCtx: C_ExprContext,
         pos: S_Pos,
@@ -43,7 +43,8 @@ class V_ConstantValueExpr(
 ): V_Expr(exprCtx, pos) {
     override fun exprInfo0() = V_ExprInfo.simple(valueType, dependsOnAtExprs = dependsOnAtExprs)
     override fun toRExpr0() = R_ConstantValueExpr(type, value)
-    override fun constantValue(ctx: V_ConstantValueEvalContext) = value
+    override fun constantValue0(ctx: V_ConstantValueEvalContext) = value
+    override fun isConstantFoldable() = false
 }
 
 class V_IfExpr(
@@ -97,7 +98,7 @@ class V_TupleExpr(
         return C_DbAtWhatValue_Complex(exprs, evaluator)
     }
 
-    override fun constantValue(ctx: V_ConstantValueEvalContext): Rt_Value? {
+    override fun constantValue0(ctx: V_ConstantValueEvalContext): Rt_Value? {
         val values = exprs.mapNotNull { it.constantValue(ctx) }
         if (values.size != exprs.size) return null
         return Rt_TupleValue(tupleType, values)
@@ -122,7 +123,7 @@ class V_TypeAdapterExpr(
         return adapter.adaptExprDb(dbExpr)
     }
 
-    override fun constantValue(ctx: V_ConstantValueEvalContext): Rt_Value? {
+    override fun constantValue0(ctx: V_ConstantValueEvalContext): Rt_Value? {
         val value = expr.constantValue(ctx)
         value ?: return null
         val rAdapter = adapter.toRAdapter()
@@ -208,11 +209,14 @@ class V_GlobalConstantExpr(
 
     override fun toRExpr0() = R_GlobalConstantExpr(resType, constId)
 
-    override fun constantValue(ctx: V_ConstantValueEvalContext): Rt_Value? {
+    override fun constantValue0(ctx: V_ConstantValueEvalContext): Rt_Value? {
         val cBody = header.constBody
         return cBody?.constantValue(ctx)
     }
 
+    // Already a cached value, folding is useful only for expressions using the constant.
+    override fun isConstantFoldable() = false
+
     override fun varId() = varId
     override fun globalConstantId() = constId
 
@@ -42,7 +42,7 @@ class V_ListLiteralExpr(
         return C_DbAtWhatValue_Complex(elems, evaluator)
     }
 
-    override fun constantValue(ctx: V_ConstantValueEvalContext): Rt_Value? {
+    override fun constantValue0(ctx: V_ConstantValueEvalContext): Rt_Value? {
         val values = elems.mapNotNull { it.constantValue(ctx) }
         if (values.size != elems.size) return null
         return Rt_ListValue(listType, values.toMutableList())
@@ -84,7 +84,7 @@ class V_MapLiteralExpr(
         return C_DbAtWhatValue_Complex(vExprs, evaluator)
     }
 
-    override fun constantValue(ctx: V_ConstantValueEvalContext): Rt_Value? {
+    override fun constantValue0(ctx: V_ConstantValueEvalContext): Rt_Value? {
         val values = entries.map { (k, v) -> Pair(k.constantValue(ctx), v.constantValue(ctx)) }
         if (values.any { (k, v) -> k == null || v == null }) return null
         return Rt_MapValue(mapType, values.associate { (k, v) -> k!! to v!! }.toMutableMap())
@@ -67,6 +67,14 @@ class V_FunctionCallExpr(
 
     override fun globalConstantRestriction() = call.globalConstantRestriction()
 
+    override fun constantValue0(ctx: V_ConstantValueEvalContext): Rt_Value? {
+        // Library functions are evaluated at compile time only as a part of constant folding.
+        if (!exprCtx.globalCtx.compilerOptions.constantFolding) return null
+        val baseValue = if (base == null) null else (base.constantValue(ctx) ?: return null)
+        if (safe && baseValue == Rt_NullValue) return Rt_NullValue
+        return call.constantValue(ctx, baseValue)
+    }
+
     override fun toRExpr0(): R_Expr {
         val rBase = base?.toRExpr()
         val rCall = call.rCall()
@@ -96,6 +104,8 @@ sealed class V_CommonFunctionCall(
 
     fun canBeDbExpr() = target.canBeDb()
 
+    open fun constantValue(ctx: V_ConstantValueEvalContext, baseValue: Rt_Value?): Rt_Value? = null
+
     protected abstract fun rCall0(rTarget: R_FunctionCallTarget, rArgExprs: List<R_Expr>): R_FunctionCall
 
     protected abstract fun callTarget(
@@ -162,6 +172,12 @@ class V_CommonFunctionCall_Full(
         return R_FullFunctionCall(returnType, rTarget, callFilePos, rArgExprs, callArgs.mapping)
     }
 
+    override fun constantValue(ctx: V_ConstantValueEvalContext, baseValue: Rt_Value?): Rt_Value? {
+        val argValues = callArgs.exprs.map { it.constantValue(ctx) ?: return null }
+        val values2 = callArgs.mapping.map { argValues[it] }
+        return target.constantValue(baseValue, values2)
+    }
+
     override fun dbExpr(dbBase: Db_Expr?): Db_Expr {
         val dbArgs = callArgs.exprs.map { it.toDbExpr() }
         return target.toDbExpr(pos, dbBase, dbArgs)
@@ -197,6 +213,7 @@ sealed class V_FunctionCallTarget {
     open fun canBeDb() = false
     open fun toDbExpr(pos: S_Pos, dbBase: Db_Expr?, dbArgs: List<Db_Expr>): Db_Expr = throw C_Errors.errExprDbNotAllowed(pos)
     open fun globalConstantRestriction(): V_GlobalConstantRestriction? = null
+    open fun constantValue(baseValue: Rt_Value?, args: List<Rt_Value>): Rt_Value? = null
 }
 
 class V_FunctionCallTarget_RegularUserFunction(
@@ -267,6 +284,19 @@ abstract class V_FunctionCallTarget_SysFunction(
             V_GlobalConstantRestriction(code, msg)
         }
     }
+
+    final override fun constantValue(baseValue: Rt_Value?, args: List<Rt_Value>): Rt_Value? {
+        val fn = desc.rFn
+        if (!desc.pure || fn !is R_ContextFreeSysFunction) return null
+        val fullArgs = if (baseValue == null) args else listOf(baseValue) + args
+        val res = try {
+            fn.callNoContext(fullArgs)
+        } catch (e: Throwable) {
+            // Calls which fail (including running out of memory) are not folded, the error happens at run-time.
+            null
+        }
+        return if (res != null && V_ConstantFolding.isFoldableSize(res)) res else null
+    }
 }
 
 class V_FunctionCallTarget_SysGlobalFunction(
@@ -299,6 +329,7 @@ abstract class V_MemberFunctionCall(
     abstract fun vExprs(): List<V_Expr>
     open fun postVarFacts(): C_VarFacts = C_VarFacts.andPostFacts(vExprs())
     open fun globalConstantRestriction(): V_GlobalConstantRestriction? = null
+    open fun constantValue(ctx: V_ConstantValueEvalContext, baseValue: Rt_Value): Rt_Value? = null
 
     abstract fun returnType(): R_Type
     abstract fun calculator(): R_MemberCalculator
@@ -319,6 +350,12 @@ class V_MemberFunctionCall_CommonCall(
     override fun globalConstantRestriction() = call.globalConstantRestriction()
     override fun returnType() = returnType
 
+    override fun constantValue(ctx: V_ConstantValueEvalContext, baseValue: Rt_Value): Rt_Value? {
+        // Same as for global functions, see V_FunctionCallExpr.
+        if (!exprCtx.globalCtx.compilerOptions.constantFolding) return null
+        return call.constantValue(ctx, baseValue)
+    }
+
     override fun calculator(): R_MemberCalculator {
         val rCall = call.rCall()
         return R_MemberCalculator_CommonCall(returnType, rCall)
@@ -50,7 +50,7 @@ class V_InCollectionExpr(
             }
         } else {
             val rRight = right.toRExpr()
-            Db_InCollectionExpr(dbLeft, rRight, not)
+            Db_InCollectionExpr(dbLeft, rRight, elemType, not)
         }
     }
 }
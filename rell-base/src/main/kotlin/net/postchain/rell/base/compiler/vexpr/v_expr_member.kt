@@ -28,6 +28,7 @@ abstract class V_TypeValueMember(val type: R_Type, val ideInfo: C_IdeSymbolInfo)
     abstract fun vExprs(): List<V_Expr>
     open fun postVarFacts(): C_VarFacts = C_VarFacts.andPostFacts(vExprs())
     open fun globalConstantRestriction(): V_GlobalConstantRestriction? = null
+    open fun constantValue(ctx: V_ConstantValueEvalContext, baseValue: Rt_Value): Rt_Value? = null
     open fun safeCallable() = true
 
     abstract fun calculator(): R_MemberCalculator
@@ -91,6 +92,12 @@ class V_ValueMemberExpr(
 
     override fun globalConstantRestriction() = member.globalConstantRestriction()
 
+    override fun constantValue0(ctx: V_ConstantValueEvalContext): Rt_Value? {
+        val baseValue = base.constantValue(ctx)
+        baseValue ?: return null
+        return if (safe && baseValue == Rt_NullValue) Rt_NullValue else member.constantValue(ctx, baseValue)
+    }
+
     override fun toRExpr0(): R_Expr {
         val rBase = base.toRExpr()
         val calculator = member.calculator()
@@ -30,7 +30,7 @@ class V_BinaryExpr(
     override fun exprInfo0() = V_ExprInfo.simple(op.resType, left, right, canBeDbExpr = op.dbOp != null)
     override fun varFacts0() = resVarFacts
 
-    override fun constantValue(ctx: V_ConstantValueEvalContext): Rt_Value? {
+    override fun constantValue0(ctx: V_ConstantValueEvalContext): Rt_Value? {
         val leftValue = left.constantValue(ctx)
         leftValue ?: return null
         val rightValue = right.constantValue(ctx)
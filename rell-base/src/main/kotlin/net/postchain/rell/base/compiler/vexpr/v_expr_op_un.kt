@@ -72,7 +72,7 @@ class V_UnaryExpr(
         return op.compileDb(pos, dbExpr)
     }
 
-    override fun constantValue(ctx: V_ConstantValueEvalContext): Rt_Value? {
+    override fun constantValue0(ctx: V_ConstantValueEvalContext): Rt_Value? {
         val v = expr.constantValue(ctx)
         if (v == null) return null
         val res = op.evaluate(v)
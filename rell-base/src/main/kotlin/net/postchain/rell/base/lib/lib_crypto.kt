@@ -11,11 +11,14 @@ import net.postchain.rell.base.compiler.base.utils.toCodeMsg
 import net.postchain.rell.base.lmodel.L_ParamArity
 import net.postchain.rell.base.lmodel.dsl.Ld_NamespaceDsl
 import net.postchain.rell.base.model.R_BigIntegerType
+import net.postchain.rell.base.model.R_BooleanType
 import net.postchain.rell.base.model.R_ByteArrayType
 import net.postchain.rell.base.model.R_IntegerType
+import net.postchain.rell.base.model.R_ListType
 import net.postchain.rell.base.model.R_TupleType
 import net.postchain.rell.base.runtime.*
 import net.postchain.rell.base.runtime.utils.Rt_Utils
+import net.postchain.rell.base.utils.Bytes
 import net.postchain.rell.base.utils.PostchainGtvUtils
 import net.postchain.rell.base.utils.checkEquals
 import net.postchain.rell.base.utils.etherjar.PrivateKey
@@ -25,6 +28,12 @@ import org.bouncycastle.jcajce.provider.digest.Keccak
 import org.bouncycastle.math.ec.ECPoint
 import java.math.BigInteger
 import java.security.MessageDigest
+import java.util.concurrent.Callable
+import java.util.concurrent.ExecutionException
+import java.util.concurrent.ExecutorService
+import java.util.concurrent.Executors
+import java.util.concurrent.Future
+import java.util.concurrent.atomic.AtomicInteger
 
 object Lib_Crypto {
     val Sha256 = C_SysFunctionBody.simple(pure = true) { a ->
@@ -34,6 +43,14 @@ object Lib_Crypto {
     }
 
     private val POINT_TYPE = R_TupleType.create(R_BigIntegerType, R_BigIntegerType)
+    private val LIST_OF_BOOLEAN_TYPE = R_ListType(R_BooleanType)
+    private val LIST_OF_BYTE_ARRAY_TYPE = R_ListType(R_ByteArrayType)
+
+    private const val POINT_CACHE_SIZE = 1000
+
+    private val pointCache = object: LinkedHashMap<Bytes, ECPoint>(16, 0.75f, true) {
+        override fun removeEldestEntry(eldest: MutableMap.MutableEntry<Bytes, ECPoint>) = size > POINT_CACHE_SIZE
+    }
 
     val NAMESPACE = Ld_NamespaceDsl.make {
         alias(target = "crypto.sha256")
@@ -62,17 +79,26 @@ object Lib_Crypto {
                 param("byte_array")
 
                 body { a, b, c ->
-                    val digest = a.asByteArray()
-                    val res = try {
-                        val signature = Signature(b.asByteArray(), c.asByteArray())
-                        PostchainGtvUtils.cryptoSystem.verifyDigest(digest, signature)
-                    } catch (e: Exception) {
-                        throw Rt_Exception.common("verify_signature", e.message ?: "Signature verification crashed")
-                    }
+                    val res = verifySignature(a.asByteArray(), b.asByteArray(), c.asByteArray())
                     Rt_BooleanValue.get(res)
                 }
             }
 
+            function("verify_signature_batch", "list<boolean>", pure = true) {
+                param(name = "signatures", type = "list<(byte_array,byte_array,byte_array)>")
+
+                body { a ->
+                    val items = a.asList().map { item ->
+                        val t = item.asTuple()
+                        Triple(t[0].asByteArray(), t[1].asByteArray(), t[2].asByteArray())
+                    }
+                    val res = Lib_CryptoWorkers.map(items) { (digest, pubKey, sign) ->
+                        Rt_BooleanValue.get(verifySignature(digest, pubKey, sign))
+                    }
+                    Rt_ListValue(LIST_OF_BOOLEAN_TYPE, res.toMutableList())
+                }
+            }
+
             function("eth_ecrecover", "byte_array", pure = true) {
                 param("byte_array")
                 param("byte_array")
@@ -80,22 +106,26 @@ object Lib_Crypto {
                 param("byte_array")
 
                 body { a, b, c, d ->
-                    val r = a.asByteArray()
-                    val s = b.asByteArray()
-                    val recId = c.asInteger()
-                    val hash = d.asByteArray()
-
-                    check(recId in 0..100000) { "recId out of range: $recId" }
-                    val rVal = BigInteger(1, r)
-                    val sVal = BigInteger(1, s)
-                    val v = recId.toInt() + 27
-                    val signature = net.postchain.rell.base.utils.etherjar.Signature(hash, v, rVal, sVal)
-                    val res = Signer.ecrecover(signature)
-
+                    val res = ethEcrecover(a.asByteArray(), b.asByteArray(), c.asInteger(), d.asByteArray())
                     Rt_ByteArrayValue.get(res)
                 }
             }
 
+            function("eth_ecrecover_batch", "list<byte_array>", pure = true) {
+                param(name = "signatures", type = "list<(byte_array,byte_array,integer,byte_array)>")
+
+                body { a ->
+                    val items = a.asList().map { item ->
+                        val t = item.asTuple()
+                        EthSignature(t[0].asByteArray(), t[1].asByteArray(), t[2].asInteger(), t[3].asByteArray())
+                    }
+                    val res = Lib_CryptoWorkers.map(items) { sign ->
+                        Rt_ByteArrayValue.get(ethEcrecover(sign.r, sign.s, sign.recId, sign.hash))
+                    }
+                    Rt_ListValue(LIST_OF_BYTE_ARRAY_TYPE, res.toMutableList())
+                }
+            }
+
             val signatureType = R_TupleType.create(R_ByteArrayType, R_ByteArrayType, R_IntegerType)
             val signatureTypeStr = "(byte_array,byte_array,integer)"
 
@@ -194,6 +224,26 @@ object Lib_Crypto {
         }
     }
 
+    private fun verifySignature(digest: ByteArray, pubKey: ByteArray, sign: ByteArray): Boolean {
+        return try {
+            val signature = Signature(pubKey, sign)
+            PostchainGtvUtils.cryptoSystem.verifyDigest(digest, signature)
+        } catch (e: Exception) {
+            throw Rt_Exception.common("verify_signature", e.message ?: "Signature verification crashed")
+        }
+    }
+
+    private class EthSignature(val r: ByteArray, val s: ByteArray, val recId: Long, val hash: ByteArray)
+
+    private fun ethEcrecover(r: ByteArray, s: ByteArray, recId: Long, hash: ByteArray): ByteArray {
+        check(recId in 0..100000) { "recId out of range: $recId" }
+        val rVal = BigInteger(1, r)
+        val sVal = BigInteger(1, s)
+        val v = recId.toInt() + 27
+        val signature = net.postchain.rell.base.utils.etherjar.Signature(hash, v, rVal, sVal)
+        return Signer.ecrecover(signature)
+    }
+
     private fun bigIntToRS(i: BigInteger): ByteArray {
         val res = i.toByteArray()
         return if (res.size < 32) {
@@ -229,11 +279,22 @@ object Lib_Crypto {
     }
 
     private fun bytesToPoint(bytes: ByteArray): ECPoint {
+        // Decoding a point is expensive (square root in the field), and the same public keys are decoded repeatedly.
+        val key = Bytes.of(bytes)
+        val cached = synchronized(pointCache) { pointCache[key] }
+        if (cached != null) {
+            return cached
+        }
+
         val point = try {
             CURVE_PARAMS.curve.decodePoint(bytes)
         } catch (e: RuntimeException) {
             throw Rt_Exception.common("crypto:bad_pubkey:${bytes.size}", "Bad public key (size: ${bytes.size})")
         }
+
+        synchronized(pointCache) {
+            pointCache[key] = point
+        }
         return point
     }
 
@@ -272,3 +333,49 @@ object Lib_Crypto {
         return md.digest(data)
     }
 }
+
+/**
+ * Runs batch crypto functions on a bounded pool of daemon threads. Results are returned in the order of the input,
+ * and if several items fail, the error of the first one (in input order) is thrown, as if the batch was processed
+ * sequentially.
+ */
+private object Lib_CryptoWorkers {
+    /** Smaller batches are processed on the calling thread, as splitting them costs more than it saves. */
+    private const val MIN_PARALLEL_SIZE = 8
+
+    private val POOL_SIZE = Runtime.getRuntime().availableProcessors().coerceIn(1, 8)
+
+    private val executor: ExecutorService by lazy {
+        val counter = AtomicInteger()
+        Executors.newFixedThreadPool(POOL_SIZE) { r ->
+            val t = Thread(r, "rell-crypto-${counter.incrementAndGet()}")
+            t.isDaemon = true
+            t
+        }
+    }
+
+    fun <T, R> map(items: List<T>, fn: (T) -> R): List<R> {
+        if (POOL_SIZE == 1 || items.size < MIN_PARALLEL_SIZE) {
+            return items.map(fn)
+        }
+
+        val chunkSize = (items.size + POOL_SIZE - 1) / POOL_SIZE
+        val futures: List<Future<List<R>>> = items.chunked(chunkSize).map { chunk ->
+            executor.submit(Callable { chunk.map(fn) })
+        }
+
+        val res = mutableListOf<R>()
+        try {
+            for (future in futures) {
+                res.addAll(future.get())
+            }
+        } catch (e: ExecutionException) {
+            throw e.cause ?: e
+        } finally {
+            for (future in futures) {
+                future.cancel(false)
+            }
+        }
+        return res
+    }
+}
@@ -117,7 +117,7 @@ private class BlockCommonFunctions(
             bodyContext { ctx, arg ->
                 val block = getRunBlock(ctx, arg, runFullName)
                 try {
-                    ctx.appCtx.blockRunner.runBlock(ctx, block)
+                    runBlock(ctx, block)
                 } catch (e: Rt_Exception) {
                     throw e
                 } catch (e: Throwable) {
@@ -152,9 +152,18 @@ private class BlockCommonFunctions(
         return block
     }
 
-    private fun runMustFail(ctx: Rt_CallContext, block: Rt_TestBlockValue, expected: String?): Rt_Value {
+    private fun runBlock(ctx: Rt_CallContext, block: Rt_TestBlockValue) {
         try {
             ctx.appCtx.blockRunner.runBlock(ctx, block)
+        } finally {
+            // The block modifies the database outside of the current execution context.
+            ctx.exeCtx.invalidateDbCaches()
+        }
+    }
+
+    private fun runMustFail(ctx: Rt_CallContext, block: Rt_TestBlockValue, expected: String?): Rt_Value {
+        try {
+            runBlock(ctx, block)
         } catch (e: Throwable) {
             val actual = e.message ?: ""
             Lib_Test_Assert.checkErrorMessage(runMustFailSimpleName, expected, actual)
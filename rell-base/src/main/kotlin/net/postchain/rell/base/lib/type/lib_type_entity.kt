@@ -21,6 +21,7 @@ import net.postchain.rell.base.compiler.vexpr.V_GlobalConstantRestriction
 import net.postchain.rell.base.compiler.vexpr.V_TypeValueMember
 import net.postchain.rell.base.lmodel.L_TypeUtils
 import net.postchain.rell.base.lmodel.dsl.Ld_NamespaceDsl
+import net.postchain.rell.base.model.R_Attribute
 import net.postchain.rell.base.model.R_EntityDefinition
 import net.postchain.rell.base.model.R_EntityType
 import net.postchain.rell.base.model.R_Struct
@@ -185,14 +186,18 @@ private object EntityUtils {
         val whatValue = Db_AtWhatValue_DbExpr(dbExpr, path.last().type)
         val whatField = Db_AtWhatField(R_AtWhatFieldFlags.DEFAULT, whatValue)
 
-        return createCalculator0(atEntity, whatField, resType, cLambda)
+        // Only direct attributes (not paths like "a.b.c") are served by the runtime entity cache.
+        val cachedAttr = if (path.size == 1) path[0].attribute() else null
+
+        return createCalculator0(atEntity, whatField, resType, cLambda, cachedAttr)
     }
 
     fun createCalculator0(
         atEntity: R_DbAtEntity,
         whatField: Db_AtWhatField,
         resType: R_Type,
-        cLambda: C_LambdaBlock
+        cLambda: C_LambdaBlock,
+        cachedAttr: R_Attribute? = null,
     ): R_MemberCalculator {
         val whereLeft = Db_EntityExpr(atEntity)
         val whereRight = cLambda.compileVarDbExpr()
@@ -202,7 +207,7 @@ private object EntityUtils {
 
         val from = listOf(atEntity)
         val atBase = Db_AtExprBase(from, what, where, isMany = false)
-        return R_MemberCalculator_DataAttribute(resType, atBase, cLambda.rLambda)
+        return R_MemberCalculator_DataAttribute(resType, atBase, cLambda.rLambda, cachedAttr)
     }
 
     fun asTableExpr(ctx: C_ExprContext, dbExpr: Db_Expr, attrRef: C_EntityAttrRef, attrPos: S_Pos): Db_TableExpr? {
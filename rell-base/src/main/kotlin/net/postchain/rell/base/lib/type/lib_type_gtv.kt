@@ -114,20 +114,25 @@ object Lib_Type_Gtv {
                         if (selfType is R_VirtualType) {
                             body { a ->
                                 val virtual = a.asVirtual()
-                                val gtv = virtual.gtv
-                                val hash = Rt_Utils.wrapErr("fn:virtual:hash") {
-                                    PostchainGtvUtils.merkleHash(gtv)
+                                virtual.merkleHash(selfType) {
+                                    val hash = Rt_Utils.wrapErr("fn:virtual:hash") {
+                                        PostchainGtvUtils.merkleHash(virtual.gtv)
+                                    }
+                                    Rt_ByteArrayValue.get(hash)
                                 }
-                                Rt_ByteArrayValue.get(hash)
                             }
                         } else {
                             validateToGtvBody(this, selfType)
+                            val immutable = !selfType.completeFlags().mutable
                             body { a ->
-                                val hash = Rt_Utils.wrapErr("fn:any:hash") {
-                                    val gtv = selfType.rtToGtv(a, false)
-                                    PostchainGtvUtils.merkleHash(gtv)
+                                val calculator = {
+                                    val hash = Rt_Utils.wrapErr("fn:any:hash") {
+                                        val gtv = selfType.rtToGtv(a, false)
+                                        PostchainGtvUtils.merkleHash(gtv)
+                                    }
+                                    Rt_ByteArrayValue.get(hash)
                                 }
-                                Rt_ByteArrayValue.get(hash)
+                                if (immutable) a.merkleHash(selfType, calculator) else calculator()
                             }
                         }
                     }
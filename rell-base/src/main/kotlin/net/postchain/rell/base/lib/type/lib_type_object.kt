@@ -23,8 +23,8 @@ import net.postchain.rell.base.model.expr.*
 import net.postchain.rell.base.runtime.Rt_CallFrame
 import net.postchain.rell.base.runtime.Rt_Exception
 import net.postchain.rell.base.runtime.Rt_ObjectValue
+import net.postchain.rell.base.runtime.Rt_StructValue
 import net.postchain.rell.base.runtime.Rt_Value
-import net.postchain.rell.base.utils.checkEquals
 import net.postchain.rell.base.utils.immListOf
 
 object Lib_Type_Object {
@@ -78,7 +78,9 @@ object Lib_Type_Object {
             val whatExpr = Db_AttrExpr(Db_EntityExpr(atEntity), attr)
             val whatValue = Db_AtWhatValue_DbExpr(whatExpr, whatExpr.type)
             val whatField = Db_AtWhatField(R_AtWhatFieldFlags.DEFAULT, whatValue)
-            val rExpr: R_Expr = ObjectUtils.createObjectMemberRExpr(rObject, atEntity, whatField, attr.type)
+            val attrIndex = rEntity.attributes.values.indexOf(attr)
+            val recordReader = R_ObjectRecordReader_Attr(attrIndex)
+            val rExpr: R_Expr = ObjectUtils.createObjectMemberRExpr(rObject, atEntity, whatField, attr.type, recordReader)
             return R_MemberCalculator_ObjectAttr(rExpr, attr.type)
         }
 
@@ -130,12 +132,38 @@ private class R_ObjectExpr(private val objType: R_ObjectType): R_Expr(objType) {
     }
 }
 
+private abstract class R_ObjectRecordReader {
+    abstract fun read(record: List<Rt_Value>): Rt_Value
+}
+
+private class R_ObjectRecordReader_Attr(private val attrIndex: Int): R_ObjectRecordReader() {
+    override fun read(record: List<Rt_Value>) = record[attrIndex]
+}
+
+private class R_ObjectRecordReader_Struct(private val struct: R_Struct): R_ObjectRecordReader() {
+    override fun read(record: List<Rt_Value>): Rt_Value = Rt_StructValue(struct.type, record.toMutableList())
+}
+
 private class R_ObjectAttrExpr(
     type: R_Type,
     private val rObject: R_ObjectDefinition,
     private val atBase: Db_AtExprBase,
+    private val recordAtBase: Db_AtExprBase,
+    private val recordReader: R_ObjectRecordReader,
 ): R_Expr(type) {
     override fun evaluate0(frame: Rt_CallFrame): Rt_Value {
+        val cache = frame.exeCtx.objectCache
+        if (!cache.isEnabled()) {
+            return selectRecord(frame, atBase)[0]
+        }
+
+        val record = cache.getRecord(rObject.rEntity) {
+            selectRecord(frame, recordAtBase)
+        }
+        return recordReader.read(record)
+    }
+
+    private fun selectRecord(frame: Rt_CallFrame, atBase: Db_AtExprBase): List<Rt_Value> {
         var records = atBase.execute(frame, Rt_AtExprExtras.NULL)
 
         if (records.isEmpty()) {
@@ -155,10 +183,7 @@ private class R_ObjectAttrExpr(
             throw Rt_Exception.common("obj_multirec:$name:$count", "Multiple records for object '$name' in database: $count")
         }
 
-        val record = records[0]
-        checkEquals(record.size, 1)
-        val value = record[0]
-        return value
+        return records[0]
     }
 }
 
@@ -175,15 +200,14 @@ private class V_SpecialMemberFunctionCall_ObjectToStruct(
         val atEntity = exprCtx.makeAtEntity(objectType.rObject.rEntity, exprCtx.appCtx.nextAtExprId())
         val whatValue = createWhatValue(Db_EntityExpr(atEntity))
         val whatField = Db_AtWhatField(R_AtWhatFieldFlags.DEFAULT, whatValue)
-        val rExpr = ObjectUtils.createObjectMemberRExpr(objectType.rObject, atEntity, whatField, structType)
+        val recordReader = R_ObjectRecordReader_Struct(struct)
+        val rExpr = ObjectUtils.createObjectMemberRExpr(objectType.rObject, atEntity, whatField, structType, recordReader)
         return R_MemberCalculator_ObjectAttr(rExpr, structType)
     }
 
     private fun createWhatValue(dbEntityExpr: Db_TableExpr): Db_AtWhatValue {
         val rEntity = objectType.rObject.rEntity
-        val dbExprs = rEntity.attributes.values.map {
-            C_EntityAttrRef.create(rEntity, it).createDbContextAttrExpr(dbEntityExpr)
-        }
+        val dbExprs = ObjectUtils.createRecordDbExprs(rEntity, dbEntityExpr)
         return Db_AtWhatValue_ToStruct(struct, dbExprs)
     }
 
@@ -201,11 +225,26 @@ private object ObjectUtils {
         rObject: R_ObjectDefinition,
         atEntity: R_DbAtEntity,
         whatField: Db_AtWhatField,
-        resType: R_Type
+        resType: R_Type,
+        recordReader: R_ObjectRecordReader,
     ): R_Expr {
         val from = listOf(atEntity)
         val what = listOf(whatField)
         val atBase = Db_AtExprBase(from, what, null, isMany = false)
-        return R_ObjectAttrExpr(resType, rObject, atBase)
+
+        val recordExprs = createRecordDbExprs(rObject.rEntity, Db_EntityExpr(atEntity))
+        val recordWhat = recordExprs.map {
+            Db_AtWhatField(R_AtWhatFieldFlags.DEFAULT, Db_AtWhatValue_DbExpr(it, it.type))
+        }
+        val recordAtBase = Db_AtExprBase(from, recordWhat, null, isMany = false)
+
+        return R_ObjectAttrExpr(resType, rObject, atBase, recordAtBase, recordReader)
+    }
+
+    // Must match the record layout used by R_UpdateTarget_Object: all attributes in declaration order.
+    fun createRecordDbExprs(rEntity: R_EntityDefinition, dbEntityExpr: Db_TableExpr): List<Db_Expr> {
+        return rEntity.attributes.values.map {
+            C_EntityAttrRef.create(rEntity, it).createDbContextAttrExpr(dbEntityExpr)
+        }
     }
 }
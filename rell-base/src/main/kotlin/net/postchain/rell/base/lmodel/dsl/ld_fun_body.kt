@@ -10,6 +10,7 @@ import net.postchain.rell.base.compiler.base.lib.C_SysFunctionCtx
 import net.postchain.rell.base.compiler.base.utils.C_CodeMsg
 import net.postchain.rell.base.lmodel.L_FunctionBody
 import net.postchain.rell.base.lmodel.L_FunctionBodyMeta
+import net.postchain.rell.base.model.R_ContextFreeSysFunction
 import net.postchain.rell.base.model.R_Name
 import net.postchain.rell.base.model.R_QualifiedName
 import net.postchain.rell.base.model.R_SysFunction
@@ -41,9 +42,7 @@ abstract class Ld_CommonFunctionBodyDslImpl(
     }
 
     final override fun bodyN(rCode: (List<Rt_Value>) -> Rt_Value): Ld_FunctionBodyRef {
-        return bodyContextN { _, args ->
-            rCode(args)
-        }
+        return maker.bodyN(rCode)
     }
 
     final override fun body(rCode: () -> Rt_Value): Ld_FunctionBodyRef {
@@ -149,6 +148,7 @@ interface Ld_CommonFunctionBodyMaker {
 
     fun validator(validator: (C_SysFunctionCtx) -> Unit)
     fun dbFunction(dbFn: Db_SysFunction)
+    fun bodyN(rCode: (List<Rt_Value>) -> Rt_Value): Ld_FunctionBodyRef
     fun bodyContextN(rCode: (Rt_CallContext, List<Rt_Value>) -> Rt_Value): Ld_FunctionBodyRef
     fun bodyRaw(body: C_SysFunctionBody): Ld_FunctionBodyRef
 }
@@ -164,10 +164,21 @@ internal class Ld_InternalFunctionBodyState(
     val validator: ((C_SysFunctionCtx) -> Unit)?,
     val dbFunction: Db_SysFunction?,
 ) {
+    fun bodyN(rCode: (List<Rt_Value>) -> Rt_Value): Ld_InternalFunctionBody {
+        val rFn = R_ContextFreeSysFunction { args ->
+            rCode(args)
+        }
+        return bodyFn(rFn)
+    }
+
     fun bodyContextN(rCode: (Rt_CallContext, List<Rt_Value>) -> Rt_Value): Ld_InternalFunctionBody {
         val rFn = R_SysFunction { ctx, args ->
             rCode(ctx, args)
         }
+        return bodyFn(rFn)
+    }
+
+    private fun bodyFn(rFn: R_SysFunction): Ld_InternalFunctionBody {
         val body = C_SysFunctionBody(pure = pure ?: false, rFn, dbFunction)
         return body0(body)
     }
@@ -273,6 +284,12 @@ class Ld_FunctionBodyBuilder(
         internalBuilder.dbFunction(dbFn)
     }
 
+    override fun bodyN(rCode: (List<Rt_Value>) -> Rt_Value): Ld_FunctionBodyRef {
+        val internalState = internalBuilder.build()
+        val fn = internalState.bodyN(rCode)
+        return bodyInternal(fn)
+    }
+
     override fun bodyContextN(rCode: (Rt_CallContext, List<Rt_Value>) -> Rt_Value): Ld_FunctionBodyRef {
         val internalState = internalBuilder.build()
         val fn = internalState.bodyContextN(rCode)
@@ -348,6 +365,12 @@ private class Ld_FunctionMetaBodyBuilder(
         validationError = C_CodeMsg(code, msg)
     }
 
+    override fun bodyN(rCode: (List<Rt_Value>) -> Rt_Value): Ld_FunctionBodyRef {
+        val internalState = internalBuilder.build()
+        val internalBody = internalState.bodyN(rCode)
+        return body0(internalBody)
+    }
+
     override fun bodyContextN(rCode: (Rt_CallContext, List<Rt_Value>) -> Rt_Value): Ld_FunctionBodyRef {
         val internalState = internalBuilder.build()
         val internalBody = internalState.bodyContextN(rCode)
@@ -12,6 +12,7 @@ import net.postchain.rell.base.model.stmt.R_Statement
 import net.postchain.rell.base.runtime.*
 import net.postchain.rell.base.runtime.utils.RellInterpreterCrashException
 import net.postchain.rell.base.runtime.utils.Rt_Utils
+import net.postchain.rell.base.sql.SqlBulkInsert
 import net.postchain.rell.base.sql.SqlGen
 import net.postchain.rell.base.utils.checkEquals
 import net.postchain.rell.base.utils.immListOf
@@ -28,6 +29,9 @@ abstract class R_Expr(val type: R_Type) {
         return res
     }
 
+    /** Returns a stream of the elements of the (list) value of this expression, if it can be produced incrementally. */
+    open fun listStream(): R_ListStream? = null
+
     companion object {
         fun typeCheck(frame: Rt_CallFrame, type: R_Type, value: Rt_Value) {
             if (frame.defCtx.globalCtx.typeCheck) {
@@ -40,6 +44,14 @@ abstract class R_Expr(val type: R_Type) {
     }
 }
 
+abstract class R_ListStream {
+    /**
+     * Passes elements to [consumer] in chunks, until it returns `false`. Returns `false` if streaming is not
+     * possible at runtime, without calling [consumer]; the caller must then evaluate the expression.
+     */
+    abstract fun stream(frame: Rt_CallFrame, consumer: (List<Rt_Value>) -> Boolean): Boolean
+}
+
 class R_ErrorExpr(type: R_Type, private val message: String): R_Expr(type) {
     override fun evaluate0(frame: Rt_CallFrame): Rt_Value {
         throw RellInterpreterCrashException(message)
@@ -336,14 +348,24 @@ sealed class R_CreateExpr(type: R_Type, private val rEntity: R_EntityDefinition)
         frame.checkDbUpdateAllowed()
 
         val allValues = evaluateValues(frame)
-        val allRows = mutableListOf<List<Rt_Value>>()
 
+        val bulkThreshold = frame.appCtx.globalCtx.sqlBulkInsertThreshold
+        if (bulkThreshold > 0 && allValues.records.size >= bulkThreshold && SqlBulkInsert.isSupported(frame.sqlExec)) {
+            val entities = insertBulk(frame, allValues)
+            return evaluateResult(entities)
+        }
+
+        val allRows = mutableListOf<List<Rt_Value>>()
         val valuesPages = splitValues(frame.appCtx.globalCtx, allValues)
 
         for (page in valuesPages) {
             val sqlCtx = frame.defCtx.sqlCtx
-            val rowidFunc = sqlCtx.mainChainMapping().rowidFunction
-            val rtSql = buildSql(sqlCtx, rEntity, page, "\"$rowidFunc\"()")
+            val chainMapping = sqlCtx.mainChainMapping()
+            val rowids = frame.exeCtx.rowidAllocator.allocate(frame.sqlExec, chainMapping, page.records.size)
+            val rowidFunc = chainMapping.rowidFunction
+            val rtSql = buildSql(sqlCtx, rEntity, page) { i ->
+                if (rowids == null) append("\"$rowidFunc\"()") else append(rowids[i])
+            }
             val rtSel = SqlSelect(rtSql, immListOf(rEntity.type))
             val rows = rtSel.execute(frame.sqlExec)
             allRows.addAll(rows)
@@ -354,6 +376,18 @@ sealed class R_CreateExpr(type: R_Type, private val rEntity: R_EntityDefinition)
         return res
     }
 
+    private fun insertBulk(frame: Rt_CallFrame, values: CreateValues): List<Rt_Value> {
+        val sqlCtx = frame.defCtx.sqlCtx
+        val chainMapping = sqlCtx.mainChainMapping()
+        val rowids = frame.exeCtx.rowidAllocator.allocateAll(frame.sqlExec, chainMapping, values.records.size)
+
+        val table = rEntity.sqlMapping.table(sqlCtx)
+        val rowidColumn = rEntity.sqlMapping.rowidColumn()
+        SqlBulkInsert.insert(frame.sqlExec, table, rowidColumn, values.attrs, rowids, values.records)
+
+        return rowids.map { Rt_EntityValue(rEntity.type, it) }
+    }
+
     private fun splitValues(globalCtx: Rt_GlobalContext, values: CreateValues): List<CreateValues> {
         if (values.records.isEmpty()) {
             return immListOf()
@@ -371,7 +405,7 @@ sealed class R_CreateExpr(type: R_Type, private val rEntity: R_EntityDefinition)
             sqlCtx: Rt_SqlContext,
             rEntity: R_EntityDefinition,
             values: CreateValues,
-            rowidExpr: String,
+            rowidSql: SqlBuilder.(Int) -> Unit,
         ): ParameterizedSql {
             val b = SqlBuilder()
 
@@ -391,9 +425,10 @@ sealed class R_CreateExpr(type: R_Type, private val rEntity: R_EntityDefinition)
 
             b.append(" VALUES ")
 
-            b.append(values.records, ", ") { record ->
+            values.records.forEachIndexed { i, record ->
+                if (i > 0) b.append(", ")
                 b.append("(")
-                b.append(rowidExpr)
+                b.rowidSql(i)
                 b.append(record, "") { value ->
                     b.append(", ")
                     b.append(value)
@@ -576,6 +611,17 @@ class R_StackTraceExpr(private val subExpr: R_Expr, private val filePos: R_FileP
         }
     }
 
+    override fun listStream(): R_ListStream? {
+        val subStream = subExpr.listStream()
+        return if (subStream == null) null else object: R_ListStream() {
+            override fun stream(frame: Rt_CallFrame, consumer: (List<Rt_Value>) -> Boolean): Boolean {
+                return trackStack(frame, filePos) {
+                    subStream.stream(frame, consumer)
+                }
+            }
+        }
+    }
+
     companion object {
         fun <T> trackStack(frame: Rt_CallFrame, filePos: R_FilePos, code: () -> T): T {
             try {
@@ -668,6 +714,16 @@ class R_BlockCheckExpr(private val expr: R_Expr, private val blockUid: R_FrameBl
         frame.checkBlock(blockUid)
         return expr.evaluate(frame)
     }
+
+    override fun listStream(): R_ListStream? {
+        val subStream = expr.listStream()
+        return if (subStream == null) null else object: R_ListStream() {
+            override fun stream(frame: Rt_CallFrame, consumer: (List<Rt_Value>) -> Boolean): Boolean {
+                frame.checkBlock(blockUid)
+                return subStream.stream(frame, consumer)
+            }
+        }
+    }
 }
 
 class R_GlobalConstantExpr(
@@ -4,9 +4,15 @@
 
 package net.postchain.rell.base.model.expr
 
+import net.postchain.gtv.Gtv
+import net.postchain.gtv.GtvArray
+import net.postchain.gtv.GtvFactory
+import net.postchain.gtv.GtvInteger
+import net.postchain.gtv.GtvNull
 import net.postchain.rell.base.model.*
 import net.postchain.rell.base.runtime.*
 import net.postchain.rell.base.utils.checkEquals
+import net.postchain.rell.base.utils.toImmList
 
 enum class R_AtCardinality(val zero: Boolean, val many: Boolean) {
     ZERO_ONE(true, false),
@@ -68,6 +74,9 @@ class R_AtWhatFieldFlags(val omit: Boolean, val sort: R_AtWhatSort?, val group:
 }
 
 class R_AtExprExtras(private val limit: R_Expr?, private val offset: R_Expr?) {
+    // Offset is ignored when limit is not positive, so the SQL depends on the value of the limit.
+    fun sqlShape() = if (limit != null && offset != null) Db_SqlShape.DYNAMIC else Db_SqlShape.STABLE
+
     fun evaluate(frame: Rt_CallFrame): Rt_AtExprExtras {
         val limitVal = evalLimitOffset(frame, limit, "limit")
         val offsetVal = if (limitVal != null && limitVal <= 0L) null else evalLimitOffset(frame, offset, "offset")
@@ -92,9 +101,30 @@ class R_AtExprExtras(private val limit: R_Expr?, private val offset: R_Expr?) {
     }
 }
 
-class Rt_AtExprExtras(val limit: Long?, val offset: Long?) {
+class Rt_AtExprExtras(
+    val limit: Long?,
+    val offset: Long?,
+    /** Whether records shall be ordered by rowid for the limit and the offset to be deterministic. */
+    val ordered: Boolean = true,
+    /** For a paginated at-expression: rowids of the last record of the previous page, `null` for the first page. */
+    val after: List<Long>? = null,
+) {
+    /**
+     * Extras for an at-expression returning at most one record: two records are enough to tell that there are
+     * multiple ones. Records need no order unless an explicit limit or offset selects which of them are returned.
+     */
+    fun forSingleRecord(): Rt_AtExprExtras {
+        if (limit != null && limit <= SINGLE_RECORD_LIMIT) {
+            return this
+        }
+        val explicit = limit != null || offset != null
+        return Rt_AtExprExtras(SINGLE_RECORD_LIMIT, offset, ordered = explicit && ordered)
+    }
+
     companion object {
         val NULL = Rt_AtExprExtras(null, null)
+
+        private const val SINGLE_RECORD_LIMIT = 2L
     }
 }
 
@@ -136,15 +166,167 @@ class R_DbAtExpr(
         extras: R_AtExprExtras,
         private val internals: R_DbAtExprInternals
 ): R_AtExpr(type, cardinality, extras) {
+    private val prefetchEntity: R_EntityDefinition? = if (!cardinality.many) null else {
+        ((type as? R_ListType)?.elementType as? R_EntityType)?.rEntity
+    }
+
     override fun evaluate0(frame: Rt_CallFrame): Rt_Value {
         val extraVals = extras.evaluate(frame)
 
-        val records = frame.block(internals.block) {
-            base.execute(frame, extraVals)
+        val values = mutableListOf<Rt_Value>()
+        val count = frame.block(internals.block) {
+            val consumer = { row: List<Rt_Value> ->
+                values.add(internals.rowDecoder.decode(row))
+                Unit
+            }
+            if (cardinality.many) {
+                base.executeRows(frame, extraVals, consumer)
+                values.size
+            } else {
+                base.executeSingleRows(frame, extraVals, consumer)
+            }
+        }
+        checkCount(cardinality, count, "records")
+
+        if (prefetchEntity != null) {
+            frame.exeCtx.entityCache.addPrefetchCandidates(prefetchEntity, values)
         }
-        checkCount(cardinality, records.count(), "records")
 
-        val values = MutableList(records.size) { internals.rowDecoder.decode(records[it]) }
         return evalResult(values)
     }
+
+    override fun listStream(): R_ListStream? {
+        return if (cardinality.many && base.isStreamable()) R_DbAtListStream() else null
+    }
+
+    private inner class R_DbAtListStream: R_ListStream() {
+        override fun stream(frame: Rt_CallFrame, consumer: (List<Rt_Value>) -> Boolean): Boolean {
+            val chunkSize = frame.defCtx.globalCtx.sqlFetchSize
+            if (chunkSize <= 0) {
+                return false
+            }
+
+            val extraVals = extras.evaluate(frame)
+            val select = frame.block(internals.block) {
+                base.prepareSelect(frame, extraVals)
+            }
+
+            var count = 0
+            val chunk = ArrayList<Rt_Value>(chunkSize)
+
+            val flush = {
+                val values = chunk.toImmList()
+                chunk.clear()
+                if (prefetchEntity != null) {
+                    frame.exeCtx.entityCache.addPrefetchCandidates(prefetchEntity, values)
+                }
+                if (!consumer(values)) {
+                    throw StopException
+                }
+            }
+
+            try {
+                select.forEachRow(frame.sqlExec, chunkSize) { row ->
+                    ++count
+                    chunk.add(internals.rowDecoder.decode(row))
+                    if (chunk.size >= chunkSize) {
+                        flush()
+                    }
+                }
+
+                if (chunk.isNotEmpty()) {
+                    flush()
+                }
+                checkCount(cardinality, count, "records")
+            } catch (e: StopException) {
+                // The consumer does not need more elements; the statement and its cursor are closed.
+            }
+
+            return true
+        }
+    }
+
+    private object StopException: RuntimeException(null, null, false, false)
+}
+
+/**
+ * At-expression with keyset pagination (`@page`): returns the records following the ones of the previous page, and the
+ * token of the next page. The token (a GTV array of rowids of the last record) turns into a `rowid > ?` condition, so
+ * a page costs the same regardless of how many records precede it, unlike with an offset.
+ */
+class R_DbAtPageExpr(
+    type: R_Type,
+    private val base: Db_AtExprBase,
+    limit: R_Expr?,
+    private val token: R_Expr?,
+    private val internals: R_DbAtExprInternals,
+): R_Expr(type) {
+    private val extras = R_AtExprExtras(limit, null)
+    private val tupleType = type as R_TupleType
+    private val itemsType = tupleType.fields[0].type
+
+    private val prefetchEntity: R_EntityDefinition? =
+        ((itemsType as? R_ListType)?.elementType as? R_EntityType)?.rEntity
+
+    override fun evaluate0(frame: Rt_CallFrame): Rt_Value {
+        val limit = extras.evaluate(frame).limit
+        if (limit == 0L) {
+            throw Rt_Exception.common("expr:at:limit:page:0", "Zero limit of a paginated at-expression")
+        }
+
+        val after = decodeToken(token?.evaluate(frame))
+
+        // One record more than the limit tells whether there is a next page.
+        val fetchLimit = if (limit == null) null else limit.coerceAtMost(Long.MAX_VALUE - 1) + 1
+        val extraVals = Rt_AtExprExtras(fetchLimit, null, after = after)
+
+        val values = mutableListOf<Rt_Value>()
+        var lastRowids: List<Long>? = null
+        var hasNext = false
+
+        frame.block(internals.block) {
+            base.executePage(frame, extraVals) { row, rowids ->
+                if (limit == null || values.size < limit) {
+                    values.add(internals.rowDecoder.decode(row))
+                    lastRowids = rowids
+                } else {
+                    hasNext = true
+                }
+            }
+        }
+
+        if (prefetchEntity != null) {
+            frame.exeCtx.entityCache.addPrefetchCandidates(prefetchEntity, values)
+        }
+
+        val next = lastRowids
+        val nextValue = if (!hasNext || next == null) Rt_NullValue else Rt_GtvValue.get(encodeToken(next))
+        return Rt_TupleValue(tupleType, listOf(Rt_ListValue(itemsType, values), nextValue))
+    }
+
+    private fun encodeToken(rowids: List<Long>): Gtv {
+        return GtvFactory.gtv(rowids.map { GtvFactory.gtv(it) })
+    }
+
+    private fun decodeToken(value: Rt_Value?): List<Long>? {
+        if (value == null || value == Rt_NullValue) {
+            return null
+        }
+
+        val gtv = value.asGtv()
+        if (gtv == GtvNull) {
+            return null
+        }
+
+        val rowids = if (gtv !is GtvArray || gtv.array.size != base.entityCount()) null else {
+            gtv.array.map { (it as? GtvInteger)?.integer?.takeIf { rowid -> rowid >= 0 } }
+        }
+
+        if (rowids == null || rowids.any { it == null }) {
+            val str = Rt_GtvValue.toString(gtv)
+            throw Rt_Exception.common("at:page:bad_token", "Invalid page token: $str")
+        }
+
+        return rowids.filterNotNull()
+    }
 }
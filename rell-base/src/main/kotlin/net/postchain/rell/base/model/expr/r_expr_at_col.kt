@@ -8,12 +8,14 @@ import net.postchain.rell.base.model.R_FrameBlock
 import net.postchain.rell.base.model.R_Type
 import net.postchain.rell.base.model.R_VarPtr
 import net.postchain.rell.base.model.stmt.R_IterableAdapter
+import net.postchain.rell.base.model.stmt.R_IterableAdapter_Direct
 import net.postchain.rell.base.runtime.Rt_CallFrame
 import net.postchain.rell.base.runtime.Rt_Exception
 import net.postchain.rell.base.runtime.Rt_NullValue
 import net.postchain.rell.base.runtime.Rt_Value
 import net.postchain.rell.base.utils.checkEquals
 import net.postchain.rell.base.utils.toImmList
+import java.util.*
 import kotlin.math.min
 
 class R_ColAtParam(val type: R_Type, val ptr: R_VarPtr)
@@ -133,6 +135,54 @@ private class R_ColAtSummarizer_None(private val fieldCount: Int): R_ColAtSummar
     }
 }
 
+/**
+ * Keeps only the first `size` rows in the sorting order (a bounded max-heap), instead of collecting all rows and
+ * sorting them. Rows equal by the comparator are ordered by arrival, like in a stable sort.
+ */
+private class R_ColAtSummarizer_TopK(
+    private val fieldCount: Int,
+    private val rowComparator: Comparator<List<Rt_Value>>,
+    private val size: Int,
+): R_ColAtSummarizer() {
+    private val entryComparator = Comparator<IndexedValue<List<Rt_Value>>> { a, b ->
+        val d = rowComparator.compare(a.value, b.value)
+        if (d != 0) d else a.index.compareTo(b.index)
+    }
+
+    private val heap = PriorityQueue(min(size, 1024) + 1, entryComparator.reversed())
+    private var counter = 0
+
+    override fun newLimiter(limits: Rt_AtExprExtras, sorting: Boolean) = newLimiter0(limits, false)
+
+    override fun addRecord(values: List<Rt_Value>) {
+        checkEquals(values.size, fieldCount)
+        val index = counter++
+
+        if (heap.size < size) {
+            heap.add(IndexedValue(index, values))
+        } else if (rowComparator.compare(values, heap.peek().value) < 0) {
+            // A row equal to the greatest kept row comes later, so it is dropped (stable order).
+            heap.poll()
+            heap.add(IndexedValue(index, values))
+        }
+    }
+
+    override fun getResult(): List<List<Rt_Value>> {
+        return heap.sortedWith(entryComparator).map { it.value }
+    }
+
+    companion object {
+        /** Above this size, collecting and sorting all rows is not worse than a heap. */
+        private const val MAX_SIZE = 1_000_000L
+
+        fun calcSize(limits: Rt_AtExprExtras): Int? {
+            val limit = limits.limit ?: return null
+            val offset = limits.offset ?: 0L
+            return if (limit > MAX_SIZE || offset > MAX_SIZE) null else (limit + offset).toInt()
+        }
+    }
+}
+
 private class R_ColAtSummarizer_Group(what: R_ColAtWhat): R_ColAtSummarizer() {
     private val fields = what.fields
     private val groupFields = what.extras.groupFields
@@ -267,10 +317,24 @@ class R_ColAtLimiter_Late(private val limit: Long, private val offset: Long): R_
 }
 
 class R_ColAtFrom(private val iterableAdapter: R_IterableAdapter, private val expr: R_Expr) {
+    // Elements of a list produced by a database at-expression are fetched and processed in chunks.
+    private val exprStream: R_ListStream? by lazy {
+        if (iterableAdapter == R_IterableAdapter_Direct) expr.listStream() else null
+    }
+
     fun evaluate(frame: Rt_CallFrame): Iterable<Rt_Value> {
         val value = expr.evaluate(frame)
         return iterableAdapter.iterable(value)
     }
+
+    /** Passes the elements to [consumer] in one or more chunks, until it returns `false`. */
+    fun forEachChunk(frame: Rt_CallFrame, consumer: (Iterable<Rt_Value>) -> Boolean) {
+        val stream = exprStream
+        if (stream != null && stream.stream(frame, consumer)) {
+            return
+        }
+        consumer(evaluate(frame))
+    }
 }
 
 class R_ColAtExpr(
@@ -299,30 +363,12 @@ class R_ColAtExpr(
         val rtExtras = extras.evaluate(frame)
         if (rtExtras.limit != null && rtExtras.limit <= 0L) return mutableListOf()
 
-        val iterable = from.evaluate(frame)
-        val summarizer = summarization.newSummarizer()
-
+        val summarizer = newSummarizer(rtExtras)
         val limiter = summarizer.newLimiter(rtExtras, hasSorting)
 
-        frame.block(block) {
-            for (item in iterable) {
-                if (!limiter.processLimit()) {
-                    break
-                }
-
-                frame.set(param.ptr, param.type, item, true)
-
-                val whereValue = where.evaluate(frame)
-                if (!whereValue.asBoolean()) {
-                    continue
-                }
-
-                if (!limiter.processOffset()) {
-                    continue
-                }
-
-                val values = what.fields.map { it.expr.evaluate(frame) }
-                summarizer.addRecord(values)
+        from.forEachChunk(frame) { items ->
+            frame.block(block) {
+                processItems(frame, items, summarizer, limiter)
             }
         }
 
@@ -340,6 +386,45 @@ class R_ColAtExpr(
         return resList
     }
 
+    /** Returns `false` if the limit has been reached, so no more items are needed. */
+    private fun processItems(
+        frame: Rt_CallFrame,
+        items: Iterable<Rt_Value>,
+        summarizer: R_ColAtSummarizer,
+        limiter: R_ColAtLimiter,
+    ): Boolean {
+        for (item in items) {
+            if (!limiter.processLimit()) {
+                return false
+            }
+
+            frame.set(param.ptr, param.type, item, true)
+
+            val whereValue = where.evaluate(frame)
+            if (!whereValue.asBoolean()) {
+                continue
+            }
+
+            if (!limiter.processOffset()) {
+                continue
+            }
+
+            val values = what.fields.map { it.expr.evaluate(frame) }
+            summarizer.addRecord(values)
+        }
+        return true
+    }
+
+    private fun newSummarizer(rtExtras: Rt_AtExprExtras): R_ColAtSummarizer {
+        if (rowComparator != null && summarization is R_ColAtSummarization_None) {
+            val topSize = R_ColAtSummarizer_TopK.calcSize(rtExtras)
+            if (topSize != null) {
+                return R_ColAtSummarizer_TopK(what.fields.size, rowComparator, topSize)
+            }
+        }
+        return summarization.newSummarizer()
+    }
+
     private class RowComparator(private val sorting: List<IndexedValue<Comparator<Rt_Value>>>): Comparator<List<Rt_Value>> {
         override fun compare(p0: List<Rt_Value>?, p1: List<Rt_Value>?): Int {
             p0!!
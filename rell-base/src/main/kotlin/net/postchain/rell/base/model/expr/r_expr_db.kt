@@ -9,6 +9,7 @@ import net.postchain.rell.base.lib.type.Lib_DecimalMath
 import net.postchain.rell.base.model.*
 import net.postchain.rell.base.runtime.Rt_BooleanValue
 import net.postchain.rell.base.runtime.Rt_CallFrame
+import net.postchain.rell.base.runtime.Rt_ListValue
 import net.postchain.rell.base.runtime.Rt_NullValue
 import net.postchain.rell.base.runtime.Rt_Value
 import net.postchain.rell.base.utils.CommonUtils
@@ -16,6 +17,8 @@ import net.postchain.rell.base.utils.CommonUtils
 sealed class Db_BinaryOp(val code: String) {
     open fun evaluate(left: Rt_Value, right: Rt_Value): Rt_Value? = null
 
+    open fun sqlShape(left: Db_SqlShape, right: Db_SqlShape): Db_SqlShape = Db_SqlShape.combine(listOf(left, right))
+
     abstract fun toSql(ctx: SqlGenContext, bld: SqlBuilder, left: RedDb_Expr, right: RedDb_Expr)
 
     open fun toRedExpr(frame: Rt_CallFrame, type: R_Type, redLeft: RedDb_Expr, right: Db_Expr): RedDb_Expr {
@@ -47,10 +50,12 @@ sealed class Db_BinaryOp_Basic(code: String, private val sql: String): Db_Binary
 
 object Db_BinaryOp_Eq: Db_BinaryOp_Basic("==", "=") {
     override fun evaluate(left: Rt_Value, right: Rt_Value) = Rt_BooleanValue.get(left == right)
+    override fun sqlShape(left: Db_SqlShape, right: Db_SqlShape) = Db_SqlShape.foldable(left, right)
 }
 
 object Db_BinaryOp_Ne: Db_BinaryOp_Basic("!=", "<>") {
     override fun evaluate(left: Rt_Value, right: Rt_Value) = Rt_BooleanValue.get(left != right)
+    override fun sqlShape(left: Db_SqlShape, right: Db_SqlShape) = Db_SqlShape.foldable(left, right)
 }
 
 object Db_BinaryOp_Lt: Db_BinaryOp_Basic("<", "<")
@@ -87,6 +92,15 @@ object Db_BinaryOp_In: Db_BinaryOp_Basic("in", "IN")
 object Db_BinaryOp_NotIn: Db_BinaryOp_Basic("not_in", "NOT IN")
 
 sealed class Db_BinaryOp_AndOr(code: String, sql: String, private val shortCircuitValue: Boolean): Db_BinaryOp_Basic(code, sql) {
+    final override fun sqlShape(left: Db_SqlShape, right: Db_SqlShape): Db_SqlShape {
+        // A constant operand is short-circuited, so the resulting SQL depends on its value.
+        return if (left == Db_SqlShape.CONSTANT || right == Db_SqlShape.CONSTANT) {
+            Db_SqlShape.DYNAMIC
+        } else {
+            super.sqlShape(left, right)
+        }
+    }
+
     final override fun toRedExpr(frame: Rt_CallFrame, type: R_Type, redLeft: RedDb_Expr, right: Db_Expr): RedDb_Expr {
         val leftValue = redLeft.constantValue()
         if (leftValue != null) {
@@ -115,8 +129,32 @@ object Db_UnaryOp_Minus_BigInteger: Db_UnaryOp("-", "-")
 object Db_UnaryOp_Minus_Decimal: Db_UnaryOp("-", "-")
 object Db_UnaryOp_Not: Db_UnaryOp("not", "NOT")
 
+/** Describes how the SQL generated for a [Db_Expr] depends on runtime values. */
+enum class Db_SqlShape {
+    /** SQL text may differ between evaluations (constant folding, collection sizes, etc.). */
+    DYNAMIC,
+    /** SQL text is always the same, only parameter values differ. */
+    STABLE,
+    /** Always reduced to a single SQL parameter. */
+    CONSTANT,
+    ;
+
+    companion object {
+        fun combine(shapes: List<Db_SqlShape>): Db_SqlShape {
+            return if (shapes.any { it == DYNAMIC }) DYNAMIC else STABLE
+        }
+
+        /** Shape of a binary expression which is evaluated in the interpreter if both operands are constant. */
+        fun foldable(left: Db_SqlShape, right: Db_SqlShape): Db_SqlShape {
+            return if (left == CONSTANT && right == CONSTANT) CONSTANT else combine(listOf(left, right))
+        }
+    }
+}
+
 abstract class Db_Expr(val type: R_Type) {
     abstract fun toRedExpr(frame: Rt_CallFrame): RedDb_Expr
+
+    open fun sqlShape(): Db_SqlShape = Db_SqlShape.DYNAMIC
 }
 
 abstract class RedDb_Expr {
@@ -135,6 +173,8 @@ abstract class RedDb_Expr {
 }
 
 class Db_InterpretedExpr(val expr: R_Expr): Db_Expr(expr.type) {
+    override fun sqlShape() = Db_SqlShape.CONSTANT
+
     override fun toRedExpr(frame: Rt_CallFrame): RedDb_Expr {
         val value = expr.evaluate(frame)
         return RedDb_ConstantExpr(value)
@@ -151,6 +191,8 @@ private class RedDb_ConstantExpr(val value: Rt_Value): RedDb_Expr() {
 }
 
 class Db_BinaryExpr(type: R_Type, val op: Db_BinaryOp, val left: Db_Expr, val right: Db_Expr): Db_Expr(type) {
+    override fun sqlShape() = op.sqlShape(left.sqlShape(), right.sqlShape())
+
     override fun toRedExpr(frame: Rt_CallFrame): RedDb_Expr {
         val redLeft = left.toRedExpr(frame)
         return op.toRedExpr(frame, type, redLeft, right)
@@ -164,6 +206,8 @@ private class RedDb_BinaryExpr(val op: Db_BinaryOp, val left: RedDb_Expr, val ri
 }
 
 class Db_UnaryExpr(type: R_Type, val op: Db_UnaryOp, val expr: Db_Expr): Db_Expr(type) {
+    override fun sqlShape() = Db_SqlShape.combine(listOf(expr.sqlShape()))
+
     override fun toRedExpr(frame: Rt_CallFrame): RedDb_Expr {
         val redExpr = expr.toRedExpr(frame)
         return RedDb_UnaryExpr(op, redExpr)
@@ -180,6 +224,8 @@ class Db_UnaryExpr(type: R_Type, val op: Db_UnaryOp, val expr: Db_Expr): Db_Expr
 
 sealed class Db_TableExpr(val rEntity: R_EntityDefinition): Db_Expr(rEntity.type) {
     abstract fun alias(ctx: SqlGenContext): SqlTableAlias
+
+    final override fun sqlShape() = Db_SqlShape.STABLE
 }
 
 class Db_EntityExpr(val entity: R_DbAtEntity): Db_TableExpr(entity.rEntity) {
@@ -223,6 +269,8 @@ class Db_RelExpr(val base: Db_TableExpr, val attr: R_Attribute, targetEntity: R_
 }
 
 class Db_AttrExpr(val base: Db_TableExpr, val attr: R_Attribute): Db_Expr(attr.type) {
+    override fun sqlShape() = Db_SqlShape.STABLE
+
     override fun toRedExpr(frame: Rt_CallFrame): RedDb_Expr {
         val redExpr = RedDb_AttrExpr(base, attr)
         return RedDb_Utils.wrapDecimalExpr(type, redExpr)
@@ -239,32 +287,24 @@ class Db_AttrExpr(val base: Db_TableExpr, val attr: R_Attribute): Db_Expr(attr.t
 }
 
 class Db_RowidExpr(val base: Db_TableExpr): Db_Expr(C_EntityAttrRef.ROWID_TYPE) {
+    override fun sqlShape() = base.sqlShape()
+
     override fun toRedExpr(frame: Rt_CallFrame): RedDb_Expr {
         return base.toRedExpr(frame)
     }
 }
 
-class Db_CollectionInterpretedExpr(val expr: R_Expr): Db_Expr(expr.type) {
-    override fun toRedExpr(frame: Rt_CallFrame): RedDb_Expr {
-        val value = expr.evaluate(frame)
-        val collection = value.asCollection()
-        return RedDb_CollectionConstantExpr(collection)
-    }
-
-    private class RedDb_CollectionConstantExpr(val value: Collection<Rt_Value>): RedDb_Expr() {
-        override fun needsEnclosing() = false
-
-        override fun toSql0(ctx: SqlGenContext, bld: SqlBuilder) {
-            bld.append("(")
-            bld.append(value, ",") {
-                bld.append(it)
-            }
-            bld.append(")")
+class Db_InExpr(val keyExpr: Db_Expr, val exprs: List<Db_Expr>, val not: Boolean): Db_Expr(R_BooleanType) {
+    override fun sqlShape(): Db_SqlShape {
+        val keyShape = keyExpr.sqlShape()
+        return when {
+            // Constant key is compared with constant values in the interpreter.
+            keyShape == Db_SqlShape.CONSTANT -> Db_SqlShape.DYNAMIC
+            exprs.isEmpty() -> Db_SqlShape.CONSTANT
+            else -> Db_SqlShape.combine(listOf(keyShape) + exprs.map { it.sqlShape() })
         }
     }
-}
 
-class Db_InExpr(val keyExpr: Db_Expr, val exprs: List<Db_Expr>, val not: Boolean): Db_Expr(R_BooleanType) {
     override fun toRedExpr(frame: Rt_CallFrame): RedDb_Expr {
         val redKeyExpr = keyExpr.toRedExpr(frame)
         val redExprs = toRedExprs(frame, redKeyExpr, exprs)
@@ -322,6 +362,8 @@ class Db_ElvisExpr(type: R_Type, val left: R_Expr, val right: Db_Expr): Db_Expr(
 }
 
 class Db_CallExpr(type: R_Type, val fn: Db_SysFunction, val args: List<Db_Expr>): Db_Expr(type) {
+    override fun sqlShape() = Db_SqlShape.combine(args.map { it.sqlShape() })
+
     override fun toRedExpr(frame: Rt_CallFrame): RedDb_Expr {
         val redArgs = args.map { it.toRedExpr(frame) }
         val redExpr = RedDb_CallExpr(fn, redArgs)
@@ -335,6 +377,8 @@ class Db_CallExpr(type: R_Type, val fn: Db_SysFunction, val args: List<Db_Expr>)
 }
 
 class Db_ExistsExpr(val subExpr: Db_Expr, val not: Boolean): Db_Expr(R_BooleanType) {
+    override fun sqlShape() = Db_SqlShape.combine(listOf(subExpr.sqlShape()))
+
     override fun toRedExpr(frame: Rt_CallFrame): RedDb_Expr {
         val redSubExpr = subExpr.toRedExpr(frame)
         return RedDb_ExistsExpr(not, redSubExpr)
@@ -352,7 +396,15 @@ class Db_ExistsExpr(val subExpr: Db_Expr, val not: Boolean): Db_Expr(R_BooleanTy
     }
 }
 
-class Db_InCollectionExpr(val left: Db_Expr, val right: R_Expr, val not: Boolean): Db_Expr(R_BooleanType) {
+class Db_InCollectionExpr(
+    val left: Db_Expr,
+    val right: R_Expr,
+    elemType: R_Type,
+    val not: Boolean,
+): Db_Expr(R_BooleanType) {
+    // Element types which have no SQL array type (e.g. nullable) are passed as separate parameters.
+    private val arrayType: R_ListType? = if (isArrayElementType(elemType)) R_ListType(elemType) else null
+
     override fun toRedExpr(frame: Rt_CallFrame): RedDb_Expr {
         val redLeft = left.toRedExpr(frame)
 
@@ -366,10 +418,29 @@ class Db_InCollectionExpr(val left: Db_Expr, val right: R_Expr, val not: Boolean
             return RedDb_ConstantExpr(Rt_BooleanValue.get(!not))
         }
 
-        return RedDb_InCollectionExpr(redLeft, rightValue, not)
+        return if (arrayType == null) {
+            RedDb_InValuesExpr(redLeft, rightValue, not)
+        } else {
+            val arrayValue = Rt_ListValue(arrayType, rightValue.toMutableList())
+            RedDb_InArrayExpr(redLeft, arrayValue, not)
+        }
     }
 
-    private class RedDb_InCollectionExpr(
+    /** The collection is passed as one array parameter, so the SQL does not depend on the size of the collection. */
+    private class RedDb_InArrayExpr(
+            val left: RedDb_Expr,
+            val arrayValue: Rt_Value,
+            val not: Boolean
+    ): RedDb_Expr() {
+        override fun toSql0(ctx: SqlGenContext, bld: SqlBuilder) {
+            left.toSql(ctx, bld, true)
+            bld.append(if (not) " <> ALL(" else " = ANY(")
+            bld.append(arrayValue)
+            bld.append(")")
+        }
+    }
+
+    private class RedDb_InValuesExpr(
             val left: RedDb_Expr,
             val rightValue: Collection<Rt_Value>,
             val not: Boolean
@@ -384,6 +455,13 @@ class Db_InCollectionExpr(val left: Db_Expr, val right: R_Expr, val not: Boolean
             bld.append(")")
         }
     }
+
+    companion object {
+        private fun isArrayElementType(type: R_Type): Boolean {
+            val adapter = type.sqlAdapter
+            return type !is R_NullableType && adapter.sqlType != null && adapter.isSqlCompatible()
+        }
+    }
 }
 
 object RedDb_Utils {
@@ -7,11 +7,13 @@ package net.postchain.rell.base.model.expr
 import net.postchain.rell.base.compiler.base.expr.C_ExprUtils
 import net.postchain.rell.base.model.R_BooleanType
 import net.postchain.rell.base.model.R_FrameBlock
+import net.postchain.rell.base.model.R_RowidType
 import net.postchain.rell.base.model.R_Struct
 import net.postchain.rell.base.model.R_Type
 import net.postchain.rell.base.runtime.*
 import net.postchain.rell.base.utils.checkEquals
 import net.postchain.rell.base.utils.toImmList
+import java.util.concurrent.ConcurrentHashMap
 
 sealed class Rt_AtWhatItem {
     abstract fun value(): Rt_Value
@@ -67,12 +69,14 @@ abstract class Rt_AtWhatCombiner(val dbValueCount: Int) {
 
 sealed class Db_AtWhatValue {
     abstract fun rawTypes(): List<R_Type>
+    abstract fun sqlShape(): Db_SqlShape
     abstract fun toRedExprs(frame: Rt_CallFrame): List<RedDb_Expr>
     abstract fun combiner(frame: Rt_CallFrame): Rt_AtWhatCombiner
 }
 
 class Db_AtWhatValue_RExpr(private val expr: R_Expr): Db_AtWhatValue() {
     override fun rawTypes() = listOf<R_Type>()
+    override fun sqlShape() = Db_SqlShape.STABLE
     override fun toRedExprs(frame: Rt_CallFrame) = listOf<RedDb_Expr>()
 
     override fun combiner(frame: Rt_CallFrame): Rt_AtWhatCombiner = Rt_AtWhatCombiner_RExpr(frame)
@@ -89,6 +93,7 @@ class Db_AtWhatValue_RExpr(private val expr: R_Expr): Db_AtWhatValue() {
 
 class Db_AtWhatValue_DbExpr(private val expr: Db_Expr, private val resultType: R_Type): Db_AtWhatValue() {
     override fun rawTypes() = listOf(resultType)
+    override fun sqlShape() = Db_SqlShape.combine(listOf(expr.sqlShape()))
 
     override fun toRedExprs(frame: Rt_CallFrame): List<RedDb_Expr> {
         val redExpr = expr.toRedExpr(frame)
@@ -127,6 +132,7 @@ class Db_AtWhatValue_Complex(
     }
 
     override fun rawTypes() = rawTypes
+    override fun sqlShape() = Db_SqlShape.combine(subWhatValues.map { it.sqlShape() })
 
     override fun toRedExprs(frame: Rt_CallFrame): List<RedDb_Expr> {
         return subWhatValues.flatMap { it.toRedExprs(frame) }
@@ -167,6 +173,7 @@ class Db_AtWhatValue_ToStruct(private val rStruct: R_Struct, exprs: List<Db_Expr
     private val exprs = exprs.toImmList()
 
     override fun rawTypes() = exprs.map { it.type }
+    override fun sqlShape() = Db_SqlShape.combine(exprs.map { it.sqlShape() })
 
     override fun toRedExprs(frame: Rt_CallFrame): List<RedDb_Expr> {
         return exprs.map { it.toRedExpr(frame) }
@@ -199,6 +206,9 @@ class RedDb_AtExprBase(
     private val where: RedDb_Expr?,
     what: List<RedDb_AtWhatField>,
     private val isMany: Boolean,
+    private val unordered: Boolean,
+    /** Paginated at-expression: rowids of records are selected after the what-values, for the continuation token. */
+    private val page: Boolean,
 ) {
     private val from = from.toImmList()
     private val what = what.toImmList()
@@ -210,13 +220,21 @@ class RedDb_AtExprBase(
         return b.build()
     }
 
+    /** Uses previously generated SQL text, only collects the parameters. */
+    fun buildSqlFromTemplate(frame: Rt_CallFrame, extras: Rt_AtExprExtras, sqlTemplate: String): ParameterizedSql {
+        val ctx = SqlGenContext.createTop(frame, from)
+        val b = SqlBuilder.paramsOnly()
+        buildSql0(ctx, b, extras)
+        return ParameterizedSql(sqlTemplate, b.build().params)
+    }
+
     fun buildNestedSql(ctx: SqlGenContext, b: SqlBuilder, extras: Rt_AtExprExtras) {
         val subCtx = ctx.createSub(from)
         buildSql0(subCtx, b, extras)
     }
 
     private fun buildSql0(ctx: SqlGenContext, b: SqlBuilder, extras: Rt_AtExprExtras) {
-        val sqlParts = AtExprSqlParts(ctx, extras)
+        val sqlParts = AtExprSqlParts(ctx, b, extras)
         appendClause(b, "SELECT", sqlParts.whatSqls)
         appendClause(b, " FROM", sqlParts.fromSqls)
         appendClause(b, " WHERE", sqlParts.whereSql)
@@ -240,16 +258,28 @@ class RedDb_AtExprBase(
     }
 
     private fun appendClause(b: SqlBuilder, clause: String, value: Long?) {
-        val sql = if (value == null) null else ParameterizedSql.generate { it.append(value) }
+        val sql = if (value == null) null else generate(b) { it.append(value) }
         appendClause(b, clause, sql)
     }
 
-    private inner class AtExprSqlParts(ctx: SqlGenContext, private val extras: Rt_AtExprExtras) {
-        val whereSql = translateWhere(ctx, where)
+    private fun generate(b: SqlBuilder, generator: (SqlBuilder) -> Unit): ParameterizedSql {
+        val subB = b.createSub()
+        generator(subB)
+        return subB.build()
+    }
+
+    private inner class AtExprSqlParts(
+        ctx: SqlGenContext,
+        private val b: SqlBuilder,
+        private val extras: Rt_AtExprExtras,
+    ) {
+        val whereSql = translateWhere(ctx, where, extras.after)
         val whatSqls = translateWhat(ctx, what)
         val groupBySqls = translateGroupBy(ctx, what)
         val orderBySqls = translateOrderBy(ctx, what)
-        val fromSqls = translateFrom(ctx, ctx.getFromInfo())
+
+        // FROM has no parameters, so it is not needed when only parameters are collected.
+        val fromSqls = if (b.isParamsOnly()) listOf() else translateFrom(ctx, ctx.getFromInfo())
 
         private fun translateFrom(ctx: SqlGenContext, fromInfo: SqlFromInfo): List<ParameterizedSql> {
             return fromInfo.entities.values.map { translateFromItem(ctx.sqlCtx, it) }
@@ -278,13 +308,41 @@ class RedDb_AtExprBase(
             return b.build()
         }
 
-        private fun translateWhere(ctx: SqlGenContext, redWhere: RedDb_Expr?): ParameterizedSql? {
-            return if (redWhere == null) null else translateExpr(ctx, redWhere)
+        private fun translateWhere(ctx: SqlGenContext, redWhere: RedDb_Expr?, after: List<Long>?): ParameterizedSql? {
+            if (after == null) {
+                return if (redWhere == null) null else translateExpr(ctx, redWhere)
+            }
+
+            return generate(b) { subB ->
+                if (redWhere != null) {
+                    redWhere.toSql(ctx, subB, true)
+                    subB.append(" AND ")
+                }
+                appendAfter(ctx, subB, after)
+            }
+        }
+
+        /** Keyset condition: `(A00.rowid, A01.rowid, ...) > (?, ?, ...)`, parentheses omitted for one entity. */
+        private fun appendAfter(ctx: SqlGenContext, bld: SqlBuilder, after: List<Long>) {
+            checkEquals(after.size, from.size)
+            val (open, close) = if (from.size == 1) "" to "" else "(" to ")"
+
+            bld.append(open)
+            bld.append(from, ", ") { appendRowid(ctx, bld, it) }
+            bld.append("$close > $open")
+            bld.append(after, ", ") { bld.append(it) }
+            bld.append(close)
         }
 
         private fun translateWhat(ctx: SqlGenContext, redWhat: List<RedDb_AtWhatField>): List<ParameterizedSql> {
             val res = redWhat.filter { !it.flags.omit }.map { translateExpr(ctx, it.expr) }
-            return if (res.isNotEmpty()) res else listOf(ParameterizedSql("0", listOf()))
+            return if (page) {
+                res + from.map { entity -> generate(b) { appendRowid(ctx, it, entity) } }
+            } else if (res.isNotEmpty()) {
+                res
+            } else {
+                listOf(ParameterizedSql("0", listOf()))
+            }
         }
 
         private fun translateGroupBy(ctx: SqlGenContext, redWhat: List<RedDb_AtWhatField>): List<ParameterizedSql> {
@@ -294,12 +352,12 @@ class RedDb_AtExprBase(
         private fun translateOrderBy(ctx: SqlGenContext, redWhat: List<RedDb_AtWhatField>): List<ParameterizedSql> {
             val elements = getOrderByElements(redWhat)
             return elements.map { element ->
-                ParameterizedSql.generate { element.toSql(ctx, it) }
+                generate(b) { element.toSql(ctx, it) }
             }
         }
 
         private fun translateExpr(ctx: SqlGenContext, redExpr: RedDb_Expr): ParameterizedSql {
-            return ParameterizedSql.generate { redExpr.toSql(ctx, it, false) }
+            return generate(b) { redExpr.toSql(ctx, it, false) }
         }
 
         private fun getOrderByElements(redWhat: List<RedDb_AtWhatField>): List<OrderByElement> {
@@ -311,6 +369,11 @@ class RedDb_AtExprBase(
                 }
             }
 
+            if (unordered) {
+                // Only explicit sorting: no implicit ordering by group values or by rowid.
+                return elements.toImmList()
+            }
+
             val redGroup = redWhat.filter { it.flags.group }
             if (redGroup.isNotEmpty() || redWhat.any { it.flags.aggregate }) {
                 for (field in redGroup) {
@@ -318,7 +381,7 @@ class RedDb_AtExprBase(
                         elements.add(OrderByElement_Expr(field.expr, R_AtWhatSort.ASC))
                     }
                 }
-            } else if (isMany || extras.limit != null || extras.offset != null) {
+            } else if (isMany || extras.ordered && (extras.limit != null || extras.offset != null)) {
                 for (entity in from) {
                     elements.add(OrderByElement_Entity(entity))
                 }
@@ -343,6 +406,12 @@ class RedDb_AtExprBase(
 
     private class OrderByElement_Entity(val entity: R_DbAtEntity): OrderByElement() {
         override fun toSql(ctx: SqlGenContext, b: SqlBuilder) {
+            appendRowid(ctx, b, entity)
+        }
+    }
+
+    private companion object {
+        fun appendRowid(ctx: SqlGenContext, b: SqlBuilder, entity: R_DbAtEntity) {
             val alias = ctx.getEntityAlias(entity)
             b.appendColumn(alias, entity.rEntity.sqlMapping.rowidColumn())
         }
@@ -354,29 +423,48 @@ class Db_AtExprBase(
     what: List<Db_AtWhatField>,
     private val where: Db_Expr?,
     private val isMany: Boolean,
+    private val unordered: Boolean = false,
+    private val page: Boolean = false,
 ) {
     private val from = from.toImmList()
     private val what = what.toImmList()
 
     private val selWhat = what.filter { !it.flags.omit }.toImmList()
     private val resultTypes = selWhat.flatMap { it.value.rawTypes() }.toImmList()
+    private val pageResultTypes = (resultTypes + from.map { R_RowidType }).toImmList()
+
+    // When all selected values are plain database expressions, rows need no combining.
+    private val plainWhat = selWhat.all { it.value is Db_AtWhatValue_DbExpr }
+
+    private val fullWhere: Db_Expr? by lazy {
+        makeFullWhere()
+    }
+
+    private val sqlShapeLazy: Db_SqlShape by lazy {
+        val shapes = what.map { it.value.sqlShape() } + listOfNotNull(fullWhere?.sqlShape())
+        Db_SqlShape.combine(shapes)
+    }
+
+    private val sqlTemplates = ConcurrentHashMap<SqlTemplateKey, String>()
 
     init {
         R_DbAtEntity.checkList(from)
     }
 
+    fun sqlShape(): Db_SqlShape = sqlShapeLazy
+
     fun toRedBase(frame: Rt_CallFrame): RedDb_AtExprBase {
-        val redWhere = makeFullWhere(frame)
+        val redWhere = fullWhere?.toRedExpr(frame)
 
         val redWhat = what.flatMap { whatField ->
             val redExprs = whatField.value.toRedExprs(frame)
             redExprs.map { RedDb_AtWhatField(it, whatField.flags) }
         }
 
-        return RedDb_AtExprBase(from, redWhere, redWhat, isMany)
+        return RedDb_AtExprBase(from, redWhere, redWhat, isMany, unordered, page)
     }
 
-    private fun makeFullWhere(frame: Rt_CallFrame): RedDb_Expr? {
+    private fun makeFullWhere(): Db_Expr? {
         val exprs = mutableListOf<Db_Expr?>()
         exprs.add(where)
 
@@ -386,26 +474,133 @@ class Db_AtExprBase(
         }
 
         val validExprs = exprs.filterNotNull()
-        val expr = if (validExprs.isEmpty()) {
+        return if (validExprs.isEmpty()) {
             null
         } else {
             C_ExprUtils.makeDbBinaryExprChain(R_BooleanType, R_BinaryOp_And, Db_BinaryOp_And, validExprs)
         }
-
-        return expr?.toRedExpr(frame)
     }
 
     fun execute(frame: Rt_CallFrame, extras: Rt_AtExprExtras): List<List<Rt_Value>> {
+        val records = mutableListOf<List<Rt_Value>>()
+        executeRows(frame, extras) { records.add(it) }
+        return records
+    }
+
+    fun executeRows(frame: Rt_CallFrame, extras: Rt_AtExprExtras, consumer: (List<Rt_Value>) -> Unit) {
+        val select = prepareSelect(frame, extras)
+        executeRows(frame, select, consumer)
+    }
+
+    /**
+     * Executes an at-expression which must return at most one record: fetches at most two records, and returns the
+     * number of records. If there are multiple records, they are counted by a separate query, so that the error can
+     * report the actual number.
+     */
+    fun executeSingleRows(frame: Rt_CallFrame, extras: Rt_AtExprExtras, consumer: (List<Rt_Value>) -> Unit): Int {
         val redBase = toRedBase(frame)
+        val rtSql = buildSql(frame, redBase, extras.forSingleRecord())
+
+        var count = 0
+        executeRows(frame, SqlSelect(rtSql, resultTypes)) { row ->
+            ++count
+            consumer(row)
+        }
+
+        return if (count <= 1) count else countRows(frame, redBase, extras)
+    }
+
+    private fun countRows(frame: Rt_CallFrame, redBase: RedDb_AtExprBase, extras: Rt_AtExprExtras): Int {
         val rtSql = redBase.buildSql(frame, extras)
-        val select = SqlSelect(rtSql, resultTypes)
+        val countSql = ParameterizedSql("SELECT COUNT(*) FROM (${rtSql.sql}) \"R\"", rtSql.params)
+
+        var count = 0L
+        countSql.executeQuery(frame.sqlExec) { rs ->
+            count = rs.getLong(1)
+        }
+        return count.coerceAtMost(Int.MAX_VALUE.toLong()).toInt()
+    }
+
+    private fun executeRows(frame: Rt_CallFrame, select: SqlSelect, consumer: (List<Rt_Value>) -> Unit) {
+        val fetchSize = frame.defCtx.globalCtx.sqlFetchSize
+
+        if (plainWhat) {
+            select.forEachRow(frame.sqlExec, fetchSize, consumer)
+            return
+        }
+
         val combiners = selWhat.map { it.value.combiner(frame) }
-        val records = select.execute(frame.sqlExec) {
-            val items = Rt_AtWhatCombiner.combineValues(combiners, it)
-            items.map { it.value() }
+        select.forEachRow(frame.sqlExec, fetchSize) { row ->
+            val items = Rt_AtWhatCombiner.combineValues(combiners, row)
+            consumer(items.map { it.value() })
         }
-        return records
     }
+
+    fun entityCount() = from.size
+
+    /**
+     * Executes a paginated at-expression: records are ordered by rowid and follow the record identified by
+     * [Rt_AtExprExtras.after]. Passes the selected values and the rowids of each record to the consumer.
+     */
+    fun executePage(frame: Rt_CallFrame, extras: Rt_AtExprExtras, consumer: (List<Rt_Value>, List<Long>) -> Unit) {
+        check(page)
+        val redBase = toRedBase(frame)
+        val rtSql = buildSql(frame, redBase, extras)
+        val select = SqlSelect(rtSql, pageResultTypes)
+
+        val fetchSize = frame.defCtx.globalCtx.sqlFetchSize
+        val combiners = if (plainWhat) null else selWhat.map { it.value.combiner(frame) }
+
+        select.forEachRow(frame.sqlExec, fetchSize) { row ->
+            val dbValues = row.subList(0, resultTypes.size)
+            val rowids = row.subList(resultTypes.size, row.size).map { it.asRowid() }
+            val values = if (combiners == null) dbValues else {
+                Rt_AtWhatCombiner.combineValues(combiners, dbValues).map { it.value() }
+            }
+            consumer(values, rowids)
+        }
+    }
+
+    /** Rows of a streamable at-expression can be fetched after the at-expression block has been left. */
+    fun isStreamable() = plainWhat
+
+    fun prepareSelect(frame: Rt_CallFrame, extras: Rt_AtExprExtras): SqlSelect {
+        val redBase = toRedBase(frame)
+        val rtSql = buildSql(frame, redBase, extras)
+        return SqlSelect(rtSql, resultTypes)
+    }
+
+    private fun buildSql(frame: Rt_CallFrame, redBase: RedDb_AtExprBase, extras: Rt_AtExprExtras): ParameterizedSql {
+        val chainKey = if (sqlShapeLazy == Db_SqlShape.DYNAMIC) null else frame.defCtx.sqlCtx.chainMappingKey()
+        if (chainKey == null) {
+            return redBase.buildSql(frame, extras)
+        }
+
+        val key = SqlTemplateKey(
+            chainKey,
+            limit = extras.limit != null,
+            offset = extras.offset != null,
+            ordered = extras.ordered,
+            after = extras.after != null,
+        )
+        val template = sqlTemplates[key]
+        if (template != null) {
+            return redBase.buildSqlFromTemplate(frame, extras, template)
+        }
+
+        val rtSql = redBase.buildSql(frame, extras)
+        sqlTemplates.putIfAbsent(key, rtSql.sql)
+        return rtSql
+    }
+
+    /** SQL text of an at-expression with a stable shape depends only on these. */
+    private data class SqlTemplateKey(
+        val chainKey: List<Long>,
+        val limit: Boolean,
+        val offset: Boolean,
+        val ordered: Boolean,
+        val after: Boolean,
+    )
 }
 
 class Db_NestedAtExpr(
@@ -414,6 +609,8 @@ class Db_NestedAtExpr(
         private val extras: R_AtExprExtras,
         private val block: R_FrameBlock
 ): Db_Expr(type) {
+    override fun sqlShape() = Db_SqlShape.combine(listOf(base.sqlShape(), extras.sqlShape()))
+
     override fun toRedExpr(frame: Rt_CallFrame): RedDb_Expr {
         val redBase = frame.block(block) {
             base.toRedBase(frame)
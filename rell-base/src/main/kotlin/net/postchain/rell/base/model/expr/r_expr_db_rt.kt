@@ -17,6 +17,7 @@ import net.postchain.rell.base.utils.toImmList
 import net.postchain.rell.base.utils.toImmMap
 import java.sql.PreparedStatement
 import java.sql.ResultSet
+import kotlin.math.max
 
 data class SqlTableAlias(val entity: R_EntityDefinition, val exprId: R_AtExprId, val str: String)
 class SqlTableJoin(val attr: R_Attribute, val alias: SqlTableAlias)
@@ -118,10 +119,17 @@ class SqlGenContext private constructor(
     }
 }
 
-class SqlBuilder {
+class SqlBuilder private constructor(private val paramsOnly: Boolean) {
     private val sqlBuf = StringBuilder()
     private val paramsBuf = mutableListOf<Rt_Value>()
 
+    constructor(): this(false)
+
+    /** In params-only mode SQL text is not built, only parameters are collected (used with SQL templates). */
+    fun isParamsOnly() = paramsOnly
+
+    fun createSub() = SqlBuilder(paramsOnly)
+
     fun isEmpty(): Boolean {
         return sqlBuf.isEmpty() && paramsBuf.isEmpty()
     }
@@ -152,16 +160,16 @@ class SqlBuilder {
     }
 
     fun append(sql: String) {
-        sqlBuf.append(sql)
+        if (!paramsOnly) sqlBuf.append(sql)
     }
 
     fun append(param: Long) {
-        sqlBuf.append("?")
+        append("?")
         paramsBuf.add(Rt_IntValue.get(param))
     }
 
     fun append(value: Rt_Value) {
-        sqlBuf.append("?")
+        append("?")
         paramsBuf.add(value)
     }
 
@@ -182,6 +190,10 @@ class SqlBuilder {
     }
 
     fun build(): ParameterizedSql = ParameterizedSql(sqlBuf.toString(), paramsBuf.toList())
+
+    companion object {
+        fun paramsOnly() = SqlBuilder(true)
+    }
 }
 
 class ParameterizedSql(val sql: String, params: List<Rt_Value>) {
@@ -207,6 +219,16 @@ class ParameterizedSql(val sql: String, params: List<Rt_Value>) {
         sqlExec.executeQuery(sql, args::bind, consumer)
     }
 
+    /** With a positive [fetchSize], the driver fetches rows in portions (using a cursor inside a transaction). */
+    fun executeQuery(sqlExec: SqlExecutor, fetchSize: Int, consumer: (ResultSet) -> Unit) {
+        val args = calcArgs()
+        val preparator = { stmt: PreparedStatement ->
+            args.bind(stmt)
+            stmt.fetchSize = max(fetchSize, 0)
+        }
+        sqlExec.executeQuery(sql, preparator, consumer)
+    }
+
     private fun calcArgs(): SqlArgs {
         // Was experimentally discovered that passing more than 32767 parameters causes PSQL driver to fail and the
         // connection becomes invalid afterwards. Not allowing this to happen.
@@ -245,9 +267,17 @@ class SqlSelect(val pSql: ParameterizedSql, val resultTypes: List<R_Type>) {
 
     fun execute(sqlExec: SqlExecutor, transformer: (List<Rt_Value>) -> List<Rt_Value>): List<List<Rt_Value>> {
         val result = mutableListOf<List<Rt_Value>>()
+        forEachRow(sqlExec, 0) { row ->
+            val transRow = transformer(row)
+            result.add(transRow)
+        }
+        return result
+    }
 
-        pSql.executeQuery(sqlExec) { rs ->
-            val list = mutableListOf<Rt_Value>()
+    /** Decodes and passes rows one by one, without keeping them. */
+    fun forEachRow(sqlExec: SqlExecutor, fetchSize: Int, consumer: (List<Rt_Value>) -> Unit) {
+        pSql.executeQuery(sqlExec, fetchSize) { rs ->
+            val list = ArrayList<Rt_Value>(resultTypes.size)
             for (i in resultTypes.indices) {
                 val type = resultTypes[i]
                 val value = type.sqlAdapter.fromSql(rs, i + 1, false)
@@ -255,10 +285,7 @@ class SqlSelect(val pSql: ParameterizedSql, val resultTypes: List<R_Type>) {
             }
 
             val row = list.toImmList()
-            val transRow = transformer(row)
-            result.add(transRow)
+            consumer(row)
         }
-
-        return result
     }
 }
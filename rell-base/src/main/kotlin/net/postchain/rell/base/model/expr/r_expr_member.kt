@@ -67,9 +67,17 @@ class R_MemberCalculator_VirtualStructAttr(type: R_Type, val attr: R_Attribute):
 class R_MemberCalculator_DataAttribute(
         type: R_Type,
         private val atBase: Db_AtExprBase,
-        private val lambda: R_LambdaBlock
+        private val lambda: R_LambdaBlock,
+        private val cachedAttr: R_Attribute? = null,
 ): R_MemberCalculator(type) {
     override fun calculate(frame: Rt_CallFrame, baseValue: Rt_Value): Rt_Value {
+        if (cachedAttr != null && baseValue is Rt_EntityValue) {
+            val cached = frame.exeCtx.entityCache.getAttribute(frame, baseValue, cachedAttr)
+            if (cached != null) {
+                return cached
+            }
+        }
+
         val list = lambda.execute(frame, baseValue) {
             atBase.execute(frame, Rt_AtExprExtras.NULL)
         }
@@ -37,7 +37,65 @@ sealed class R_KeyIndex(attribs: List<R_Name>) {
 }
 
 class R_Key(attribs: List<R_Name>): R_KeyIndex(attribs)
-class R_Index(attribs: List<R_Name>): R_KeyIndex(attribs)
+
+/** [ext] is `null` for a plain index on a list of attributes. */
+class R_Index(attribs: List<R_Name>, val ext: R_IndexExt? = null): R_KeyIndex(attribs)
+
+/** Expression columns, included (covering) attributes and the condition of a partial index. */
+class R_IndexExt(columns: List<R_IndexColumn>, include: List<R_Name>, where: List<R_IndexCondition>) {
+    val columns = columns.toImmList()
+    val include = include.toImmList()
+    val where = where.toImmList()
+
+    fun strCode(): String {
+        val parts = mutableListOf(columns.joinToString(",") { it.strCode() })
+        if (include.isNotEmpty()) parts.add("include(${include.joinToString(",")})")
+        if (where.isNotEmpty()) parts.add("@{${where.joinToString(",") { it.strCode() }}}")
+        return parts.joinToString(" ")
+    }
+}
+
+class R_IndexColumn(val attr: R_Name, val fn: R_IndexFunction?) {
+    fun strCode() = if (fn == null) attr.str else "${attr.str}.${fn.code}()"
+}
+
+enum class R_IndexFunction(val code: String, val sql: String) {
+    LOWER_CASE("lower_case", "LOWER"),
+    UPPER_CASE("upper_case", "UPPER"),
+    ;
+
+    companion object {
+        private val CODE_MAP = values().associateBy { it.code }.toImmMap()
+
+        fun forCode(code: String): R_IndexFunction? = CODE_MAP[code]
+    }
+}
+
+enum class R_IndexCmpOp(val code: String, val sql: String) {
+    EQ("==", "="),
+    NE("!=", "<>"),
+    LT("<", "<"),
+    GT(">", ">"),
+    LE("<=", "<="),
+    GE(">=", ">="),
+    ;
+}
+
+/** Either `.attr` / `not .attr` (when [op] is `null`), or a comparison of an attribute with a constant [value]. */
+class R_IndexCondition(val attr: R_Name, val not: Boolean, val op: R_IndexCmpOp?, val value: Rt_Value?) {
+    init {
+        check((op == null) == (value == null))
+        check(op == null || !not)
+    }
+
+    fun strCode(): String {
+        return when {
+            op != null -> ".${attr.str}${op.code}${value!!.strCode()}"
+            not -> "not .${attr.str}"
+            else -> ".${attr.str}"
+        }
+    }
+}
 
 class R_EntityFlags(
         val isObject: Boolean,
@@ -134,7 +192,7 @@ class R_ObjectDefinition(base: R_DefinitionBase, val rEntity: R_EntityDefinition
         val createRecord = createExprAttrs.map { it.evaluate(frame) }
         val createValues = R_CreateExpr.CreateValues(createAttrs, immListOf(createRecord))
 
-        val sql = R_CreateExpr.buildSql(frame.defCtx.sqlCtx, rEntity, createValues, "0")
+        val sql = R_CreateExpr.buildSql(frame.defCtx.sqlCtx, rEntity, createValues) { append("0") }
         sql.execute(frame.sqlExec)
     }
 
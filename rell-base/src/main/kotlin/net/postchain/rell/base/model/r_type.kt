@@ -804,10 +804,48 @@ sealed class R_CollectionType(
 
     final override fun getLibType0() = C_LibType.make(getLibTypeDef(), elementType)
 
+    final override fun createSqlAdapter(): R_TypeSqlAdapter = R_TypeSqlAdapter_Array()
+
     final override fun toMetaGtv() = mapOf(
             "type" to baseName.toGtv(),
             "value" to elementType.toMetaGtv()
     ).toGtv()
+
+    /** Binds a collection as a single SQL array parameter (`= ANY(?)`); collections cannot be stored in columns. */
+    private inner class R_TypeSqlAdapter_Array: R_TypeSqlAdapter(null) {
+        override fun isSqlCompatible() = false
+
+        override fun toSqlValue(value: Rt_Value): Any {
+            throw Rt_Utils.errNotSupported("Type cannot be converted to SQL: ${strCode()}")
+        }
+
+        override fun toSql(stmt: PreparedStatement, idx: Int, value: Rt_Value) {
+            val elemAdapter = elementType.sqlAdapter
+            val elemSqlType = elemAdapter.sqlType
+            if (elemSqlType == null || !elemAdapter.isSqlCompatible()) {
+                throw Rt_Utils.errNotSupported("Type cannot be converted to SQL: ${strCode()}")
+            }
+
+            val sqlValues = value.asCollection().map { elemAdapter.toSqlValue(it) }
+            // Typed Java array, so that the driver encodes elements like bytea properly.
+            val elemClass = sqlValues.firstOrNull()?.javaClass ?: elemSqlType.type
+            val javaArray = java.lang.reflect.Array.newInstance(elemClass, sqlValues.size) as Array<*>
+            for ((i, v) in sqlValues.withIndex()) {
+                java.lang.reflect.Array.set(javaArray, i, v)
+            }
+
+            val sqlArray = stmt.connection.createArrayOf(elemSqlType.typeName, javaArray)
+            stmt.setArray(idx, sqlArray)
+        }
+
+        override fun fromSql(rs: ResultSet, idx: Int, nullable: Boolean): Rt_Value {
+            throw Rt_Utils.errNotSupported("Type cannot be converted from SQL: ${strCode()}")
+        }
+
+        override fun metaName(sqlCtx: Rt_SqlContext): String {
+            throw Rt_Utils.errNotSupported("Type has no meta name: ${strCode()}")
+        }
+    }
 }
 
 class R_ListType(elementType: R_Type): R_CollectionType(elementType, "list") {
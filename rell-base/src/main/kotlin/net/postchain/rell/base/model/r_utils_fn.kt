@@ -12,6 +12,15 @@ fun interface R_SysFunction {
     fun call(ctx: Rt_CallContext, args: List<Rt_Value>): Rt_Value
 }
 
+/** A function which does not use the call context, so (if pure) it can be evaluated by the compiler. */
+fun interface R_ContextFreeSysFunction: R_SysFunction {
+    fun callNoContext(args: List<Rt_Value>): Rt_Value
+
+    override fun call(ctx: Rt_CallContext, args: List<Rt_Value>): Rt_Value {
+        return callNoContext(args)
+    }
+}
+
 abstract class R_SysFunction_N: R_SysFunction {
     protected abstract fun call(args: List<Rt_Value>): Rt_Value
 
@@ -195,17 +195,38 @@ class R_ForStatement(
     val stmt: R_Statement,
     val frameBlock: R_FrameBlock
 ): R_Statement() {
+    // Elements of a list produced by a database at-expression are fetched and processed in chunks.
+    private val exprStream: R_ListStream? by lazy {
+        if (iterator == R_IterableAdapter_Direct) expr.listStream() else null
+    }
+
     override fun execute(frame: Rt_CallFrame): R_StatementResult? {
+        val stream = exprStream
+        if (stream != null) {
+            var res: R_StatementResult? = null
+            val streamed = stream.stream(frame) { chunk ->
+                res = executeBlock(frame, chunk)
+                res == null
+            }
+            if (streamed) {
+                return if (res == R_StatementResult_Break) null else res
+            }
+        }
+
         val value = expr.evaluate(frame)
         val list = iterator.iterable(value)
 
-        val res = frame.block(frameBlock) {
+        val res = executeBlock(frame, list)
+        return if (res == R_StatementResult_Break) null else res
+    }
+
+    private fun executeBlock(frame: Rt_CallFrame, list: Iterable<Rt_Value>): R_StatementResult? {
+        return frame.block(frameBlock) {
             execute0(frame, list)
         }
-
-        return res
     }
 
+    /** Returns [R_StatementResult_Break] if the loop was interrupted by `break`. */
     private fun execute0(frame: Rt_CallFrame, list: Iterable<Rt_Value>): R_StatementResult? {
         var first = true
 
@@ -218,7 +239,7 @@ class R_ForStatement(
             if (res is R_StatementResult_Return) {
                 return res
             } else if (res == R_StatementResult_Break) {
-                break
+                return res
             } else if (res == R_StatementResult_Continue) {
                 continue
             }
@@ -4,13 +4,13 @@
 
 package net.postchain.rell.base.model.stmt
 
+import net.postchain.rell.base.compiler.base.expr.C_EntityAttrRef
 import net.postchain.rell.base.model.R_Attribute
 import net.postchain.rell.base.model.R_FrameBlock
 import net.postchain.rell.base.model.R_LambdaBlock
 import net.postchain.rell.base.model.R_Type
 import net.postchain.rell.base.model.expr.*
 import net.postchain.rell.base.runtime.*
-import net.postchain.rell.base.utils.CommonUtils
 import net.postchain.rell.base.utils.immListOf
 import net.postchain.rell.base.utils.toImmList
 
@@ -110,37 +110,56 @@ class R_UpdateTarget_Expr_Many(
             return
         }
 
-        // Experimental maximum is 2^15
-        val partSize = frame.defCtx.globalCtx.sqlUpdatePortionSize
-
-        for (part in CommonUtils.split(lst, partSize)) {
-            val partValue = Rt_ListValue(listType, part)
-            executeStmt(frame, stmt, partValue)
-        }
+        // The collection is bound as a single array parameter, so no splitting into portions is needed.
+        val lstValue = Rt_ListValue(listType, lst)
+        executeStmt(frame, stmt, lstValue)
     }
 }
 
 class R_UpdateTarget_Object(private val entity: R_DbAtEntity): R_UpdateTarget() {
+    // Same layout as the record in Rt_ObjectCache: all attributes in declaration order.
+    private val returning: List<Db_Expr> by lazy {
+        val rEntity = entity.rEntity
+        val entityExpr = Db_EntityExpr(entity)
+        rEntity.attributes.values.map {
+            C_EntityAttrRef.create(rEntity, it).createDbContextAttrExpr(entityExpr)
+        }.toImmList()
+    }
+
     override fun entity() = entity
     override fun extraEntities(): List<R_DbAtEntity> = listOf()
     override fun where() = null
 
     override fun execute(stmt: R_BaseUpdateStatement, frame: Rt_CallFrame) {
-        R_UpdateTarget_Simple.execute(stmt, frame, listOf(entity), R_AtCardinality.ONE)
+        val cache = frame.exeCtx.objectCache
+        if (!cache.isEnabled() || returning.isEmpty()) {
+            R_UpdateTarget_Simple.execute(stmt, frame, listOf(entity), R_AtCardinality.ONE)
+            return
+        }
+
+        val rEntity = entity.rEntity
+        try {
+            val records = stmt.executeSqlReturning(frame, listOf(entity), returning)
+            R_AtExpr.checkCount(R_AtCardinality.ONE, records.size, "records")
+            cache.writeRecord(rEntity, records[0])
+        } catch (e: Throwable) {
+            cache.invalidate(rEntity)
+            throw e
+        }
     }
 }
 
 class R_UpdateStatementWhat(val attr: R_Attribute, val expr: Db_Expr)
 
 sealed class R_BaseUpdateStatement(val target: R_UpdateTarget, val fromBlock: R_FrameBlock): R_Statement() {
-    // "returning" is always false, but it may be needed in the future (when update expression returning updated
-    // entities is supported), so keeping it.
-    protected abstract fun buildSql(frame: Rt_CallFrame, ctx: SqlGenContext, returning: Boolean): ParameterizedSql
+    // "returning" is used only for objects (to write updated records through to the object cache), but may be used
+    // for update expressions returning updated entities in the future.
+    protected abstract fun buildSql(frame: Rt_CallFrame, ctx: SqlGenContext, returning: List<Db_Expr>): ParameterizedSql
 
     fun executeSql(frame: Rt_CallFrame, entities: List<R_DbAtEntity>) {
         frame.block(fromBlock) {
             val ctx = SqlGenContext.createTop(frame, entities)
-            val pSql = buildSql(frame, ctx, false)
+            val pSql = buildSql(frame, ctx, immListOf())
             pSql.execute(frame.sqlExec)
         }
     }
@@ -148,15 +167,36 @@ sealed class R_BaseUpdateStatement(val target: R_UpdateTarget, val fromBlock: R_
     fun executeSqlCount(frame: Rt_CallFrame, entities: List<R_DbAtEntity>): Int {
         val count: Int = frame.block(fromBlock) {
             val ctx = SqlGenContext.createTop(frame, entities)
-            val pSql = buildSql(frame, ctx, false)
+            val pSql = buildSql(frame, ctx, immListOf())
             pSql.executeUpdate(frame.sqlExec)
         }
         return count
     }
 
+    fun executeSqlReturning(
+        frame: Rt_CallFrame,
+        entities: List<R_DbAtEntity>,
+        returning: List<Db_Expr>,
+    ): List<List<Rt_Value>> {
+        val records: List<List<Rt_Value>> = frame.block(fromBlock) {
+            val ctx = SqlGenContext.createTop(frame, entities)
+            val pSql = buildSql(frame, ctx, returning)
+            val select = SqlSelect(pSql, returning.map { it.type })
+            select.execute(frame.sqlExec)
+        }
+        return records
+    }
+
     final override fun execute(frame: Rt_CallFrame): R_StatementResult? {
         frame.checkDbUpdateAllowed()
-        target.execute(this, frame)
+        try {
+            target.execute(this, frame)
+        } finally {
+            frame.exeCtx.entityCache.invalidate(target.entity().rEntity)
+            if (this is R_DeleteStatement) {
+                frame.exeCtx.markRecordsDeleted()
+            }
+        }
         return null
     }
 
@@ -232,10 +272,16 @@ sealed class R_BaseUpdateStatement(val target: R_UpdateTarget, val fromBlock: R_
         }
     }
 
-    protected fun appendReturning(builder: SqlBuilder, fromInfo: SqlFromInfo) {
-        val entity = target.entity()
+    protected fun appendReturning(builder: SqlBuilder, frame: Rt_CallFrame, ctx: SqlGenContext, returning: List<Db_Expr>) {
+        if (returning.isEmpty()) {
+            return
+        }
+
         builder.append(" RETURNING ")
-        builder.appendColumn(fromInfo.entities.getValue(entity.id).alias, entity.rEntity.sqlMapping.rowidColumn())
+        builder.append(returning, ", ") { expr ->
+            val redExpr = expr.toRedExpr(frame)
+            redExpr.toSql(ctx, builder, false)
+        }
     }
 }
 
@@ -244,7 +290,7 @@ class R_UpdateStatement(
         fromBlock: R_FrameBlock,
         private val what: List<R_UpdateStatementWhat>
 ): R_BaseUpdateStatement(target, fromBlock) {
-    override fun buildSql(frame: Rt_CallFrame, ctx: SqlGenContext, returning: Boolean): ParameterizedSql {
+    override fun buildSql(frame: Rt_CallFrame, ctx: SqlGenContext, returning: List<Db_Expr>): ParameterizedSql {
         val redWhere = target.where()?.toRedExpr(frame)
 
         val redWhat = what.map {
@@ -256,12 +302,13 @@ class R_UpdateStatement(
         val whereSql = translateWhere(ctx, redWhere)
 
         val fromInfo = ctx.getFromInfo()
-        return buildSql0(ctx.sqlCtx, returning, fromInfo, whatSql, whereSql)
+        return buildSql0(frame, ctx, returning, fromInfo, whatSql, whereSql)
     }
 
     private fun buildSql0(
-            sqlCtx: Rt_SqlContext,
-            returning: Boolean,
+            frame: Rt_CallFrame,
+            ctx: SqlGenContext,
+            returning: List<Db_Expr>,
             fromInfo: SqlFromInfo,
             whatSql: ParameterizedSql,
             whereSql: ParameterizedSql?
@@ -269,17 +316,14 @@ class R_UpdateStatement(
         val b = SqlBuilder()
 
         b.append("UPDATE ")
-        appendMainTable(b, sqlCtx, fromInfo)
+        appendMainTable(b, ctx.sqlCtx, fromInfo)
 
         b.append(" SET ")
         b.append(whatSql)
 
-        appendExtraTables(b, sqlCtx, fromInfo, "FROM")
+        appendExtraTables(b, ctx.sqlCtx, fromInfo, "FROM")
         appendWhere(b, fromInfo, whereSql)
-
-        if (returning) {
-            appendReturning(b, fromInfo)
-        }
+        appendReturning(b, frame, ctx, returning)
 
         return b.build()
     }
@@ -299,29 +343,27 @@ class R_UpdateStatement(
 }
 
 class R_DeleteStatement(target: R_UpdateTarget, fromBlock: R_FrameBlock): R_BaseUpdateStatement(target, fromBlock) {
-    override fun buildSql(frame: Rt_CallFrame, ctx: SqlGenContext, returning: Boolean): ParameterizedSql {
+    override fun buildSql(frame: Rt_CallFrame, ctx: SqlGenContext, returning: List<Db_Expr>): ParameterizedSql {
         val redWhere = target.where()?.toRedExpr(frame)
         val whereSql = translateWhere(ctx, redWhere)
         val fromInfo = ctx.getFromInfo()
-        return buildSql0(ctx.sqlCtx, returning, fromInfo, whereSql)
+        return buildSql0(frame, ctx, returning, fromInfo, whereSql)
     }
 
     private fun buildSql0(
-            sqlCtx: Rt_SqlContext,
-            returning: Boolean,
+            frame: Rt_CallFrame,
+            ctx: SqlGenContext,
+            returning: List<Db_Expr>,
             fromInfo: SqlFromInfo,
             whereSql: ParameterizedSql?
     ): ParameterizedSql {
         val b = SqlBuilder()
 
         b.append("DELETE FROM ")
-        appendMainTable(b, sqlCtx, fromInfo)
-        appendExtraTables(b, sqlCtx, fromInfo, "USING")
+        appendMainTable(b, ctx.sqlCtx, fromInfo)
+        appendExtraTables(b, ctx.sqlCtx, fromInfo, "USING")
         appendWhere(b, fromInfo, whereSql)
-
-        if (returning) {
-            appendReturning(b, fromInfo)
-        }
+        appendReturning(b, frame, ctx, returning)
 
         return b.build()
     }
@@ -16,6 +16,9 @@ import net.postchain.rell.base.model.expr.R_Expr
 import net.postchain.rell.base.sql.SqlExecutor
 import net.postchain.rell.base.utils.checkEquals
 import net.postchain.rell.base.utils.immListOf
+import net.postchain.rell.base.utils.immMapOf
+import net.postchain.rell.base.utils.toImmMap
+import net.postchain.rell.base.utils.toImmSet
 import org.apache.commons.collections4.MultiValuedMap
 import org.apache.commons.collections4.multimap.HashSetValuedHashMap
 import java.math.BigDecimal
@@ -39,10 +42,17 @@ private class GtvToRtState(
         entityRowids.put(entity, rowid)
     }
 
-    fun finish(exeCtx: Rt_ExecutionContext) {
+    fun trackedRecords(): Map<R_EntityDefinition, Set<Long>> {
+        return entityRowids.keySet().associateWith { entityRowids.get(it).toImmSet() }.toImmMap()
+    }
+
+    fun finish(exeCtx: Rt_ExecutionContext, existingRecords: Map<R_EntityDefinition, Set<Long>>) {
         for (rEntities in entityRowids.keySet()) {
-            val rowids = entityRowids.get(rEntities)
-            checkRowids(exeCtx.sqlExec, exeCtx.sqlCtx, rEntities, rowids)
+            val existing = existingRecords[rEntities]
+            val rowids = entityRowids.get(rEntities).filter { existing == null || it !in existing }
+            if (rowids.isNotEmpty()) {
+                checkRowids(exeCtx.sqlExec, exeCtx.sqlCtx, rEntities, rowids)
+            }
         }
     }
 
@@ -56,17 +66,25 @@ private class GtvToRtState(
         }
     }
 
-    private fun selectExistingIds(sqlExec: SqlExecutor, sqlCtx: Rt_SqlContext, rEntity: R_EntityDefinition, rowids: Collection<Long>): Set<Long> {
-        val buf = StringBuilder()
-        buf.append("\"").append(rEntity.sqlMapping.rowidColumn()).append("\" IN (")
-        rowids.joinTo(buf, ",")
-        buf.append(")")
-        val whereSql = buf.toString()
+    companion object {
+        fun selectExistingIds(
+            sqlExec: SqlExecutor,
+            sqlCtx: Rt_SqlContext,
+            rEntity: R_EntityDefinition,
+            rowids: Collection<Long>,
+        ): Set<Long> {
+            val whereSql = "\"${rEntity.sqlMapping.rowidColumn()}\" = ANY(?)"
+            val sql = rEntity.sqlMapping.selectExistingObjects(sqlCtx, whereSql)
+
+            val listType = R_ListType(rEntity.type)
+            val listValue = Rt_ListValue(listType, rowids.map { Rt_EntityValue(rEntity.type, it) }.toMutableList())
 
-        val sql = rEntity.sqlMapping.selectExistingObjects(sqlCtx, whereSql)
-        val existingIds = mutableSetOf<Long>()
-        sqlExec.executeQuery(sql, {}) { existingIds.add(it.getLong(1)) }
-        return existingIds
+            val existingIds = mutableSetOf<Long>()
+            sqlExec.executeQuery(sql, { listType.sqlAdapter.toSql(it, 1, listValue) }) {
+                existingIds.add(it.getLong(1))
+            }
+            return existingIds
+        }
     }
 }
 
@@ -100,7 +118,15 @@ class GtvToRtContext private constructor(
     }
 
     fun trackRecord(entity: R_EntityDefinition, rowid: Long) = state.trackRecord(entity, rowid)
-    fun finish(exeCtx: Rt_ExecutionContext) = state.finish(exeCtx)
+
+    /** Records of entities met in converted values, which [finish] checks for existence. */
+    fun trackedRecords(): Map<R_EntityDefinition, Set<Long>> = state.trackedRecords()
+
+    /** Checks that all tracked records exist, except the [existingRecords] already known to exist. */
+    fun finish(
+        exeCtx: Rt_ExecutionContext,
+        existingRecords: Map<R_EntityDefinition, Set<Long>> = immMapOf(),
+    ) = state.finish(exeCtx, existingRecords)
 
     companion object {
         fun make(
@@ -115,6 +141,15 @@ class GtvToRtContext private constructor(
             )
             return GtvToRtContext(state, null, false)
         }
+
+        /** Returns which of the given records of the entity exist in the database. */
+        fun selectExistingRecords(
+            exeCtx: Rt_ExecutionContext,
+            entity: R_EntityDefinition,
+            rowids: Collection<Long>,
+        ): Set<Long> {
+            return GtvToRtState.selectExistingIds(exeCtx.sqlExec, exeCtx.sqlCtx, entity, rowids)
+        }
     }
 }
 
@@ -0,0 +1,263 @@
+/*
+ * Copyright (C) 2023 ChromaWay AB. See LICENSE for license information.
+ */
+
+package net.postchain.rell.base.runtime
+
+import net.postchain.rell.base.compiler.base.expr.C_EntityAttrRef
+import net.postchain.rell.base.model.*
+import net.postchain.rell.base.model.expr.*
+import net.postchain.rell.base.utils.toImmList
+import net.postchain.rell.base.utils.toImmMap
+import java.util.concurrent.atomic.AtomicLong
+
+class Rt_EntityCacheStats(
+    val hits: Long,
+    val misses: Long,
+    val loads: Long,
+    val loadedRows: Long,
+    val fallbacks: Long,
+) {
+    /** Number of SQL queries avoided compared to running one query per attribute read. */
+    val savedRoundTrips: Long = hits + misses - loads - fallbacks
+
+    override fun toString(): String {
+        return "hits=$hits misses=$misses loads=$loads rows=$loadedRows fallbacks=$fallbacks saved=$savedRoundTrips"
+    }
+}
+
+/**
+ * Totals of entity cache counters of all execution contexts created with one global context (e.g. all operations and
+ * queries of a Postchain module). Thread-safe, as queries may run concurrently.
+ */
+class Rt_EntityCacheCounters {
+    private val hits = AtomicLong()
+    private val misses = AtomicLong()
+    private val loads = AtomicLong()
+    private val loadedRows = AtomicLong()
+    private val fallbacks = AtomicLong()
+
+    fun hit() {
+        hits.incrementAndGet()
+    }
+
+    fun miss() {
+        misses.incrementAndGet()
+    }
+
+    fun load(rows: Int) {
+        loads.incrementAndGet()
+        loadedRows.addAndGet(rows.toLong())
+    }
+
+    fun fallback() {
+        fallbacks.incrementAndGet()
+    }
+
+    fun stats() = Rt_EntityCacheStats(
+        hits = hits.get(),
+        misses = misses.get(),
+        loads = loads.get(),
+        loadedRows = loadedRows.get(),
+        fallbacks = fallbacks.get(),
+    )
+}
+
+/**
+ * Caches entity rows read by `entity.attr` expressions within one execution context. A row is loaded with all
+ * its attributes on the first access; rows returned by `@*` at-expressions are remembered as prefetch candidates,
+ * so reading an attribute of one of them loads the whole batch in a single query.
+ */
+class Rt_EntityAttrCache(
+    private val maxRows: Int,
+    private val prefetchSize: Int,
+    private val counters: Rt_EntityCacheCounters,
+) {
+    private val entities = mutableMapOf<R_EntityDefinition, EntityRows>()
+
+    fun isEnabled() = maxRows > 0
+
+    /** Returns `null` if the value could not be served from the cache; the caller must then query the database. */
+    fun getAttribute(frame: Rt_CallFrame, entityValue: Rt_EntityValue, attr: R_Attribute): Rt_Value? {
+        if (!isEnabled()) return null
+
+        val rows = entityRows(entityValue.type.rEntity)
+        val row = rows.get(entityValue.rowid)
+        if (row != null) {
+            counters.hit()
+            return rows.attrValue(row, attr)
+        }
+
+        counters.miss()
+        val loadedRow = rows.load(frame, entityValue.rowid)
+        if (loadedRow == null) {
+            counters.fallback()
+            return null
+        }
+
+        return rows.attrValue(loadedRow, attr)
+    }
+
+    fun addPrefetchCandidates(rEntity: R_EntityDefinition, values: List<Rt_Value>) {
+        if (!isEnabled() || values.size <= 1) return
+        val rows = entityRows(rEntity)
+        rows.addCandidates(values)
+    }
+
+    fun invalidate(rEntity: R_EntityDefinition) {
+        entities[rEntity]?.clear()
+    }
+
+    fun invalidateAll() {
+        entities.values.forEach { it.clear() }
+    }
+
+    private fun entityRows(rEntity: R_EntityDefinition): EntityRows {
+        return entities.computeIfAbsent(rEntity) { EntityRows(it) }
+    }
+
+    private inner class EntityRows(rEntity: R_EntityDefinition) {
+        private val loader = Rt_EntityRowLoader(rEntity)
+
+        private val rows = object: LinkedHashMap<Long, List<Rt_Value>>(16, 0.75f, true) {
+            override fun removeEldestEntry(eldest: MutableMap.MutableEntry<Long, List<Rt_Value>>?) = size > maxRows
+        }
+
+        private val candidates = LinkedHashSet<Long>()
+
+        fun get(rowid: Long): List<Rt_Value>? = rows[rowid]
+
+        fun attrValue(row: List<Rt_Value>, attr: R_Attribute): Rt_Value = row[loader.attrPosition(attr)]
+
+        fun addCandidates(values: List<Rt_Value>) {
+            if (candidates.size + values.size > maxRows) {
+                candidates.clear()
+            }
+            for (value in values) {
+                val rowid = (value as? Rt_EntityValue)?.rowid
+                if (rowid != null && rowid !in rows) {
+                    candidates.add(rowid)
+                }
+            }
+        }
+
+        fun load(frame: Rt_CallFrame, rowid: Long): List<Rt_Value>? {
+            val batch = mutableListOf(rowid)
+            if (candidates.remove(rowid)) {
+                val iter = candidates.iterator()
+                while (batch.size < prefetchSize && iter.hasNext()) {
+                    batch.add(iter.next())
+                    iter.remove()
+                }
+            }
+
+            val loaded = loader.load(frame, batch)
+            counters.load(loaded.size)
+
+            for ((loadedRowid, row) in loaded) {
+                rows[loadedRowid] = row
+            }
+
+            return loaded[rowid]
+        }
+
+        fun clear() {
+            rows.clear()
+            candidates.clear()
+        }
+    }
+}
+
+private class Rt_EntityRowLoader(private val rEntity: R_EntityDefinition) {
+    private val attrs = rEntity.attributes.values.toImmList()
+    private val attrPositions = attrs.withIndex().associate { (i, attr) -> attr.rName to i }.toImmMap()
+
+    private val atEntity = R_DbAtEntity(rEntity, R_AtEntityId(LOADER_AT_EXPR_ID, 0))
+    private val entityExpr = Db_EntityExpr(atEntity)
+
+    private val whatFields: List<Db_AtWhatField> = let {
+        val rowidField = Db_AtWhatValue_DbExpr(entityExpr, rEntity.type)
+        val attrFields = attrs.map {
+            val dbExpr = C_EntityAttrRef.create(rEntity, it).createDbContextAttrExpr(entityExpr)
+            Db_AtWhatValue_DbExpr(dbExpr, it.type)
+        }
+        (listOf(rowidField) + attrFields).map { Db_AtWhatField(R_AtWhatFieldFlags.DEFAULT, it) }.toImmList()
+    }
+
+    fun attrPosition(attr: R_Attribute): Int = attrPositions.getValue(attr.rName)
+
+    fun load(frame: Rt_CallFrame, rowids: List<Long>): Map<Long, List<Rt_Value>> {
+        val where = if (rowids.size == 1) {
+            val value = Db_InterpretedExpr(R_ConstantValueExpr(Rt_EntityValue(rEntity.type, rowids[0])))
+            Db_BinaryExpr(R_BooleanType, Db_BinaryOp_Eq, entityExpr, value)
+        } else {
+            val listType = R_ListType(rEntity.type)
+            val values = rowids.map { Rt_EntityValue(rEntity.type, it) as Rt_Value }.toMutableList()
+            Db_InCollectionExpr(entityExpr, R_ConstantValueExpr(Rt_ListValue(listType, values)), rEntity.type, false)
+        }
+
+        val atBase = Db_AtExprBase(listOf(atEntity), whatFields, where, isMany = false)
+        val records = atBase.execute(frame, Rt_AtExprExtras.NULL)
+
+        val res = mutableMapOf<Long, List<Rt_Value>>()
+        for (record in records) {
+            val rowid = (record[0] as Rt_EntityValue).rowid
+            res[rowid] = record.subList(1, record.size).toImmList()
+        }
+        return res
+    }
+
+    companion object {
+        private val LOADER_AT_EXPR_ID = R_AtExprId(-1)
+    }
+}
+
+class Rt_ObjectCacheStats(val hits: Long, val misses: Long, val writes: Long) {
+    override fun toString() = "hits=$hits misses=$misses writes=$writes"
+}
+
+/**
+ * Caches object records within one execution context: all attributes of an object are read from a single fetched
+ * row. Updates of objects write the new record through to the cache.
+ */
+class Rt_ObjectCache(private val enabled: Boolean) {
+    private val records = mutableMapOf<R_EntityDefinition, List<Rt_Value>>()
+
+    private var hits = 0L
+    private var misses = 0L
+    private var writes = 0L
+
+    fun isEnabled() = enabled
+
+    fun getRecord(rEntity: R_EntityDefinition, loader: () -> List<Rt_Value>): List<Rt_Value> {
+        val record = records[rEntity]
+        if (record != null) {
+            ++hits
+            return record
+        }
+
+        ++misses
+        val res = loader().toImmList()
+        if (enabled) {
+            records[rEntity] = res
+        }
+        return res
+    }
+
+    fun writeRecord(rEntity: R_EntityDefinition, record: List<Rt_Value>) {
+        if (enabled) {
+            ++writes
+            records[rEntity] = record.toImmList()
+        }
+    }
+
+    fun invalidate(rEntity: R_EntityDefinition) {
+        records.remove(rEntity)
+    }
+
+    fun invalidateAll() {
+        records.clear()
+    }
+
+    fun stats() = Rt_ObjectCacheStats(hits = hits, misses = misses, writes = writes)
+}
@@ -52,10 +52,12 @@ class Rt_ChainSqlMapping(val chainId: Long) {
 
     val rowidTable = fullName(SqlConstants.ROWID_GEN)
     val rowidFunction = fullName(SqlConstants.MAKE_ROWID)
+    val rowidSequence = fullName(SqlConstants.ROWID_SEQ)
     val blocksTable = fullName(SqlConstants.BLOCKS_TABLE)
     val transactionsTable = fullName(SqlConstants.TRANSACTIONS_TABLE)
     val metaEntitiesTable = fullName("sys.classes")
     val metaAttributesTable = fullName("sys.attributes")
+    val metaIndexesTable = fullName("sys.indexes")
 
     val tableSqlFilter = "$prefix%"
 
@@ -73,7 +75,7 @@ class Rt_ChainSqlMapping(val chainId: Long) {
     }
 
     fun isChainTable(table: String): Boolean {
-        return table.startsWith(prefix) && table != rowidTable && table != rowidFunction
+        return table.startsWith(prefix) && table != rowidTable && table != rowidFunction && table != rowidSequence
     }
 
     fun isSystemTable(table: String): Boolean {
@@ -25,6 +25,12 @@ class Rt_GlobalContext(
     val sqlUpdatePortionSize: Int = 1000, // Experimental maximum is 2^15
     val typeCheck: Boolean = false,
     val wrapFunctionCallErrors: Boolean = true,
+    val entityCacheSize: Int = 0, // Max. cached rows per entity, 0 disables the entity cache
+    val entityCacheCounters: Rt_EntityCacheCounters = Rt_EntityCacheCounters(),
+    val objectCache: Boolean = true,
+    val sqlFetchSize: Int = 1000, // Rows per fetch and per chunk streamed into for loops, 0 disables streaming
+    val rowidMode: SqlRowidMode = SqlRowidMode.TABLE, // Always TABLE for blockchains, SEQUENCE is not deterministic
+    val sqlBulkInsertThreshold: Int = 0, // Min. records of a create expression to insert via COPY, 0 disables COPY
 ) {
     private val rellVersion = Rt_RellVersion.getInstance()
 
@@ -39,12 +45,16 @@ abstract class Rt_SqlContext(app: R_App) {
     abstract fun mainChainMapping(): Rt_ChainSqlMapping
     abstract fun linkedChain(chain: R_ExternalChainRef): Rt_ExternalChain
     abstract fun chainMapping(externalChain: R_ExternalChainRef?): Rt_ChainSqlMapping
+
+    /** Identifies the table names used by generated SQL; `null` if SQL must not be reused. */
+    abstract fun chainMappingKey(): List<Long>?
 }
 
 class Rt_NullSqlContext private constructor(app: R_App): Rt_SqlContext(app) {
     override fun mainChainMapping() = throw UnsupportedOperationException()
     override fun linkedChain(chain: R_ExternalChainRef) = throw UnsupportedOperationException()
     override fun chainMapping(externalChain: R_ExternalChainRef?) = throw UnsupportedOperationException()
+    override fun chainMappingKey(): List<Long>? = null
 
     companion object {
         fun create(app: R_App): Rt_SqlContext = Rt_NullSqlContext(app)
@@ -58,6 +68,8 @@ class Rt_RegularSqlContext private constructor(
 ): Rt_SqlContext(app) {
     private val externalChainsRoot = app.externalChainsRoot
 
+    private val chainMappingKey = (listOf(mainChainMapping.chainId) + linkedExternalChains.map { it.chainId }).toImmList()
+
     override fun mainChainMapping() = mainChainMapping
 
     override fun linkedChain(chain: R_ExternalChainRef): Rt_ExternalChain {
@@ -69,6 +81,8 @@ class Rt_RegularSqlContext private constructor(
         return if (externalChain == null) mainChainMapping else linkedChain(externalChain).sqlMapping
     }
 
+    override fun chainMappingKey() = chainMappingKey
+
     companion object : KLogging() {
         fun createNoExternalChains(app: R_App, mainChainMapping: Rt_ChainSqlMapping): Rt_SqlContext {
             require(app.valid)
@@ -83,18 +97,65 @@ class Rt_RegularSqlContext private constructor(
                 sqlExec: SqlExecutor,
                 heightProvider: Rt_ChainHeightProvider
         ): Rt_SqlContext {
+            val externalChains = resolveExternalChains(app, mainChainMapping, chainDependencies, sqlExec)
+            return create(externalChains, heightProvider)
+        }
+
+        /**
+         * Creates a context from previously resolved external chains; only the heights of the chains are queried.
+         * The heights of all chain dependencies must be known, not only of the chains used by the app.
+         */
+        fun create(externalChains: Rt_ResolvedExternalChains, heightProvider: Rt_ChainHeightProvider): Rt_SqlContext {
+            val heights = externalChains.dependencies.associate { chain ->
+                val ridKey = WrappedByteArray(chain.rid)
+                val height = heightProvider.getChainHeight(ridKey, chain.chainId)
+                if (height == null) {
+                    val ridStr = CommonUtils.bytesToHex(chain.rid)
+                    throw errInit("external_chain_no_height:${chain.name}:$ridStr:${chain.chainId}",
+                            "Unknown height of the external chain '${chain.name}' (RID: 0x$ridStr, ID: ${chain.chainId})")
+                }
+                chain.name to height
+            }
+
+            val linkedExternalChains = externalChains.linkedChains.map { chain ->
+                Rt_ExternalChain(chain.chainId, chain.rid, heights.getValue(chain.name))
+            }
+            return Rt_RegularSqlContext(externalChains.app, externalChains.mainChainMapping, linkedExternalChains)
+        }
+
+        /**
+         * Maps external chains to chain IIDs and validates external entities against the metadata of those chains.
+         * The result does not depend on chain heights, so it can be reused for multiple queries and operations.
+         */
+        fun resolveExternalChains(
+                app: R_App,
+                mainChainMapping: Rt_ChainSqlMapping,
+                chainDependencies: Map<String, Rt_ChainDependency>,
+                sqlExec: SqlExecutor
+        ): Rt_ResolvedExternalChains {
             require(app.valid)
-            val externalChains = getExternalChains(sqlExec, chainDependencies, heightProvider)
+            val externalChains = getExternalChains(sqlExec, chainDependencies)
             val linkedExternalChains = calcLinkedExternalChains(app, externalChains)
-            val sqlCtx = Rt_RegularSqlContext(app, mainChainMapping, linkedExternalChains)
-            checkExternalMetaInfo(sqlCtx, externalChains, sqlExec)
-            return sqlCtx
+
+            // Heights are not used by the metadata check, only chain IDs.
+            val checkSqlCtx = Rt_RegularSqlContext(app, mainChainMapping, linkedExternalChains)
+            checkExternalMetaInfo(checkSqlCtx, externalChains, sqlExec)
+
+            val dependencies = externalChains.map { (name, chain) ->
+                Rt_ResolvedExternalChain(name, chain.chainId, chain.rid)
+            }
+
+            val linkedChains = app.externalChains.mapIndexed { i, rChain ->
+                val chain = linkedExternalChains[i]
+                Rt_ResolvedExternalChain(rChain.name, chain.chainId, chain.rid)
+            }
+
+            return Rt_ResolvedExternalChains(app, mainChainMapping, dependencies.toImmList(), linkedChains.toImmList())
         }
 
         private fun getExternalChains(
                 sqlExec: SqlExecutor,
-                dependencies: Map<String, Rt_ChainDependency>,
-                heightProvider: Rt_ChainHeightProvider
+                dependencies: Map<String, Rt_ChainDependency>
         ): Map<String, Rt_ExternalChain> {
             if (dependencies.isEmpty()) return mapOf()
 
@@ -118,15 +179,7 @@ class Rt_RegularSqlContext private constructor(
                     throw errInit("external_chain_no_rid:$name:$ridStr",
                             "External chain '$name' not found in the database by RID 0x$ridStr")
                 }
-
-                val ridKey = WrappedByteArray(dep.rid)
-                val height = heightProvider.getChainHeight(ridKey, chainId)
-                if (height == null) {
-                    throw errInit("external_chain_no_height:$name:$ridStr:$chainId",
-                            "Unknown height of the external chain '$name' (RID: 0x$ridStr, ID: $chainId)")
-                }
-
-                res[name] = Rt_ExternalChain(chainId, dep.rid, height)
+                res[name] = Rt_ExternalChain(chainId, dep.rid, UNKNOWN_HEIGHT)
             }
 
             return res
@@ -266,9 +319,24 @@ class Rt_RegularSqlContext private constructor(
         }
 
         private fun errInit(code: String, msg: String): RuntimeException = Rt_Exception.common(code, msg)
+
+        private const val UNKNOWN_HEIGHT = -1L
     }
 }
 
+class Rt_ResolvedExternalChain(val name: String, val chainId: Long, val rid: ByteArray)
+
+/**
+ * Chain dependencies of an app resolved for a given main chain: all [dependencies] (in the order of the chain
+ * configuration), and the [linkedChains] used by the app (in the order of [R_App.externalChains]).
+ */
+class Rt_ResolvedExternalChains internal constructor(
+    val app: R_App,
+    val mainChainMapping: Rt_ChainSqlMapping,
+    val dependencies: List<Rt_ResolvedExternalChain>,
+    val linkedChains: List<Rt_ResolvedExternalChain>,
+)
+
 class Rt_AppContext(
     val globalCtx: Rt_GlobalContext,
     val chainCtx: Rt_ChainContext,
@@ -328,9 +396,34 @@ class Rt_ExecutionContext(
     val sqlCtx: Rt_SqlContext,
     val sqlExec: SqlExecutor,
     state: State? = null,
+    // Rowids reserved at once by create expressions, 0 means one make_rowid() call per row. A caller passing a positive
+    // value must call rowidAllocator.release() before the SQL transaction ends, otherwise unused rowids become a gap.
+    rowidBlockSize: Int = 0,
 ) {
     val globalCtx = appCtx.globalCtx
 
+    val entityCache = Rt_EntityAttrCache(
+        globalCtx.entityCacheSize,
+        globalCtx.sqlUpdatePortionSize,
+        globalCtx.entityCacheCounters,
+    )
+
+    val objectCache = Rt_ObjectCache(globalCtx.objectCache)
+    val rowidAllocator = Rt_RowidAllocator(globalCtx.rowidMode, rowidBlockSize)
+
+    fun invalidateDbCaches() {
+        entityCache.invalidateAll()
+        objectCache.invalidateAll()
+    }
+
+    /** Tells whether records were deleted by this context, so records known to exist may not exist anymore. */
+    var recordsDeleted = false
+        private set
+
+    fun markRecordsDeleted() {
+        recordsDeleted = true
+    }
+
     private var nextNopNonce: Long = state?.nextNopNonce ?: 0L
 
     fun nextNopNonce(): Long {
@@ -0,0 +1,88 @@
+/*
+ * Copyright (C) 2023 ChromaWay AB. See LICENSE for license information.
+ */
+
+package net.postchain.rell.base.runtime
+
+import net.postchain.rell.base.sql.SqlExecutor
+import net.postchain.rell.base.sql.SqlRowidMode
+import net.postchain.rell.base.utils.checkEquals
+import kotlin.math.max
+
+/**
+ * Allocates rowids for `create` expressions within one execution context. With a positive block size (and the
+ * [SqlRowidMode.TABLE] storage), a range of rowids is reserved in the chain's rowid table by a single update and
+ * handed out from memory. [release] returns the unused rest of the range, so the stored counter ends up the same as
+ * if every rowid was allocated by `make_rowid()`; rowids stay increasing and gap-free. Blocks are reserved only if the
+ * creator of the execution context passes a block size, and thus takes care of calling [release].
+ */
+class Rt_RowidAllocator(private val mode: SqlRowidMode, private val blockSize: Int) {
+    private var next = 1L
+    private var last = 0L
+
+    fun isEnabled() = mode == SqlRowidMode.TABLE && blockSize > 0
+
+    /** Returns `null` if rowids must be generated by the `make_rowid()` SQL function. */
+    fun allocate(sqlExec: SqlExecutor, mapping: Rt_ChainSqlMapping, count: Int): List<Long>? {
+        if (!isEnabled()) return null
+        return allocate0(sqlExec, mapping, count)
+    }
+
+    /** Allocates rowids in advance in any mode, for inserts that cannot call `make_rowid()` (like `COPY`). */
+    fun allocateAll(sqlExec: SqlExecutor, mapping: Rt_ChainSqlMapping, count: Int): List<Long> {
+        return when {
+            isEnabled() -> allocate0(sqlExec, mapping, count)
+            mode == SqlRowidMode.TABLE -> {
+                // Reserve exactly the needed number of rowids, so nothing has to be released.
+                reserve(sqlExec, mapping, count)
+                allocate0(sqlExec, mapping, count)
+            }
+            else -> nextSequenceValues(sqlExec, mapping, count)
+        }
+    }
+
+    private fun allocate0(sqlExec: SqlExecutor, mapping: Rt_ChainSqlMapping, count: Int): List<Long> {
+        val res = ArrayList<Long>(count)
+        while (res.size < count) {
+            if (next > last) {
+                reserve(sqlExec, mapping, max(blockSize, count - res.size))
+            }
+            res.add(next++)
+        }
+        return res
+    }
+
+    fun release(sqlExec: SqlExecutor, mapping: Rt_ChainSqlMapping) {
+        if (next > last) return
+
+        // Do nothing if other rowids were allocated after the reservation: the unused ones remain a gap.
+        val table = mapping.rowidTable
+        sqlExec.executeUpdate("""UPDATE "$table" SET last_value = ? WHERE last_value = ?;""") { stmt ->
+            stmt.setLong(1, next - 1)
+            stmt.setLong(2, last)
+        }
+        next = last + 1
+    }
+
+    private fun nextSequenceValues(sqlExec: SqlExecutor, mapping: Rt_ChainSqlMapping, count: Int): List<Long> {
+        val res = ArrayList<Long>(count)
+        val sql = """SELECT NEXTVAL('"${mapping.rowidSequence}"') FROM GENERATE_SERIES(1, ?);"""
+        sqlExec.executeQuery(sql, { stmt -> stmt.setInt(1, count) }) { rs -> res.add(rs.getLong(1)) }
+        checkEquals(res.size, count)
+        res.sort()
+        return res
+    }
+
+    private fun reserve(sqlExec: SqlExecutor, mapping: Rt_ChainSqlMapping, count: Int) {
+        var newLast = -1L
+        val table = mapping.rowidTable
+        sqlExec.executeQuery("""UPDATE "$table" SET last_value = last_value + ? RETURNING last_value;""",
+            { stmt -> stmt.setLong(1, count.toLong()) },
+            { rs -> newLast = rs.getLong(1) },
+        )
+        check(newLast >= count) { "Rowid reservation failed: $table" }
+
+        next = newLast - count + 1
+        last = newLast
+    }
+}
@@ -129,6 +129,12 @@ abstract class Rt_Value {
 
     open fun toFormatArg(): Any = toString()
 
+    /**
+     * Returns the merkle hash of the value as [type], computed by [calculator]. Must be called only for immutable
+     * types; composite values remember the hash, so hashing the same value again is cheap.
+     */
+    open fun merkleHash(type: R_Type, calculator: () -> Rt_Value): Rt_Value = calculator()
+
     abstract fun str(): String
     abstract fun strCode(showTupleFieldNames: Boolean = true): String
 
@@ -143,9 +149,25 @@ abstract class Rt_Value {
     private fun errType(expected: Rt_ValueType) = Rt_ValueTypeError.exception(expected, valueType)
 }
 
+class Rt_MerkleHashMemo private constructor(private val type: R_Type, val hash: Rt_Value) {
+    companion object {
+        fun get(memo: Rt_MerkleHashMemo?, type: R_Type, calculator: () -> Rt_Value): Rt_MerkleHashMemo {
+            return if (memo != null && memo.type == type) memo else Rt_MerkleHashMemo(type, calculator())
+        }
+    }
+}
+
 sealed class Rt_VirtualValue(val gtv: Gtv): Rt_Value() {
+    @Volatile private var hashMemo: Rt_MerkleHashMemo? = null
+
     override fun asVirtual() = this
 
+    final override fun merkleHash(type: R_Type, calculator: () -> Rt_Value): Rt_Value {
+        val memo = Rt_MerkleHashMemo.get(hashMemo, type, calculator)
+        hashMemo = memo
+        return memo.hash
+    }
+
     fun toFull(): Rt_Value {
         if (gtv is GtvVirtual) {
             val typeStr = type().name
@@ -683,6 +705,8 @@ class Rt_VirtualMapValue(
 }
 
 class Rt_TupleValue(val type: R_TupleType, val elements: List<Rt_Value>): Rt_Value() {
+    @Volatile private var hashMemo: Rt_MerkleHashMemo? = null
+
     init {
         checkEquals(elements.size, type.fields.size)
     }
@@ -698,6 +722,12 @@ class Rt_TupleValue(val type: R_TupleType, val elements: List<Rt_Value>): Rt_Val
     override fun str() = str("", type, elements)
     override fun strCode(showTupleFieldNames: Boolean) = strCode("", type, elements, showTupleFieldNames)
 
+    override fun merkleHash(type: R_Type, calculator: () -> Rt_Value): Rt_Value {
+        val memo = Rt_MerkleHashMemo.get(hashMemo, type, calculator)
+        hashMemo = memo
+        return memo.hash
+    }
+
     companion object {
         fun make(type: R_TupleType, vararg elements: Rt_Value): Rt_Value {
             return Rt_TupleValue(type, elements.toImmList())
@@ -769,6 +799,8 @@ class Rt_VirtualTupleValue(
 }
 
 class Rt_StructValue(private val type: R_StructType, private val attributes: MutableList<Rt_Value>): Rt_Value() {
+    @Volatile private var hashMemo: Rt_MerkleHashMemo? = null
+
     override val valueType = Rt_CoreValueTypes.STRUCT.type()
 
     override fun type() = type
@@ -780,6 +812,12 @@ class Rt_StructValue(private val type: R_StructType, private val attributes: Mut
     override fun str() = str(this, type, type.struct, attributes)
     override fun strCode(showTupleFieldNames: Boolean) = strCode(this, type, type.struct, attributes)
 
+    override fun merkleHash(type: R_Type, calculator: () -> Rt_Value): Rt_Value {
+        val memo = Rt_MerkleHashMemo.get(hashMemo, type, calculator)
+        hashMemo = memo
+        return memo.hash
+    }
+
     fun get(index: Int): Rt_Value {
         return attributes[index]
     }
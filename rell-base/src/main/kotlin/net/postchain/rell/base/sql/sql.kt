@@ -14,6 +14,7 @@ import java.io.Closeable
 import java.sql.Connection
 import java.sql.PreparedStatement
 import java.sql.ResultSet
+import java.util.*
 import java.util.concurrent.atomic.AtomicBoolean
 import java.util.concurrent.atomic.AtomicLong
 
@@ -21,6 +22,7 @@ object SqlConstants {
     const val ROWID_COLUMN = "rowid"
     const val ROWID_GEN = "rowid_gen"
     const val MAKE_ROWID = "make_rowid"
+    const val ROWID_SEQ = "rowid_seq"
 
     const val FN_INTEGER_POWER = "rell_integer_power"
     const val FN_BIGINTEGER_FROM_TEXT = "rell_biginteger_from_text"
@@ -51,6 +53,7 @@ object SqlConstants {
     private val SYSTEM_OBJECTS_0 = immSetOf(
             ROWID_GEN,
             MAKE_ROWID,
+            ROWID_SEQ,
             BLOCKCHAINS_TABLE,
             BLOCKS_TABLE,
             TRANSACTIONS_TABLE,
@@ -68,6 +71,18 @@ object SqlConstants {
     )
 }
 
+/** How the rowid counter of a chain is stored; `make_rowid()` allocates rowids in either mode. */
+enum class SqlRowidMode {
+    /** One-row table `rowid_gen`: allocations are transactional, no gaps after a rollback. */
+    TABLE,
+    /**
+     * Postgres sequence `rowid_seq`: no row lock and no dead tuple per rowid, but values are not returned on
+     * a rollback, so rowids may have gaps that differ between nodes. Not for blockchains (consensus); used only by
+     * runners with a single database, like tests and the REPL.
+     */
+    SEQUENCE,
+}
+
 class SqlConnectionLogger(private val logging: Boolean) {
     private val conId = idCounter.getAndIncrement()
 
@@ -169,16 +184,23 @@ object NoConnSqlExecutor: SqlExecutor() {
     private fun err() = Rt_Exception.common("no_sql", "No database connection")
 }
 
-class ConnectionSqlManager(private val con: Connection, logging: Boolean): SqlManager() {
+class ConnectionSqlManager(
+    private val con: Connection,
+    logging: Boolean,
+    statementCacheSize: Int = SqlStatementCache.DEFAULT_SIZE,
+): SqlManager(), Closeable {
     override val hasConnection = true
 
     private val conLogger = SqlConnectionLogger(logging)
-    private val sqlExec = ConnectionSqlExecutor(con, conLogger)
+    private val stmtCache = SqlStatementCache(statementCacheSize)
+    private val sqlExec = ConnectionSqlExecutor(con, conLogger, stmtCache)
 
     init {
         check(con.autoCommit)
     }
 
+    fun statementCacheStats() = stmtCache.stats()
+
     override fun <T> execute0(tx: Boolean, code: (SqlExecutor) -> T): T {
         val res = if (tx) {
             transaction0(code)
@@ -191,6 +213,8 @@ class ConnectionSqlManager(private val con: Connection, logging: Boolean): SqlMa
     private fun <T> transaction0(code: (SqlExecutor) -> T): T {
         val autoCommit = con.autoCommit
         check(autoCommit)
+        // Statements prepared outside of the transaction are not reused inside it, and vice versa.
+        stmtCache.clear()
         try {
             con.autoCommit = false
             var rollback = true
@@ -208,6 +232,7 @@ class ConnectionSqlManager(private val con: Connection, logging: Boolean): SqlMa
                 }
             }
         } finally {
+            stmtCache.clear()
             con.autoCommit = autoCommit
         }
     }
@@ -218,9 +243,17 @@ class ConnectionSqlManager(private val con: Connection, logging: Boolean): SqlMa
         check(con.autoCommit)
         return res
     }
+
+    override fun close() {
+        stmtCache.close()
+    }
 }
 
-class ConnectionSqlExecutor(private val con: Connection, private val conLogger: SqlConnectionLogger): SqlExecutor() {
+class ConnectionSqlExecutor(
+    private val con: Connection,
+    private val conLogger: SqlConnectionLogger,
+    private val stmtCache: SqlStatementCache? = null,
+): SqlExecutor() {
     constructor(con: Connection, logging: Boolean = true): this(con, SqlConnectionLogger(logging))
 
     override fun <T> connection(code: (Connection) -> T): T {
@@ -240,7 +273,7 @@ class ConnectionSqlExecutor(private val con: Connection, private val conLogger:
 
     override fun execute(sql: String, preparator: (PreparedStatement) -> Unit) {
         execute0(sql) { con ->
-            con.prepareStatement(sql).use { stmt ->
+            prepared(con, sql) { stmt ->
                 preparator(stmt)
                 stmt.execute()
             }
@@ -249,7 +282,7 @@ class ConnectionSqlExecutor(private val con: Connection, private val conLogger:
 
     override fun executeUpdate(sql: String, preparator: (PreparedStatement) -> Unit): Int {
         val res = execute0(sql) { con ->
-            con.prepareStatement(sql).use { stmt ->
+            prepared(con, sql) { stmt ->
                 preparator(stmt)
                 stmt.executeUpdate()
             }
@@ -259,7 +292,7 @@ class ConnectionSqlExecutor(private val con: Connection, private val conLogger:
 
     override fun executeQuery(sql: String, preparator: (PreparedStatement) -> Unit, consumer: (ResultSet) -> Unit) {
         execute0(sql) { con ->
-            con.prepareStatement(sql).use { stmt ->
+            prepared(con, sql) { stmt ->
                 preparator(stmt)
                 stmt.executeQuery().use { rs ->
                     while (rs.next()) {
@@ -270,6 +303,14 @@ class ConnectionSqlExecutor(private val con: Connection, private val conLogger:
         }
     }
 
+    private fun <T> prepared(con: Connection, sql: String, code: (PreparedStatement) -> T): T {
+        return if (stmtCache == null) {
+            con.prepareStatement(sql).use(code)
+        } else {
+            stmtCache.execute(con, sql, code)
+        }
+    }
+
     private fun <T> execute0(sql: String, code: (Connection) -> T): T {
         conLogger.log(sql)
         val autoCommit = con.autoCommit
@@ -278,3 +319,96 @@ class ConnectionSqlExecutor(private val con: Connection, private val conLogger:
         return res
     }
 }
+
+class SqlStatementCacheStats(val hits: Long, val misses: Long, val evictions: Long) {
+    val hitRatio: Double = if (hits + misses == 0L) 0.0 else hits.toDouble() / (hits + misses)
+
+    override fun toString(): String {
+        val ratioStr = "%.3f".format(Locale.US, hitRatio)
+        return "hits=$hits misses=$misses evictions=$evictions ratio=$ratioStr"
+    }
+}
+
+/**
+ * LRU cache of prepared statements of a single connection, keyed by SQL text. A statement is taken out of the cache
+ * while it is executing, so nested queries (e.g. run while iterating a result set) with the same SQL get their own
+ * statement. Statements which failed are closed and not returned to the cache. Size 0 disables caching.
+ */
+class SqlStatementCache(private val maxSize: Int): Closeable {
+    private val statements = object: LinkedHashMap<String, PreparedStatement>(16, 0.75f, true) {
+        override fun removeEldestEntry(eldest: MutableMap.MutableEntry<String, PreparedStatement>): Boolean {
+            if (size <= maxSize) return false
+            ++evictions
+            closeQuietly(eldest.value)
+            return true
+        }
+    }
+
+    private var hits = 0L
+    private var misses = 0L
+    private var evictions = 0L
+
+    fun isEnabled() = maxSize > 0
+
+    fun <T> execute(con: Connection, sql: String, code: (PreparedStatement) -> T): T {
+        if (!isEnabled()) {
+            return con.prepareStatement(sql).use(code)
+        }
+
+        val stmt = takeStatement(con, sql)
+
+        val res = try {
+            code(stmt)
+        } catch (e: Throwable) {
+            closeQuietly(stmt)
+            throw e
+        }
+
+        if (statements.containsKey(sql)) {
+            closeQuietly(stmt)
+        } else {
+            statements[sql] = stmt
+        }
+
+        return res
+    }
+
+    private fun takeStatement(con: Connection, sql: String): PreparedStatement {
+        val cached = statements.remove(sql)
+        if (cached != null) {
+            if (!cached.isClosed && cached.connection === con) {
+                ++hits
+                cached.clearParameters()
+                return cached
+            }
+            closeQuietly(cached)
+        }
+
+        ++misses
+        return con.prepareStatement(sql)
+    }
+
+    fun stats() = SqlStatementCacheStats(hits = hits, misses = misses, evictions = evictions)
+
+    fun clear() {
+        val stmts = statements.values.toList()
+        statements.clear()
+        stmts.forEach { closeQuietly(it) }
+    }
+
+    override fun close() {
+        clear()
+    }
+
+    private fun closeQuietly(stmt: PreparedStatement) {
+        try {
+            stmt.close()
+        } catch (e: Throwable) {
+            logger.warn(e) { "Failed to close a cached statement" }
+        }
+    }
+
+    companion object: KLogging() {
+        const val DEFAULT_SIZE = 100
+    }
+}
@@ -0,0 +1,116 @@
+/*
+ * Copyright (C) 2023 ChromaWay AB. See LICENSE for license information.
+ */
+
+package net.postchain.rell.base.sql
+
+import net.postchain.rell.base.model.R_Attribute
+import net.postchain.rell.base.runtime.Rt_Value
+import net.postchain.rell.base.utils.CommonUtils
+import net.postchain.rell.base.utils.checkEquals
+import org.postgresql.PGConnection
+import org.postgresql.copy.CopyIn
+import org.postgresql.util.PGobject
+import java.math.BigDecimal
+import java.sql.Connection
+
+/**
+ * Inserts rows with `COPY ... FROM STDIN`, streaming values in the text format instead of binding them as parameters
+ * of an `INSERT` statement. Rowids must be allocated by the caller.
+ */
+object SqlBulkInsert {
+    private const val BUFFER_SIZE = 64 * 1024
+
+    fun isSupported(sqlExec: SqlExecutor): Boolean {
+        return sqlExec.connection { con -> pgConnection(con) != null }
+    }
+
+    fun insert(
+        sqlExec: SqlExecutor,
+        table: String,
+        rowidColumn: String,
+        attrs: List<R_Attribute>,
+        rowids: List<Long>,
+        records: List<List<Rt_Value>>,
+    ) {
+        checkEquals(rowids.size, records.size)
+
+        val columns = (listOf(rowidColumn) + attrs.map { it.sqlMapping }).joinToString(", ") { "\"$it\"" }
+        val sql = """COPY "$table"($columns) FROM STDIN"""
+        val adapters = attrs.map { it.type.sqlAdapter }
+
+        sqlExec.connection { con ->
+            val pgCon = pgConnection(con)
+            checkNotNull(pgCon) { "COPY not supported by the connection" }
+
+            val copyIn = pgCon.copyAPI.copyIn(sql)
+            try {
+                writeRows(copyIn, rowids, records) { b, i, value ->
+                    appendValue(b, adapters[i].toSqlValue(value))
+                }
+                copyIn.endCopy()
+            } finally {
+                if (copyIn.isActive) {
+                    copyIn.cancelCopy()
+                }
+            }
+        }
+    }
+
+    private fun writeRows(
+        copyIn: CopyIn,
+        rowids: List<Long>,
+        records: List<List<Rt_Value>>,
+        valueWriter: (StringBuilder, Int, Rt_Value) -> Unit,
+    ) {
+        val b = StringBuilder()
+        for ((rowid, record) in rowids.zip(records)) {
+            b.append(rowid)
+            for ((i, value) in record.withIndex()) {
+                b.append('\t')
+                valueWriter(b, i, value)
+            }
+            b.append('\n')
+
+            if (b.length >= BUFFER_SIZE) {
+                flush(copyIn, b)
+            }
+        }
+        flush(copyIn, b)
+    }
+
+    private fun flush(copyIn: CopyIn, b: StringBuilder) {
+        if (b.isEmpty()) return
+        val bytes = b.toString().toByteArray(Charsets.UTF_8)
+        copyIn.writeToCopy(bytes, 0, bytes.size)
+        b.setLength(0)
+    }
+
+    private fun appendValue(b: StringBuilder, value: Any) {
+        when (value) {
+            is Boolean -> b.append(if (value) 't' else 'f')
+            is BigDecimal -> b.append(value.toPlainString())
+            is Number -> b.append(value.toString())
+            is String -> appendText(b, value)
+            is ByteArray -> b.append("\\\\x").append(CommonUtils.bytesToHex(value))
+            is PGobject -> if (value.value == null) b.append("\\N") else appendText(b, value.value!!)
+            else -> throw IllegalStateException("Unsupported SQL value: ${value.javaClass.name}")
+        }
+    }
+
+    private fun appendText(b: StringBuilder, s: String) {
+        for (c in s) {
+            when (c) {
+                '\\' -> b.append("\\\\")
+                '\t' -> b.append("\\t")
+                '\n' -> b.append("\\n")
+                '\r' -> b.append("\\r")
+                else -> b.append(c)
+            }
+        }
+    }
+
+    private fun pgConnection(con: Connection): PGConnection? {
+        return if (con.isWrapperFor(PGConnection::class.java)) con.unwrap(PGConnection::class.java) else null
+    }
+}
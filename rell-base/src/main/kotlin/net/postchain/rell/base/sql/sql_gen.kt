@@ -4,9 +4,11 @@
 
 package net.postchain.rell.base.sql
 
+import net.postchain.common.toHex
 import net.postchain.rell.base.model.*
 import net.postchain.rell.base.runtime.Rt_ChainSqlMapping
 import net.postchain.rell.base.runtime.Rt_SqlContext
+import net.postchain.rell.base.runtime.Rt_Value
 import net.postchain.rell.base.utils.toImmMap
 import org.jooq.Constraint
 import org.jooq.CreateTableColumnStep
@@ -15,6 +17,7 @@ import org.jooq.SQLDialect
 import org.jooq.impl.DSL
 import org.jooq.impl.DSL.constraint
 import org.jooq.impl.SQLDataType
+import java.security.MessageDigest
 
 private val disableLogo = run {
     System.setProperty("org.jooq.no-logo", "true")
@@ -25,6 +28,8 @@ object SqlGen {
 
     val DSL_CTX = DSL.using(SQLDialect.POSTGRES)
 
+    private const val MAX_NAME_LEN = 63
+
     // (!) When changing a function, change its name e.g. to fn_v2. Functions in the database are not upgraded - a function is created
     // only once, if there is no function with the same name in the database.
     val RELL_SYS_FUNCTIONS = mapOf(
@@ -142,14 +147,51 @@ object SqlGen {
             """.trimIndent()
     }
 
-    fun genRowidSql(chainMapping: Rt_ChainSqlMapping): String {
+    fun genRowidSql(chainMapping: Rt_ChainSqlMapping, mode: SqlRowidMode): String {
+        val table = chainMapping.rowidTable
+        val seq = chainMapping.rowidSequence
+        return when (mode) {
+            SqlRowidMode.TABLE -> """
+                CREATE TABLE "$table"( last_value bigint not null);
+                INSERT INTO "$table"(last_value) VALUES (0);
+            """.trimIndent() + "\n" + genRowidFunction(chainMapping, mode, false)
+            SqlRowidMode.SEQUENCE -> """
+                CREATE SEQUENCE "$seq" MINVALUE 1;
+            """.trimIndent() + "\n" + genRowidFunction(chainMapping, mode, false)
+        }
+    }
+
+    /** Moves the rowid counter to another storage; the next allocated rowid stays the same. */
+    fun genRowidMigrationSql(chainMapping: Rt_ChainSqlMapping, mode: SqlRowidMode): String {
         val table = chainMapping.rowidTable
+        val seq = chainMapping.rowidSequence
+        return when (mode) {
+            SqlRowidMode.TABLE -> """
+                CREATE TABLE "$table"( last_value bigint not null);
+                INSERT INTO "$table"(last_value)
+                SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END FROM "$seq";
+            """.trimIndent() + "\n" + genRowidFunction(chainMapping, mode, true) + "\n" + """
+                DROP SEQUENCE "$seq";
+            """.trimIndent()
+            SqlRowidMode.SEQUENCE -> """
+                CREATE SEQUENCE "$seq" MINVALUE 1;
+                SELECT SETVAL('"$seq"', GREATEST(last_value, 1), last_value > 0) FROM "$table";
+            """.trimIndent() + "\n" + genRowidFunction(chainMapping, mode, true) + "\n" + """
+                DROP TABLE "$table";
+            """.trimIndent()
+        }
+    }
+
+    private fun genRowidFunction(chainMapping: Rt_ChainSqlMapping, mode: SqlRowidMode, replace: Boolean): String {
         val func = chainMapping.rowidFunction
+        val body = when (mode) {
+            SqlRowidMode.TABLE -> """UPDATE "${chainMapping.rowidTable}" SET last_value = last_value + 1 RETURNING last_value"""
+            SqlRowidMode.SEQUENCE -> """SELECT NEXTVAL('"${chainMapping.rowidSequence}"')"""
+        }
+        val create = if (replace) "CREATE OR REPLACE FUNCTION" else "CREATE FUNCTION"
         return """
-            CREATE TABLE "$table"( last_value bigint not null);
-            INSERT INTO "$table"(last_value) VALUES (0);
-            CREATE FUNCTION "$func"() RETURNS BIGINT AS
-            'UPDATE "$table" SET last_value = last_value + 1 RETURNING last_value'
+            $create "$func"() RETURNS BIGINT AS
+            '${body.replace("'", "''")}'
             LANGUAGE SQL;
         """.trimIndent()
     }
@@ -182,7 +224,7 @@ object SqlGen {
 
         val jsonAttribSet = attrs.filter { it.type is R_JsonType }.map { it.name }.toSet()
 
-        for ((iidx, index) in rEntity.indexes.withIndex()) {
+        for ((iidx, index) in rEntity.indexes.filter { it.ext == null }.withIndex()) {
             val indexName = "IDX_${tableName}_${iidx}"
             val indexSql : String
             if (index.attribs.size == 1 && jsonAttribSet.contains(index.attribs[0].str)) {
@@ -195,9 +237,77 @@ object SqlGen {
             ddl += indexSql + ";\n";
         }
 
+        for (extIndex in genExtIndexes(rEntity, tableName)) {
+            ddl += genExtIndexSql(tableName, extIndex) + ";\n"
+        }
+
         return ddl
     }
 
+    /** Expression, partial and covering indexes of an entity, with the names used by [genEntity]. */
+    fun genExtIndexes(rEntity: R_EntityDefinition, tableName: String): List<MetaIndex> {
+        return rEntity.indexes
+            .mapNotNull { it.ext }
+            .mapIndexed { k, ext -> MetaIndex(extIndexName(tableName, k), genExtIndexDef(rEntity, ext)) }
+    }
+
+    fun extIndexName(tableName: String, k: Int): String {
+        val name = "IDX_${tableName}_X$k"
+        if (name.length <= MAX_NAME_LEN) {
+            return name
+        }
+
+        // Postgres truncates longer names, which may make them ambiguous; the name is stored in the meta table and
+        // must match the actual one, so using a hash of the table name.
+        val hash = MessageDigest.getInstance("SHA-256").digest(tableName.toByteArray()).toHex().take(16)
+        return "IDX_${tableName.take(32)}_${hash}_X$k"
+    }
+
+    fun genExtIndexSql(tableName: String, index: MetaIndex): String {
+        return """CREATE INDEX "${index.name}" ON "$tableName" ${index.def}"""
+    }
+
+    /**
+     * Generates the part of CREATE INDEX following the table name. The result is stored in the meta table and is
+     * compared with the code on every start, so it must not depend on anything but the index definition.
+     */
+    private fun genExtIndexDef(rEntity: R_EntityDefinition, ext: R_IndexExt): String {
+        fun col(name: R_Name) = "\"${rEntity.attributes.getValue(name).sqlMapping}\""
+
+        val columns = ext.columns.joinToString(", ") { column ->
+            if (column.fn == null) col(column.attr) else "${column.fn.sql}(${col(column.attr)})"
+        }
+
+        var res = "($columns)"
+
+        if (ext.include.isNotEmpty()) {
+            res += " INCLUDE (${ext.include.joinToString(", ") { col(it) }})"
+        }
+
+        if (ext.where.isNotEmpty()) {
+            val conditions = ext.where.map { cond ->
+                val op = cond.op
+                when {
+                    op != null -> "${col(cond.attr)} ${op.sql} ${genExtIndexValue(cond.value!!)}"
+                    cond.not -> "NOT ${col(cond.attr)}"
+                    else -> col(cond.attr)
+                }
+            }
+            res += " WHERE ${conditions.joinToString(" AND ")}"
+        }
+
+        return res
+    }
+
+    private fun genExtIndexValue(value: Rt_Value): String {
+        return when (value.type()) {
+            R_BooleanType -> if (value.asBoolean()) "TRUE" else "FALSE"
+            R_IntegerType -> value.asInteger().toString()
+            R_TextType -> "'" + value.asString().replace("'", "''") + "'"
+            else -> throw IllegalStateException("Unsupported index condition value: ${value.strCode()}")
+        }
+    }
+
     private fun genAttrColumns(attrs: Collection<R_Attribute>, step: CreateTableColumnStep): CreateTableColumnStep {
         var q = step
         for (attr in attrs) {
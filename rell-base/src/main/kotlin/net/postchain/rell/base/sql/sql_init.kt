@@ -128,6 +128,7 @@ class SqlInit private constructor(
 private class SqlInitPlanner private constructor(private val exeCtx: Rt_ExecutionContext, private val initCtx: SqlInitCtx) {
     private val sqlCtx = exeCtx.sqlCtx
     private val mapping = sqlCtx.mainChainMapping()
+    private val rowidMode = exeCtx.globalCtx.rowidMode
 
     companion object {
         fun plan(exeCtx: Rt_ExecutionContext, initCtx: SqlInitCtx): Boolean {
@@ -149,6 +150,10 @@ private class SqlInitPlanner private constructor(private val exeCtx: Rt_Executio
         val metaData = processMeta(metaExists, tables)
         initCtx.checkErrors()
 
+        if (metaExists) {
+            processRowid()
+        }
+
         processFunctions(functions)
         initCtx.checkErrors()
 
@@ -158,11 +163,21 @@ private class SqlInitPlanner private constructor(private val exeCtx: Rt_Executio
 
     private fun processMeta(metaExists: Boolean, tables: Map<String, SqlTable>): Map<String, MetaEntity> {
         if (!metaExists) {
-            initCtx.step(ORD_TABLES, "Create ROWID table and function", SqlStepAction_ExecSql(SqlGen.genRowidSql(mapping)))
+            val rowidSql = SqlGen.genRowidSql(mapping, rowidMode)
+            initCtx.step(ORD_TABLES, "Create ROWID ${rowidMode.name.lowercase()} and function", SqlStepAction_ExecSql(rowidSql))
             initCtx.step(ORD_TABLES, "Create meta tables", SqlStepAction_ExecSql(SqlMeta.genMetaTablesCreate(sqlCtx)))
         }
 
-        val metaData = if (!metaExists) mapOf() else SqlMeta.loadMetaData(exeCtx.sqlExec, mapping, initCtx.msgs)
+        val indexTableExists = mapping.metaIndexesTable in tables
+        val extIndexesExist = sqlCtx.appDefs.entities.any { entity -> entity.indexes.any { it.ext != null } }
+        if (!indexTableExists && extIndexesExist) {
+            val sql = SqlMeta.genMetaIndexesTableCreate(sqlCtx)
+            initCtx.step(ORD_TABLES, "Create meta table for indexes", SqlStepAction_ExecSql(sql))
+        }
+
+        val metaData = if (!metaExists) mapOf() else {
+            SqlMeta.loadMetaData(exeCtx.sqlExec, mapping, initCtx.msgs, loadIndexes = indexTableExists)
+        }
         initCtx.checkErrors()
 
         SqlMeta.checkDataTables(sqlCtx, tables, metaData, initCtx.msgs)
@@ -171,6 +186,15 @@ private class SqlInitPlanner private constructor(private val exeCtx: Rt_Executio
         return metaData
     }
 
+    private fun processRowid() {
+        val sequences = SqlUtils.getExistingSequences(exeCtx.sqlExec)
+        val curMode = if (mapping.rowidSequence in sequences) SqlRowidMode.SEQUENCE else SqlRowidMode.TABLE
+        if (curMode != rowidMode) {
+            val sql = SqlGen.genRowidMigrationSql(mapping, rowidMode)
+            initCtx.step(ORD_TABLES, "Migrate ROWID counter from $curMode to $rowidMode", SqlStepAction_ExecSql(sql))
+        }
+    }
+
     private fun processFunctions(functions: Set<String>) {
         for ((name, sql) in SqlGen.RELL_SYS_FUNCTIONS) {
             if (name !in functions) {
@@ -261,12 +285,14 @@ private class SqlEntityIniter private constructor(
 
         checkAttrTypes(entity, metaCls)
         checkOldAttrs(entity, metaCls)
-        checkSqlIndexes(entity)
+        checkSqlIndexes(entity, metaCls)
 
         val newAttrs = entity.strAttributes.keys.filter { it !in metaCls.attrs }
         if (!newAttrs.isEmpty()) {
             processNewAttrs(entity, metaCls.id, newAttrs)
         }
+
+        processExtIndexes(entity, metaCls)
     }
 
     private fun checkAttrTypes(entity: R_EntityDefinition, metaEntity: MetaEntity) {
@@ -297,13 +323,17 @@ private class SqlEntityIniter private constructor(
         }
     }
 
-    private fun checkSqlIndexes(entity: R_EntityDefinition) {
+    private fun checkSqlIndexes(entity: R_EntityDefinition, metaEntity: MetaEntity) {
         val table = sqlTables.getValue(entity.sqlMapping.table(sqlCtx))
-        val sqlIndexes = table.indexes.filter { !(it.unique && it.cols == listOf(SqlConstants.ROWID_COLUMN)) }
+        val extIndexNames = metaEntity.indexes.map { it.name }.toSet()
+        val sqlIndexes = table.indexes
+            .filter { !(it.unique && it.cols == listOf(SqlConstants.ROWID_COLUMN)) }
+            .filter { it.name !in extIndexNames }
 
         val codeIndexes = mutableListOf<SqlIndex>()
         codeIndexes.addAll(entity.keys.map { SqlIndex("", true, it.attribs.map { it.str }) })
-        codeIndexes.addAll(entity.indexes.map { SqlIndex("", false, it.attribs.map { it.str }) })
+        val plainIndexes = entity.indexes.filter { it.ext == null }
+        codeIndexes.addAll(plainIndexes.map { SqlIndex("", false, it.attribs.map { it.str }) })
 
         compareSqlIndexes(entity, "database", sqlIndexes, "code", codeIndexes, true)
         compareSqlIndexes(entity, "database", sqlIndexes, "code", codeIndexes, false)
@@ -332,6 +362,51 @@ private class SqlEntityIniter private constructor(
         }
     }
 
+    /** Expression, partial and covering indexes are identified by their definitions stored in the meta table. */
+    private fun processExtIndexes(entity: R_EntityDefinition, metaEntity: MetaEntity) {
+        val tableName = entity.sqlMapping.table(sqlCtx)
+        val sqlIndexNames = sqlTables.getValue(tableName).indexes.map { it.name }.toSet()
+        val metaIndexes = metaEntity.indexes.associateBy { it.def }
+
+        val codeIndexes = SqlGen.genExtIndexes(entity, tableName)
+        val codeDefs = codeIndexes.map { it.def }.toSet()
+        val entityName = msgEntityName(entity)
+
+        for (metaIndex in metaEntity.indexes.filter { it.def !in codeDefs }) {
+            initCtx.msgs.error("dbinit:index_diff:${entity.metaName}:database:index:${metaIndex.def}",
+                    "Entity $entityName: index ${metaIndex.def} exists in database, but not in code")
+        }
+
+        val usedNames = (sqlIndexNames + metaEntity.indexes.map { it.name }).toMutableSet()
+        val newIndexes = mutableListOf<MetaIndex>()
+        val createIndexes = mutableListOf<MetaIndex>()
+
+        for (codeIndex in codeIndexes) {
+            val metaIndex = metaIndexes[codeIndex.def]
+            if (metaIndex == null) {
+                // Index names are chosen once and remembered in the meta table.
+                val name = generateSequence(0) { it + 1 }
+                    .map { SqlGen.extIndexName(tableName, it) }
+                    .first { it !in usedNames }
+                usedNames.add(name)
+                val index = MetaIndex(name, codeIndex.def)
+                newIndexes.add(index)
+                createIndexes.add(index)
+            } else if (metaIndex.name !in sqlIndexNames) {
+                // Recreating an index which was dropped from the database, but is still in the meta table.
+                createIndexes.add(metaIndex)
+            }
+        }
+
+        if (createIndexes.isNotEmpty()) {
+            val sqls = createIndexes.map { SqlGen.genExtIndexSql(tableName, it) + ";" }
+            val metaSqls = SqlMeta.genMetaIndexInserts(sqlCtx, metaEntity.id, newIndexes)
+            val defsStr = createIndexes.joinToString { it.def }
+            val action = SqlStepAction_ExecSql(sqls + metaSqls)
+            initCtx.step(ORD_RECORDS, "Create indexes for $entityName: $defsStr", action)
+        }
+    }
+
     private fun processNewAttrs(entity: R_EntityDefinition, metaEntityId: Int, newAttrs: List<String>) {
         val attrsStr = newAttrs.joinToString()
 
@@ -359,7 +434,7 @@ private class SqlEntityIniter private constructor(
         val res = mutableListOf<R_CreateExprAttr>()
 
         val keys = entity.keys.flatMap { it.attribs }.map { it.str }.toSet()
-        val indexes = entity.indexes.flatMap { it.attribs }.map { it.str }.toSet()
+        val indexes = entity.indexes.filter { it.ext == null }.flatMap { it.attribs }.map { it.str }.toSet()
 
         val entityName = msgEntityName(entity)
 
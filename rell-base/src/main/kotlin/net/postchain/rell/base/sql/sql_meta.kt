@@ -32,6 +32,15 @@ object SqlMeta {
     );
     """.trimIndent()
 
+    // Created only when the first expression, partial or covering index appears, thus missing in older databases.
+    private val CREATE_TABLE_META_INDEXES = """
+    CREATE TABLE "%s"(
+        "class_id" INT NOT NULL,
+        "name" TEXT NOT NULL UNIQUE,
+        "def" TEXT NOT NULL
+    );
+    """.trimIndent()
+
     fun checkMetaTablesExisting(mapping: Rt_ChainSqlMapping, tables: Map<String, SqlTable>, msgs: Rt_Messages): Boolean {
         val metaTables = metaTables(mapping)
         val metaExists = metaTables.any { it in tables }
@@ -53,6 +62,12 @@ object SqlMeta {
         attrChk.checkColumn("type", "text")
         attrChk.finish(msgs)
 
+        val indexChk = SqlTableChecker(tables, mapping.metaIndexesTable)
+        indexChk.checkColumn("class_id", "int4")
+        indexChk.checkColumn("name", "text")
+        indexChk.checkColumn("def", "text")
+        indexChk.finish(msgs)
+
         return metaExists
     }
 
@@ -60,19 +75,33 @@ object SqlMeta {
         return listOf(mapping.metaEntitiesTable, mapping.metaAttributesTable)
     }
 
-    fun loadMetaData(sqlExec: SqlExecutor, mapping: Rt_ChainSqlMapping, msgs: Rt_Messages): Map<String, MetaEntity> {
+    fun loadMetaData(
+        sqlExec: SqlExecutor,
+        mapping: Rt_ChainSqlMapping,
+        msgs: Rt_Messages,
+        loadIndexes: Boolean = false,
+    ): Map<String, MetaEntity> {
         val metaEntities = selectMetaEntities(mapping, sqlExec, msgs)
         val metaAttrs = selectMetaAttrs(mapping, sqlExec, msgs)
+        val metaIndexes = if (loadIndexes) selectMetaIndexes(mapping, sqlExec, msgs) else listOf()
         msgs.checkErrors()
 
         val entityMap = metaEntities.map { Pair(it.id, it) }.toMap()
         val attrMap = metaAttrs.groupBy { it.classId }
+        val indexMap = metaIndexes.groupBy { it.classId }
 
         for (classId in attrMap.keys.sorted()) {
             if (classId !in entityMap) {
                 msgs.error("meta:attr_no_entity:$classId", "$MSG_BROKEN_META: attributes without entity (class_id = $classId)")
             }
         }
+
+        for (classId in indexMap.keys.sorted()) {
+            if (classId !in entityMap) {
+                val msg = "$MSG_BROKEN_META: indexes without entity (class_id = $classId)"
+                msgs.error("meta:index_no_entity:$classId", msg)
+            }
+        }
         msgs.checkErrors()
 
         val res = mutableMapOf<String, MetaEntity>()
@@ -81,7 +110,8 @@ object SqlMeta {
             if (type == null) continue
             val attrs = attrMap[entityRec.id] ?: listOf()
             val resAttrMap = attrs.map { Pair(it.name, MetaAttr(it.name, it.type)) }.toMap()
-            res[entityRec.name] = MetaEntity(entityRec.id, entityRec.name, type, entityRec.log, resAttrMap)
+            val indexes = (indexMap[entityRec.id] ?: listOf()).map { MetaIndex(it.name, it.def) }
+            res[entityRec.name] = MetaEntity(entityRec.id, entityRec.name, type, entityRec.log, resAttrMap, indexes)
         }
 
         return res
@@ -130,6 +160,20 @@ object SqlMeta {
         return res
     }
 
+    private fun selectMetaIndexes(mapping: Rt_ChainSqlMapping, sqlExec: SqlExecutor, msgs: Rt_Messages): List<RecMetaIndex> {
+        val table = mapping.metaIndexesTable
+        val res = mutableListOf<RecMetaIndex>()
+        sqlExec.executeQuery("""SELECT T."class_id", T."name", T."def" FROM "$table" T ORDER BY T."class_id", T."name";""", {}) { rs ->
+            val classId = rs.getInt(1)
+            val name = rs.getString(2)
+            val def = rs.getString(3)
+            res.add(RecMetaIndex(classId, name, def))
+        }
+        checkUniqueKeys(msgs, table, res) { it.name }
+        checkUniqueKeys(msgs, table, res) { "${it.classId}:${it.def}" }
+        return res
+    }
+
     private fun <T> checkUniqueKeys(msgs: Rt_Messages, table: String, list: List<T>, getter: (T) -> String) {
         val unique = mutableSetOf<String>()
         val dup = mutableSetOf<String>()
@@ -184,6 +228,10 @@ object SqlMeta {
         sqls += genMetaTablesCreate(sqlCtx)
 
         val metaEntities = sqlCtx.appDefs.topologicalEntities.filter { it.sqlMapping.autoCreateTable() }
+        if (metaEntities.any { entity -> entity.indexes.any { it.ext != null } }) {
+            sqls += genMetaIndexesTableCreate(sqlCtx)
+        }
+
         for ((i, entity) in metaEntities.withIndex()) {
             sqls += genMetaEntityInserts(sqlCtx, i, entity, MetaEntityType.ENTITY)
         }
@@ -199,6 +247,10 @@ object SqlMeta {
         return sqls
     }
 
+    fun genMetaIndexesTableCreate(sqlCtx: Rt_SqlContext): String {
+        return String.format(CREATE_TABLE_META_INDEXES, sqlCtx.mainChainMapping().metaIndexesTable)
+    }
+
     fun genMetaEntityInserts(sqlCtx: Rt_SqlContext, classId: Int, entity: R_EntityDefinition, entityType: MetaEntityType): List<String> {
         val sqls = mutableListOf<String>()
 
@@ -218,6 +270,9 @@ object SqlMeta {
 
         sqls += genMetaAttrsInserts(sqlCtx, classId, entity.attributes.values)
 
+        val tableName = entity.sqlMapping.table(sqlCtx)
+        sqls += genMetaIndexInserts(sqlCtx, classId, SqlGen.genExtIndexes(entity, tableName))
+
         return sqls
     }
 
@@ -240,6 +295,26 @@ object SqlMeta {
 
         return sqls
     }
+
+    fun genMetaIndexInserts(sqlCtx: Rt_SqlContext, classId: Int, indexes: Collection<MetaIndex>): List<String> {
+        val sqls = mutableListOf<String>()
+
+        val indexTable = DSL.table(DSL.name(sqlCtx.mainChainMapping().metaIndexesTable))
+
+        for (index in indexes) {
+            sqls += SqlGen.DSL_CTX.insertInto(indexTable,
+                    DSL.field("class_id"),
+                    DSL.field("name"),
+                    DSL.field("def")
+            ).values(
+                    classId,
+                    index.name,
+                    index.def
+            ).getSQL(ParamType.INLINED) + ";"
+        }
+
+        return sqls
+    }
 }
 
 private class SqlTableChecker(private val tables: Map<String, SqlTable>, private val table: String) {
@@ -280,6 +355,7 @@ private class SqlTableChecker(private val tables: Map<String, SqlTable>, private
 
 private class RecMetaEntity(val id: Int, val name: String, val type: String, val log: Boolean)
 private class RecMetaAttr(val classId: Int, val name: String, val type: String)
+private class RecMetaIndex(val classId: Int, val name: String, val def: String)
 
 enum class MetaEntityType(val code: String, val en: String) {
     ENTITY("class", "entity"),
@@ -292,7 +368,11 @@ class MetaEntity(
         val name: String,
         val type: MetaEntityType,
         val log: Boolean,
-        val attrs: Map<String, MetaAttr>
+        val attrs: Map<String, MetaAttr>,
+        val indexes: List<MetaIndex>
 )
 
 class MetaAttr(val name: String, val type: String)
+
+/** An expression, partial or covering index; [def] is the SQL following the table name in CREATE INDEX. */
+class MetaIndex(val name: String, val def: String)
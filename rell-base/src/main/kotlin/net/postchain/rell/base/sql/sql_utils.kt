@@ -18,6 +18,7 @@ object SqlUtils {
     fun dropAll(sqlExec: SqlExecutor, sysTables: Boolean) {
         dropTables(sqlExec, sysTables)
         dropFunctions(sqlExec)
+        dropSequences(sqlExec)
     }
 
     private fun dropTables(sqlExec: SqlExecutor, sysTables: Boolean) {
@@ -37,6 +38,12 @@ object SqlUtils {
         sqlExec.execute(sql)
     }
 
+    private fun dropSequences(sqlExec: SqlExecutor) {
+        val sequences = getExistingSequences(sqlExec)
+        val sql = sequences.joinToString("\n") { "DROP SEQUENCE IF EXISTS \"$it\";" }
+        sqlExec.execute(sql)
+    }
+
     fun getExistingTables(sqlExec: SqlExecutor): List<String> {
         val sql = "SELECT table_name FROM information_schema.tables WHERE table_catalog = CURRENT_DATABASE() AND table_schema = CURRENT_SCHEMA();"
         val list = mutableListOf<String>()
@@ -51,6 +58,13 @@ object SqlUtils {
         return list.toList()
     }
 
+    fun getExistingSequences(sqlExec: SqlExecutor): List<String> {
+        val sql = "SELECT sequence_name FROM information_schema.sequences WHERE sequence_catalog = CURRENT_DATABASE() AND sequence_schema = CURRENT_SCHEMA();"
+        val list = mutableListOf<String>()
+        sqlExec.executeQuery(sql, {}) { rs -> list.add(rs.getString(1))}
+        return list.toList()
+    }
+
     fun getExistingChainTables(con: Connection, mapping: Rt_ChainSqlMapping): Map<String, SqlTable> {
         val tables = mutableMapOf<String, MutableMap<String, SqlCol>>()
 
@@ -71,6 +71,52 @@ class EntityTest: BaseRellTest(false) {
         chk("D @ {} (.name)", "text[D2]")
     }
 
+    @Test fun testIndexExt() {
+        chkCompile("entity foo { name; index name.lower_case(); }", "OK")
+        chkCompile("entity foo { index name.upper_case(); name; }", "OK")
+        chkCompile("entity foo { name; score: integer; index name.lower_case(), score; }", "OK")
+        chkCompile("entity foo { name; score: integer; index score include (name); }", "OK")
+        chkCompile("entity foo { name; active: boolean; index name @ { .active }; }", "OK")
+        chkCompile("entity foo { name; active: boolean; index name @ { not .active }; }", "OK")
+        chkCompile("entity foo { name; score: integer; index name include (score) @ { .score >= 0, .name != '' }; }", "OK")
+        chkCompile("entity foo { name; index name; index name.lower_case(); index name @ { .name != '' }; }", "OK")
+
+        chkCompile("entity foo { name; index name.trim(); }", "ct_err:entity:index:fn:unknown:trim")
+        chkCompile("entity foo { index name.lower_case(); }", "ct_err:entity:index:attr:unknown:name")
+        chkCompile("entity foo { x: integer; index x.lower_case(); }", "ct_err:entity:index:fn:type:lower_case:integer")
+        chkCompile("entity foo { name; key name.lower_case(); }", "ct_err:entity:key:ext")
+        chkCompile("entity foo { name; index name.lower_case(), name.lower_case(); }",
+                "ct_err:entity_keyindex_dup:name.lower_case()")
+        chkCompile("entity foo { name; index name.lower_case(); index name.lower_case(); }",
+                "ct_err:entity:key_index:dup_ext:name.lower_case()")
+    }
+
+    @Test fun testIndexExtIncludeWhere() {
+        chkCompile("entity foo { name; index name include (score); }", "ct_err:entity:index:attr:unknown:score")
+        chkCompile("entity foo { name; index name include (name); }", "ct_err:entity:index:include:dup:name")
+        chkCompile("entity foo { name; index name @ { .foo }; }", "ct_err:entity:index:attr:unknown:foo")
+        chkCompile("entity foo { name; index name @ { .name }; }", "ct_err:entity:index:where:type:name:text")
+        chkCompile("entity foo { name; index name @ { .name == 123 }; }",
+                "ct_err:entity:index:where:value_type:name:text:integer")
+        chkCompile("entity foo { name; index name @ { .name == null }; }",
+                "ct_err:entity:index:where:value_type:name:text:null")
+        chkCompile("entity foo { name; x: boolean; index name @ { .x > false }; }", "ct_err:entity:index:where:op:x:>")
+        chkCompile("entity foo { name; x: decimal; index name @ { .x > 0.0 }; }",
+                "ct_err:entity:index:where:attr_type:x:decimal")
+        chkCompile("entity foo { name; x: integer; index name @ { not .x > 0 }; }", "ct_err:syntax")
+    }
+
+    @Test fun testIndexExtSql() {
+        tstCtx.useSql = true
+        def("entity user { name; mutable active: boolean; score: integer; index name.lower_case(); }")
+        def("entity item { name; score: integer; index score include (name) @ { .score > 0, .name != \"O'Brien\" }; }")
+
+        chkOp("create user(name = 'Bob', active = true, score = 1);")
+        chkOp("create item(name = \"O'Brien\", score = 1);")
+        chk("user @* { .name.lower_case() == 'bob' } (.score)", "list<integer>[int[1]]")
+        chk("item @* { .score > 0 } (.name)", "list<text>[text[O'Brien]]")
+    }
+
     @Test fun testKey() {
         chkCompile("entity foo { name; key name; }", "OK")
         chkCompile("entity foo { name; key name; key name; }", "ct_err:entity:key_index:dup_attr:KEY:name")
@@ -559,11 +605,68 @@ class EntityTest: BaseRellTest(false) {
         chkSql()
         chkEx("{ val e = data@{}; return e.value; }", "int[123]")
         chkSql(
-            """SELECT A00."rowid" FROM "c0.data" A00""",
+            """SELECT A00."rowid" FROM "c0.data" A00 LIMIT ?""",
             """SELECT A00."value" FROM "c0.data" A00 WHERE A00."rowid" = ?""",
         )
     }
 
+    @Test fun testAttributeReadCache() {
+        tstCtx.useSql = true
+        tst.entityCacheSize = 10000
+        def("entity data { value: integer; name; }")
+        insert("c0.data", "value,name", "10,123,'Bob'")
+
+        chkSqlCtr(0)
+        chkEx("{ val e = data@{}; return (e.value, e.name, e.value); }", "(int[123],text[Bob],int[123])")
+        chkSqlCtr(2)
+        chkEntityCacheStats("hits=2 misses=1 loads=1 rows=1 fallbacks=0 saved=2")
+        chkEx("{ val e = data@{}; return (e.value, e.name, e.value).size(); }", "int[3]")
+        chkSqlCtr(2)
+        chkEntityCacheStats("hits=4 misses=2 loads=2 rows=2 fallbacks=0 saved=4")
+    }
+
+    @Test fun testAttributeReadCacheDisabled() {
+        tstCtx.useSql = true
+        def("entity data { value: integer; name; }")
+        insert("c0.data", "value,name", "10,123,'Bob'")
+
+        chkSqlCtr(0)
+        chkEx("{ val e = data@{}; return (e.value, e.name, e.value); }", "(int[123],text[Bob],int[123])")
+        chkSqlCtr(4)
+        chkEntityCacheStats("hits=0 misses=0 loads=0 rows=0 fallbacks=0 saved=0")
+    }
+
+    @Test fun testAttributeReadCachePrefetch() {
+        tstCtx.useSql = true
+        tst.entityCacheSize = 10000
+        def("entity data { value: integer; }")
+        insert("c0.data", "value", "10,1", "11,2", "12,3", "13,4")
+
+        chkSqlCtr(0)
+        chkEx("{ var s = 0; for (e in data @* {}) s += e.value; return s; }", "int[10]")
+        chkSql(
+            """SELECT A00."rowid" FROM "c0.data" A00 ORDER BY A00."rowid"""",
+            """SELECT A00."rowid", A00."value" FROM "c0.data" A00 WHERE A00."rowid" = ANY(?)""",
+        )
+        chkEntityCacheStats("hits=3 misses=1 loads=1 rows=4 fallbacks=0 saved=3")
+    }
+
+    @Test fun testAttributeReadCacheUpdateDelete() {
+        tst.entityCacheSize = 10000
+        def("entity data { mutable value: integer; }")
+        insert("c0.data", "value", "10,123")
+
+        chkOp("val e = data@{}; print(e.value); update e (value = 456); print(e.value); e.value = 789; print(e.value);")
+        chkOut("123", "456", "789")
+
+        chkOp("val e = data@{}; print(e.value); delete e; print(e.value);", "rt_err:expr_entity_attr_count:0")
+        chkOut("789")
+    }
+
+    private fun chkEntityCacheStats(expected: String) {
+        assertEquals(expected, tst.entityCacheCounters.stats().toString())
+    }
+
     @Test fun testToStructSql() {
         tstCtx.useSql = true
         def("entity data { value: integer; }")
@@ -572,7 +675,7 @@ class EntityTest: BaseRellTest(false) {
         chkSql()
         chkEx("{ val e = data@{}; return e.to_struct(); }", "struct<data>[value=int[123]]")
         chkSql(
-            """SELECT A00."rowid" FROM "c0.data" A00""",
+            """SELECT A00."rowid" FROM "c0.data" A00 LIMIT ?""",
             """SELECT A00."value" FROM "c0.data" A00 WHERE A00."rowid" = ?""",
         )
     }
@@ -355,4 +355,19 @@ class ObjectTest: BaseRellTest() {
         chk("state.to_struct()", "struct<state>[value=int[123]]")
         chkSql("""SELECT A00."value" FROM "c0.state" A00""")
     }
+
+    @Test fun testAttributeReadCache() {
+        tstCtx.useSql = true
+        def("object state { mutable x: integer = 123; mutable y: text = 'Hello'; }")
+        chkSql()
+        chk("(state.x, state.y, state.to_struct())", "(int[123],text[Hello],struct<state>[x=int[123],y=text[Hello]])")
+        chkSql("""SELECT A00."x", A00."y" FROM "c0.state" A00""")
+    }
+
+    @Test fun testAttributeWriteThrough() {
+        def("object state { mutable x: integer = 123; mutable y: text = 'Hello'; }")
+        chkOp("print(state.x); state.x += 5; print(state.x); update state (x = .x * 2, y = 'Bye'); print((state.x, state.y));")
+        chkOut("123", "128", "(256,Bye)")
+        chkData("state(0,256,Bye)")
+    }
 }
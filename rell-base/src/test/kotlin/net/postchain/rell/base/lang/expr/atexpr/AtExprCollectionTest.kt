@@ -456,6 +456,27 @@ class AtExprCollectionTest: BaseRellTest(false) {
         chk("[1,2,3,4,5] @*{} offset 3 limit 3", "[4, 5]")
     }
 
+    @Test fun testLimitOffsetSort() {
+        tst.strictToString = false
+
+        chk("[5,3,1,4,2,3] @*{} ( @sort $ ) limit 3", "[1, 2, 3]")
+        chk("[5,3,1,4,2,3] @*{} ( @sort_desc $ ) limit 3", "[5, 4, 3]")
+        chk("[5,3,1,4,2,3] @*{} ( @sort $ ) offset 2 limit 2", "[3, 3]")
+        chk("[5,3,1,4,2,3] @*{} ( @sort $ ) offset 5 limit 3", "[5]")
+        chk("[5,3,1,4,2,3] @*{} ( @sort $ ) offset 6 limit 3", "[]")
+        chk("[5,3,1,4,2,3] @*{} ( @sort $ ) limit 10", "[1, 2, 3, 3, 4, 5]")
+        chk("[5,3,1,4,2,3] @*{} ( @sort $ ) offset 4", "[4, 5]")
+        chk("[5,3,1,4,2,3] @{} ( @sort $ ) limit 1", "1")
+        chk("[5,3,1,4,2,3] @*{ $ > 2 } ( @sort_desc $ ) limit 2", "[5, 4]")
+
+        // Rows with equal sort keys keep the order of the source collection.
+        val items = "[(k=1,v='a'),(k=0,v='b'),(k=1,v='c'),(k=0,v='d'),(k=1,v='e'),(k=0,v='f')]"
+        chk("$items @*{} ( @omit @sort .k, .v ) limit 4", "[b, d, f, a]")
+        chk("$items @*{} ( @omit @sort .k, .v ) offset 3 limit 2", "[a, c]")
+        chk("$items @*{} ( @omit @sort_desc .k, .v ) limit 2", "[a, c]")
+        chk("$items @*{} ( @omit @sort_desc .k, .v ) offset 2 limit 2", "[e, b]")
+    }
+
     @Test fun testNested() {
         tst.strictToString = false
         chk("(x:[1,2,3]) @* {} ( (y:[4,5,6]) @* {} ( x, y ) )", "[[(1,4), (1,5), (1,6)], [(2,4), (2,5), (2,6)], [(3,4), (3,5), (3,6)]]")
@@ -388,6 +388,31 @@ class AtExprInTest: BaseRellTest() {
         chk("data @? { .i not in [123] }", "null")
     }
 
+    @Test fun testInCollectionArrayTypes() {
+        def("enum color { red, green, blue }")
+        def("entity data { b: boolean; t: text; d: decimal; bi: big_integer; ba: byte_array; c: color; j: json; }")
+        insert("c0.data", "b,t,d,bi,ba,c,j", "200,TRUE,'Hello',45.67,12345678901234567890,E'\\\\xBEEF',1,'{}'")
+
+        chk("data @? { .ba in [x'dead', x'beef'] }", "data[200]")
+        chk("data @? { .ba in [x'dead', x'0123'] }", "null")
+        chk("data @? { .ba not in [x'dead', x'beef'] }", "null")
+        chk("data @? { .d in [1.5, 45.67] }", "data[200]")
+        chk("data @? { .d in [1.5, 45.6] }", "null")
+        chk("data @? { .d not in [1.5] }", "data[200]")
+        chk("data @? { .bi in [1L, 12345678901234567890L] }", "data[200]")
+        chk("data @? { .bi in [1L, 12345678901234567891L] }", "null")
+        chk("data @? { .bi not in set([12345678901234567890L]) }", "null")
+        chk("data @? { .b in [false, true] }", "data[200]")
+        chk("data @? { .b in set([false]) }", "null")
+        chk("data @? { .b not in [false] }", "data[200]")
+        chk("data @? { .c in [color.red, color.green] }", "data[200]")
+        chk("data @? { .c in [color.red, color.blue] }", "null")
+        chk("data @? { .c not in color.values() }", "null")
+
+        chk("data @? { .j in [json('{}')] }", "ct_err:expr_nosql:json")
+        chk("data @? { .t in ['Bye', null] }", "ct_err:expr_nosql:text?")
+    }
+
     @Test fun testInCollectionOpposite() {
         initData()
 
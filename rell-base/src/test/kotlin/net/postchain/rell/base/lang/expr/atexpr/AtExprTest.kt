@@ -470,29 +470,147 @@ class AtExprTest: BaseRellTest() {
     @Test fun testCardinalityOrderBySql() {
         chkSql()
 
-        chkCardOrderSql("company @ {}", "rt_err:at:wrong_count:5", """SELECT A00."rowid" FROM "c0.company" A00""")
-        chkCardOrderSql("company @ { .name == 'Apple' }", "company[200]",
-            """SELECT A00."rowid" FROM "c0.company" A00 WHERE A00."name" = ?""")
-        chkCardOrderSql("company @ {} limit 1", "company[100]",
-            """SELECT A00."rowid" FROM "c0.company" A00 ORDER BY A00."rowid" LIMIT ?""")
-        chkCardOrderSql("company @ {} offset 4", "company[500]",
-            """SELECT A00."rowid" FROM "c0.company" A00 ORDER BY A00."rowid" OFFSET ?""")
-        chkCardOrderSql("company @? {}", "rt_err:at:wrong_count:5", """SELECT A00."rowid" FROM "c0.company" A00""")
-        chkCardOrderSql("company @? { .name == 'Apple' }", "company[200]",
-            """SELECT A00."rowid" FROM "c0.company" A00 WHERE A00."name" = ?""")
-        chkCardOrderSql("company @? {} limit 1", "company[100]",
-            """SELECT A00."rowid" FROM "c0.company" A00 ORDER BY A00."rowid" LIMIT ?""")
-        chkCardOrderSql("company @? {} offset 4", "company[500]",
-            """SELECT A00."rowid" FROM "c0.company" A00 ORDER BY A00."rowid" OFFSET ?""")
+        val base = """SELECT A00."rowid" FROM "c0.company" A00"""
+        val order = """ORDER BY A00."rowid""""
+        val count = """SELECT COUNT(*) FROM ($base) "R""""
+
+        chkCardOrderSql("company @ {}", "rt_err:at:wrong_count:5", "$base LIMIT ?", count)
+        chkCardOrderSql("company @ { .name == 'Apple' }", "company[200]", """$base WHERE A00."name" = ? LIMIT ?""")
+        chkCardOrderSql("company @ {} limit 1", "company[100]", "$base $order LIMIT ?")
+        chkCardOrderSql("company @ {} offset 4", "company[500]", "$base $order LIMIT ? OFFSET ?")
+        chkCardOrderSql("company @? {}", "rt_err:at:wrong_count:5", "$base LIMIT ?", count)
+        chkCardOrderSql("company @? { .name == 'Apple' }", "company[200]", """$base WHERE A00."name" = ? LIMIT ?""")
+        chkCardOrderSql("company @? {} limit 1", "company[100]", "$base $order LIMIT ?")
+        chkCardOrderSql("company @? {} offset 4", "company[500]", "$base $order LIMIT ? OFFSET ?")
 
         val all = "list<company>[company[100],company[200],company[300],company[400],company[500]]"
-        chkCardOrderSql("company @* {}", all, """SELECT A00."rowid" FROM "c0.company" A00 ORDER BY A00."rowid"""")
-        chkCardOrderSql("company @+ {}", all, """SELECT A00."rowid" FROM "c0.company" A00 ORDER BY A00."rowid"""")
+        chkCardOrderSql("company @* {}", all, "$base $order")
+        chkCardOrderSql("company @+ {}", all, "$base $order")
     }
 
-    private fun chkCardOrderSql(expr: String, result: String, sql: String) {
+    @Test fun testCardinalityLimitPushdown() {
+        val base = """SELECT A00."rowid" FROM "c0.company" A00"""
+        val order = """ORDER BY A00."rowid""""
+        chkSql()
+
+        chk("company @? { .name == 'Nokia' }", "null")
+        chkSql("""$base WHERE A00."name" = ? LIMIT ?""")
+        chk("company @ { .name == 'Nokia' }", "rt_err:at:wrong_count:0")
+        chkSql("""$base WHERE A00."name" = ? LIMIT ?""")
+
+        chk("company @ { .name < 'B' }", "rt_err:at:wrong_count:2")
+        chkSql("""$base WHERE A00."name" < ? LIMIT ?""", """SELECT COUNT(*) FROM ($base WHERE A00."name" < ?) "R"""")
+
+        chk("company @ {} limit 3", "rt_err:at:wrong_count:3")
+        chkSql("$base $order LIMIT ?", """SELECT COUNT(*) FROM ($base $order LIMIT ?) "R"""")
+        chk("company @? {} offset 3", "rt_err:at:wrong_count:2")
+        chkSql("$base $order LIMIT ? OFFSET ?", """SELECT COUNT(*) FROM ($base $order OFFSET ?) "R"""")
+        chk("company @ {} limit 2", "rt_err:at:wrong_count:2")
+        chkSql("$base $order LIMIT ?", """SELECT COUNT(*) FROM ($base $order LIMIT ?) "R"""")
+
+        chk("company @ {} ( @sum 1 )", "int[5]")
+        chk("company @ {} ( @group .name )", "rt_err:at:wrong_count:5")
+    }
+
+    @Test fun testUnordered() {
+        val base = """SELECT A00."rowid" FROM "c0.company" A00"""
+        chkSql()
+
+        chk("(company @* {} @unordered).size()", "int[5]")
+        chkSql(base)
+        chk("(company @* { .name < 'B' } @unordered).size()", "int[2]")
+        chkSql("""$base WHERE A00."name" < ?""")
+        chk("company @ { .name == 'Apple' } @unordered", "company[200]")
+        chkSql("""$base WHERE A00."name" = ? LIMIT ?""")
+        chk("exists(company @* { .name == 'Apple' } @unordered)", "boolean[true]")
+        chkSql("""$base WHERE A00."name" = ?""")
+
+        chk("company @* {} ( @sort_desc .name ) @unordered",
+            "list<text>[text[Microsoft],text[Google],text[Facebook],text[Apple],text[Amazon]]")
+        chkSql("""SELECT A00."name" FROM "c0.company" A00 ORDER BY A00."name" DESC""")
+        chk("(company @* {} ( @group .name ) @unordered).size()", "int[5]")
+        chkSql("""SELECT A00."name" FROM "c0.company" A00 GROUP BY A00."name"""")
+
+        chk("company @* {} @foo", "ct_err:modifier:invalid:ann:foo")
+        chk("[1, 2, 3] @* {} @unordered", "ct_err:at:unordered:col")
+    }
+
+    @Test fun testUnorderedLimitOffset() {
+        chk("company @* {} @unordered limit 3", "ct_err:at:unordered:limit")
+        chk("company @* {} @unordered offset 1", "ct_err:at:unordered:limit")
+        chk("company @* {} @unordered offset 1 limit 3", "ct_err:at:unordered:limit")
+        chk("company @* {} ( @sort .name ) @unordered limit 2", "ct_err:at:unordered:limit")
+        chk("company @* {} ( @sort_desc .name ) @unordered offset 1", "ct_err:at:unordered:limit")
+        chk("company @* {} ( @group .name ) @unordered limit 2", "ct_err:at:unordered:limit")
+        chk("exists(company @* {} @unordered limit 1)", "ct_err:at:unordered:limit")
+    }
+
+    @Test fun testUnorderedDefinition() {
+        chkCompile("query q() = company @* {} @unordered;", "OK")
+        chkCompile("function f() = company @* {} @unordered;", "ct_err:at:unordered:def")
+        chkCompile("function f() = exists(company @* {} @unordered);", "ct_err:at:unordered:def")
+        chkOp("for (c in company @* {} @unordered) { print(c); }", "ct_err:at:unordered:def")
+        chkOp("val n = (company @* {} @unordered).size();", "ct_err:at:unordered:def")
+        chkOp("val s = company @* {} ( @sort .name ) @unordered limit 1;",
+            "ct_err:[at:unordered:def][at:unordered:limit]")
+    }
+
+    @Test fun testPage() {
+        val base = """SELECT A00."name", A00."rowid" FROM "c0.company" A00"""
+        val order = """ORDER BY A00."rowid" LIMIT ?"""
+        val expr = "company @* {} ( .name ) @page limit 2"
+        chkSql()
+
+        chk(expr, "(items=list<text>[text[Facebook],text[Apple]],next=gtv[[200]])")
+        chkSql("$base $order")
+        chk("$expr offset null", "(items=list<text>[text[Facebook],text[Apple]],next=gtv[[200]])")
+        chk("$expr offset gtv.from_json('null')", "(items=list<text>[text[Facebook],text[Apple]],next=gtv[[200]])")
+        chk("$expr offset gtv.from_json('[200]')", "(items=list<text>[text[Amazon],text[Microsoft]],next=gtv[[400]])")
+        chkSql("""$base WHERE A00."rowid" > ? $order""")
+        chk("$expr offset gtv.from_json('[400]')", "(items=list<text>[text[Google]],next=null)")
+        chk("$expr offset gtv.from_json('[500]')", "(items=list<text>[],next=null)")
+
+        chk("company @* {} @page limit 5", "(items=list<company>[company[100],company[200],company[300],company[400],company[500]],next=null)")
+        chk("company @* {} @page limit 4 offset gtv.from_json('[100]')",
+            "(items=list<company>[company[200],company[300],company[400],company[500]],next=null)")
+        chk("company @* {} @page offset gtv.from_json('[300]')", "(items=list<company>[company[400],company[500]],next=null)")
+        chk("company @* { .name < 'G' } @page limit 1 offset gtv.from_json('[200]')",
+            "(items=list<company>[company[300]],next=gtv[[300]])")
+        chk("company @* {} ( .name, @omit .rowid ) @page limit 1 offset gtv.from_json('[100]')",
+            "(items=list<text>[text[Apple]],next=gtv[[200]])")
+
+        chk("company @* {} @page limit 0", "rt_err:expr:at:limit:page:0")
+        chk("company @* {} @page limit -1", "rt_err:expr:at:limit:negative:-1")
+        chk("company @* {} @page limit 1 offset gtv.from_json('[1,2]')", "rt_err:at:page:bad_token")
+        chk("company @* {} @page limit 1 offset gtv.from_json('[-1]')", "rt_err:at:page:bad_token")
+        chk("company @* {} @page limit 1 offset gtv.from_json('{}')", "rt_err:at:page:bad_token")
+
+        chk("company @* {} @page limit 1 offset 1", "ct_err:expr_at_offset_type:[gtv?]:[integer]")
+        chk("company @ {} @page limit 1", "ct_err:at:page:cardinality:ONE")
+        chk("company @+ {} @page limit 1", "ct_err:at:page:cardinality:ONE_MANY")
+        chk("company @* {} @page @unordered limit 1", "ct_err:at:page:unordered")
+        chk("company @* {} ( @sort .name ) @page limit 1", "ct_err:at:page:sort")
+        chk("company @* {} ( @group .name ) @page limit 1", "ct_err:at:page:aggregate")
+        chk("user @* {} ( company @* { .name == 'Apple' } @page limit 1 )", "ct_err:at:page:nested")
+        chk("[1, 2, 3] @* {} @page", "ct_err:at:page:col")
+    }
+
+    @Test fun testPageJoin() {
+        val expr = "(u: user, c: company) @* { u.company == c } ( u.lastName ) @page limit 3"
+        chk(expr, "(items=list<text>[text[Zuckerberg],text[Jobs],text[Wozniak]],next=gtv[[21,200]])")
+        chk("$expr offset gtv.from_json('[21,200]')", "(items=list<text>[text[Bezos],text[Gates],text[Allen]],next=gtv[[41,400]])")
+        chk("$expr offset gtv.from_json('[41,400]')", "(items=list<text>[text[Brin],text[Page]],next=null)")
+        chk("$expr offset gtv.from_json('[21]')", "rt_err:at:page:bad_token")
+
+        chkEx("""{
+            val p = user @* { .company.name == 'Apple' } ( .firstName, .lastName ) @page limit 1;
+            return (p.items, p.next);
+        }""", "(list<(firstName:text,lastName:text)>[(firstName=text[Steve],lastName=text[Jobs])],gtv[[20]])")
+    }
+
+    private fun chkCardOrderSql(expr: String, result: String, vararg sqls: String) {
         chk(expr, result)
-        chkSql(sql)
+        chkSql(*sqls)
     }
 
     @Test fun testEntityReferenceSqlAt() {
@@ -521,6 +639,88 @@ class AtExprTest: BaseRellTest() {
         chkSql(sql1, """SELECT A01."name" FROM "c0.user" A00 $join WHERE A00."rowid" = ?""")
     }
 
+    @Test fun testSqlTemplate() {
+        val sql = """SELECT A00."rowid" FROM "c0.company" A00 WHERE A00."name" = ?"""
+        chkSql()
+        chkEx("""{
+            val res = list<company>();
+            for (n in ['Apple', 'Google', 'Apple']) res.add(company @ { .name == n });
+            return res;
+        }""", "list<company>[company[200],company[500],company[200]]")
+        chkSql("$sql LIMIT ?", "$sql LIMIT ?", "$sql LIMIT ?")
+
+        chkEx("""{
+            val res = list<company>();
+            for (n in ['Apple', 'Google']) res.add(company @ { .name == n } limit 1);
+            return res;
+        }""", "list<company>[company[200],company[500]]")
+        chkSql("$sql ORDER BY A00.\"rowid\" LIMIT ?", "$sql ORDER BY A00.\"rowid\" LIMIT ?")
+    }
+
+    @Test fun testSqlTemplateDynamic() {
+        val sqlBase = """SELECT A00."rowid" FROM "c0.company" A00"""
+        val order = """ORDER BY A00."rowid""""
+        chkSql()
+
+        chkEx("""{
+            val res = list<integer>();
+            for (ns in [['Apple'], ['Apple', 'Google']]) res.add((company @* { .name in ns }).size());
+            return res;
+        }""", "list<integer>[int[1],int[2]]")
+        chkSql("""$sqlBase WHERE A00."name" = ANY(?) $order""", """$sqlBase WHERE A00."name" = ANY(?) $order""")
+
+        chkEx("""{
+            val res = list<integer>();
+            for (f in [true, false]) res.add((company @* { f or .name == 'Apple' }).size());
+            return res;
+        }""", "list<integer>[int[5],int[1]]")
+        chkSql("""$sqlBase WHERE ? $order""", """$sqlBase WHERE A00."name" = ? $order""")
+    }
+
+    @Test fun testInCollectionArray() {
+        val sqlBase = """SELECT A00."rowid" FROM "c0.company" A00"""
+        val order = """ORDER BY A00."rowid""""
+        chkSql()
+
+        chk("company @* { .name in ['Apple', 'Google', 'Nokia'] }", "list<company>[company[200],company[500]]")
+        chkSql("""$sqlBase WHERE A00."name" = ANY(?) $order""")
+        chk("company @* { .name not in set(['Apple', 'Google']) }",
+            "list<company>[company[100],company[300],company[400]]")
+        chkSql("""$sqlBase WHERE A00."name" <> ALL(?) $order""")
+
+        chkEx("{ val cs = company @* { .name < 'B' }; return user @* { .company in cs } (.lastName); }",
+            "list<text>[text[Jobs],text[Wozniak],text[Bezos]]")
+        chk("company @* { .name in list<text>() }", "list<company>[]")
+    }
+
+    @Test fun testForLoopStreaming() {
+        tst.sqlFetchSize = 2
+
+        val names = "list<text>[text[Facebook],text[Apple],text[Amazon],text[Microsoft],text[Google]]"
+        chkEx("{ val res = list<text>(); for (n in company @* {} (.name)) res.add(n); return res; }", names)
+        chkEx("{ val res = list<text>(); for (n in company @* {} (.name)) { if (n == 'Amazon') break; res.add(n); } return res; }",
+            "list<text>[text[Facebook],text[Apple]]")
+        chkEx("{ for (n in company @* {} (.name)) { if (n == 'Microsoft') return n; } return ''; }", "text[Microsoft]")
+        chkEx("{ var k = 0; for (c in company @* {}) k += (user @* { .company == c }).size(); return k; }", "int[8]")
+        chkEx("{ var k = 0; for (c in company @+ { .name == 'Nokia' }) k += 1; return k; }", "rt_err:at:wrong_count:0")
+
+        tst.sqlFetchSize = 0
+        chkEx("{ val res = list<text>(); for (n in company @* {} (.name)) res.add(n); return res; }", names)
+    }
+
+    @Test fun testColAtStreaming() {
+        for (fetchSize in listOf(2, 0)) {
+            tst.sqlFetchSize = fetchSize
+            chk("(company @* {} (.name)) @ {} ( @sum $.size() )", "int[34]")
+            chk("(company @* {} (.name)) @ {} ( @min $ )", "text[Amazon]")
+            chk("(company @* {} (.name)) @* { $.size() > 7 }", "list<text>[text[Facebook],text[Microsoft]]")
+            chk("(company @* {} (.name)) @* {} limit 3", "list<text>[text[Facebook],text[Apple],text[Amazon]]")
+            chk("(company @* {} (.name)) @* {} offset 3", "list<text>[text[Microsoft],text[Google]]")
+            chk("(company @* {} (.name)) @* {} (@sort $) limit 2", "list<text>[text[Amazon],text[Apple]]")
+            chk("(company @* { .name == 'Nokia' } (.name)) @* {}", "list<text>[]")
+        }
+    }
+
     private object Ins {
         fun company(id: Int, name: String): String = SqlTestUtils.mkins("c0.company", "name", "$id, '$name'")
 
@@ -43,6 +43,24 @@ class CreateTest: BaseRellTest() {
         chkDataNew("person(5,Mike,1,Grand St,7,250)")
     }
 
+    @Test fun testRowidBlockReservation() {
+        tst.rowidBlockSize = 10
+
+        chkOp("create city('A'); create city('B');")
+        chkDataNew("city(1,A)", "city(2,B)")
+
+        chkOp("for (n in ['C', 'D', 'E']) create city(n);")
+        chkDataNew("city(3,C)", "city(4,D)", "city(5,E)")
+
+        tst.rowidBlockSize = 2
+        chkOp("for (n in ['F', 'G', 'H', 'I', 'J']) create city(n);")
+        chkDataNew("city(6,F)", "city(7,G)", "city(8,H)", "city(9,I)", "city(10,J)")
+
+        tst.rowidBlockSize = 0
+        chkOp("create city('K');")
+        chkDataNew("city(11,K)")
+    }
+
     @Test fun testDefaultValues() {
         def("entity person { name: text; year: integer; score: integer = 777; status: text = 'Unknown'; }")
         chkData()
@@ -293,4 +311,36 @@ class CreateTest: BaseRellTest() {
         chk("2499*2500/2", "int[$expSum]")
         chk("data @{} ( @sum 1, @sum .x )", "(int[2500],int[$expSum])")
     }
+
+    @Test fun testBulkInsert() {
+        def("enum color { red, green }")
+        def("entity data { x: integer; t: text; b: byte_array; d: decimal; f: boolean; c: color; city; }")
+        tst.sqlBulkInsertThreshold = 2
+
+        chkOp("create city('Rome');")
+        chkDataNew("city(1,Rome)")
+
+        chkOp("""
+            val c = city @ {};
+            val recs = [
+                struct<data>(x = 1, t = 'a\tb\\c', b = x'01ff', d = 1.5, f = true, c = color.green, city = c),
+                struct<data>(x = -2, t = 'line1\nline2', b = x'', d = -0.25, f = false, c = color.red, city = c)
+            ];
+            print(_strict_str(create data(recs)));
+        """)
+        chkOut("list<data>[data[2],data[3]]")
+
+        chk("data @* {} ( _=.x )", "list<integer>[int[1],int[-2]]")
+        chk("""data @* {} ( _=.t ) == ['a\tb\\c', 'line1\nline2']""", "boolean[true]")
+        chk("data @* {} ( _=.b )", "list<byte_array>[byte_array[01ff],byte_array[]]")
+        chk("data @* {} ( _=.d )", "list<decimal>[dec[1.5],dec[-0.25]]")
+        chk("data @* {} ( _=.f )", "list<boolean>[boolean[true],boolean[false]]")
+        chk("data @* {} ( _=.c.name )", "list<text>[text[green],text[red]]")
+        chk("data @* {} ( _=.city.name )", "list<text>[text[Rome],text[Rome]]")
+
+        chkOp("val c = create data([struct<data>(x = 3, t = '', b = x'', d = 0.0, f = true, c = color.red, city @ {})]);")
+        chkOp("create city(['Oslo', 'Bern', 'Riga'] @* {} (struct<city>($)));")
+        chk("city @* {} ( _=city, _=.name )",
+            "list<(city,text)>[(city[1],text[Rome]),(city[5],text[Oslo]),(city[6],text[Bern]),(city[7],text[Riga])]")
+    }
 }
@@ -0,0 +1,87 @@
+/*
+ * Copyright (C) 2023 ChromaWay AB. See LICENSE for license information.
+ */
+
+package net.postchain.rell.base.lang.misc
+
+import net.postchain.rell.base.compiler.base.core.C_CompilerModuleSelection
+import net.postchain.rell.base.compiler.base.core.C_CompilerOptions
+import net.postchain.rell.base.compiler.base.utils.C_SourceDir
+import net.postchain.rell.base.model.R_ModuleName
+import net.postchain.rell.base.testutils.BaseRellTest
+import net.postchain.rell.base.testutils.RellTestUtils
+import org.junit.Test
+import kotlin.test.assertEquals
+
+/** Results and errors must be the same with and without constant folding. */
+class ConstantFoldingTest: BaseRellTest(false) {
+    private val sha256Empty = "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
+
+    @Test fun testPureCalls() {
+        chkBoth("sha256(x'')", "byte_array[$sha256Empty]")
+        chkBoth("crypto.sha256(x'').size()", "int[32]")
+        chkBoth("'Hello'.size() * 2 + 1", "int[11]")
+        chkBoth("'Hello World'.sub(6).upper_case()", "text[WORLD]")
+        chkBoth("(1, 'Hello'.size())", "(int[1],int[5])")
+    }
+
+    @Test fun testGlobalConstants() {
+        def("val C = 'Hello';")
+        def("val D = C.size() + 1;")
+        chkBoth("C.size()", "int[5]")
+        chkBoth("D * 2", "int[12]")
+    }
+
+    @Test fun testErrors() {
+        chkBoth("'Hello World'.sub(12)", "rt_err:fn:text.sub:range:11:12:11")
+        chkBoth("1 / 0", "rt_err:expr:/:div0:1")
+        chkBoth("if (1 > 0) 1 else 1 / 0", "int[1]")
+    }
+
+    @Test fun testMutable() {
+        def("function f() = [1, 2, 3];")
+        def("function g(): integer { val l = f(); l.add(4); return l.size() + f().size(); }")
+        def("function h() { val l = [1, 2, 3]; l.add(4); return l; }")
+        chkBoth("g()", "int[7]")
+        chkBoth("h()", "list<integer>[int[1],int[2],int[3],int[4]]")
+    }
+
+    @Test fun testReport() {
+        val code = """
+            function f() = sha256(x'');
+            function g(x: integer) = x + 'Hello'.size() * 2;
+            function h() = 'Hello'.sub(12);
+            function k() = [1, 2, 3];
+        """
+
+        chkReport(code, C_CompilerOptions.builder().constantFolding(true).build(), "byte_array[$sha256Empty]", "int[10]")
+        chkReport(code, C_CompilerOptions.DEFAULT)
+    }
+
+    @Test fun testBigValues() {
+        val code = """
+            function f() = 'ab'.repeat(100).size();
+            function g() = 'ab'.repeat(100000);
+            function h() = 'ab'.repeat(100000).size();
+            function k() = x'00'.repeat(1000000).size() + 1;
+        """
+
+        chkReport(code, C_CompilerOptions.builder().constantFolding(true).build(), "int[200]")
+        chkBoth("'ab'.repeat(100000).size()", "int[200000]")
+    }
+
+    private fun chkReport(code: String, options: C_CompilerOptions, vararg expected: String) {
+        val sourceDir = C_SourceDir.mapDirOf(RellTestUtils.MAIN_FILE to code)
+        val modSel = C_CompilerModuleSelection(listOf(R_ModuleName.EMPTY))
+        val res = RellTestUtils.compileApp(sourceDir, modSel, options)
+        assertEquals(listOf(), res.errors)
+        assertEquals(expected.toList(), res.foldedConstants.map { it.value })
+    }
+
+    private fun chkBoth(code: String, expected: String) {
+        tst.constantFolding = false
+        chk(code, expected)
+        tst.constantFolding = true
+        chk(code, expected)
+    }
+}
@@ -6,10 +6,14 @@ package net.postchain.rell.base.lang.misc
 
 import net.postchain.gtv.Gtv
 import net.postchain.gtv.GtvByteArray
+import net.postchain.gtv.GtvFactory.gtv
+import net.postchain.gtv.GtvNull
 import net.postchain.gtv.GtvString
 import net.postchain.rell.base.testutils.BaseRellTest
+import net.postchain.rell.base.testutils.GtvTestUtils
 import net.postchain.rell.base.utils.CommonUtils
 import org.junit.Test
+import java.math.BigInteger
 import kotlin.test.assertEquals
 
 class GtvRtConversionTest: BaseRellTest(useSql = false, gtv = true) {
@@ -63,6 +67,31 @@ class GtvRtConversionTest: BaseRellTest(useSql = false, gtv = true) {
                 """{"left":{"left":null,"right":null,"v":123},"right":{"left":null,"right":null,"v":789},"v":456}""")
     }
 
+    @Test fun testQueryResultNested() {
+        def("enum color { RED, GREEN }")
+        def("struct rec { c: color; d: decimal; b: big_integer; n: integer?; }")
+
+        chkQueryRes("= ['A':[1,2],'B':list<integer>()];", """{"A":[1,2],"B":[]}""")
+        chkQueryRes("= [1:['x':[true]],2:map<text,list<boolean>>()];", """[[1,{"x":[1]}],[2,{}]]""")
+        chkQueryRes("= [[1,2],[3],list<integer>()];", "[[1,2],[3],[]]")
+        chkQueryRes("= [set(['a']),set<text>()];", """[["a"],[]]""")
+        chkQueryRes("{ val l: list<integer?> = [1, null, 3]; return l; }", "[1,null,3]")
+        chkQueryRes("{ val m: map<text, integer?> = ['A':1, 'B':null]; return m; }", """{"A":1,"B":null}""")
+        chkQueryRes("= color.GREEN;", "\"GREEN\"")
+        chkQueryRes("= [color.RED:1];", """[["RED",1]]""")
+        chkQueryRes("= [1.5,-0.001];", """["1.5","-0.001"]""")
+
+        val big = BigInteger("-79228162514264337593543950335")
+        chkQueryRes("= 123L;", GtvTestUtils.encodeGtvStr(gtv(BigInteger.valueOf(123))))
+        chkQueryRes("= [-79228162514264337593543950335L];", GtvTestUtils.encodeGtvStr(gtv(gtv(big))))
+
+        val rec1 = gtv(mapOf("b" to gtv(big), "c" to gtv("RED"), "d" to gtv("12.5"), "n" to GtvNull))
+        val rec2 = gtv(mapOf("b" to gtv(BigInteger.ZERO), "c" to gtv("GREEN"), "d" to gtv("0"), "n" to gtv(7)))
+        chkQueryRes("= rec(c = color.RED, d = 12.5, b = -79228162514264337593543950335L, n = null);",
+            GtvTestUtils.encodeGtvStr(rec1))
+        chkQueryRes("= [rec(c = color.GREEN, d = 0.0, b = 0L, n = 7)];", GtvTestUtils.encodeGtvStr(gtv(rec2)))
+    }
+
     @Test fun testArgSimple() {
         tst.gtvResult = false
 
@@ -0,0 +1,116 @@
+/*
+ * Copyright (C) 2023 ChromaWay AB. See LICENSE for license information.
+ */
+
+package net.postchain.rell.base.lang.misc
+
+import net.postchain.rell.base.compiler.ast.S_Node
+import net.postchain.rell.base.compiler.base.core.C_CompilationResult
+import net.postchain.rell.base.compiler.base.core.C_CompilerModuleSelection
+import net.postchain.rell.base.compiler.base.core.C_CompilerOptions
+import net.postchain.rell.base.compiler.base.utils.C_ParseCache
+import net.postchain.rell.base.compiler.base.utils.C_SourceDir
+import net.postchain.rell.base.model.R_ModuleName
+import net.postchain.rell.base.testutils.RellTestUtils
+import org.junit.Test
+import java.util.Collections
+import kotlin.test.assertEquals
+import kotlin.test.assertTrue
+
+class ParallelParsingTest {
+    @Test fun testNoErrors() {
+        val files = mutableMapOf<String, String>()
+        files["main.rell"] = "import a; import b.c; function main() = a.f() + b.c.g();"
+        files["a.rell"] = "module; function f() = 123;"
+        files["b/c/module.rell"] = "function g() = 456;"
+        files["b/c/part.rell"] = "function h() = 789;"
+        val res = chkSame(files, null)
+        assertEquals(listOf(), res)
+    }
+
+    @Test fun testErrors() {
+        val files = mutableMapOf<String, String>()
+        files["main.rell"] = "import a; import b; function main() = a.f() + unknown_1;"
+        files["a.rell"] = "module; function f() = 123 +;"
+        files["b/one.rell"] = "function x() = unknown_2;"
+        files["b/two.rell"] = "function y() = bob$"
+        files["b/three.rell"] = "function z() = unknown_3;"
+        files["c/d.rell"] = "module; function w( = 0;"
+
+        val res = chkSame(files, null)
+        assertTrue(res.size >= 5, res.toString())
+        chkSame(files, listOf(R_ModuleName.EMPTY))
+        chkSame(files, listOf(R_ModuleName.of("b")))
+    }
+
+    @Test fun testManyFiles() {
+        val files = mutableMapOf<String, String>()
+        for (i in 0 until 50) {
+            val body = if (i % 7 == 3) "unknown_$i" else "$i"
+            files["dir_${i % 5}/sub_${i % 3}/file_$i.rell"] = "function f_$i() = $body;"
+            files["mod_$i.rell"] = if (i % 11 == 5) "module; function g( = 0;" else "module; function g() = $i;"
+        }
+        files["main.rell"] = "import mod_1; function main() = mod_1.g();"
+
+        val res = chkSame(files, null)
+        assertTrue(res.isNotEmpty())
+        chkSame(files, listOf(R_ModuleName.EMPTY))
+    }
+
+    @Test fun testAttachmentProvider() {
+        val files = mutableMapOf<String, String>()
+        for (i in 0 until 20) {
+            files["dir_${i % 4}/file_$i.rell"] = "function f_$i() = $i;"
+        }
+        files["main.rell"] = "import dir_1; function main() = dir_1.f_1();"
+
+        val options = C_CompilerOptions.builder().parallelParsing(true).parseCache(true).build()
+        val expected = messages(compile(files, null, C_CompilerOptions.DEFAULT))
+
+        // The provider is called only on the compiler thread, and the parse cache is not used.
+        for (attachment in listOf("A", "B")) {
+            val threads = Collections.synchronizedSet(mutableSetOf<Thread>())
+            val stats0 = C_ParseCache.stats()
+            S_Node.runWithAttachmentProvider({ threads.add(Thread.currentThread()); attachment }) {
+                assertEquals(expected, messages(compile(files, null, options)))
+            }
+            assertEquals(setOf(Thread.currentThread()), threads.toSet())
+            assertEquals(stats0, C_ParseCache.stats())
+        }
+    }
+
+    /** Compiles with and without parallel parsing, and checks that messages are identical (including their order). */
+    private fun chkSame(files: Map<String, String>, modules: List<R_ModuleName>?): List<String> {
+        val seqOptions = C_CompilerOptions.DEFAULT
+        val parOptions = C_CompilerOptions.builder().parallelParsing(true).build()
+
+        val seqRes = compile(files, modules, seqOptions)
+        val parRes = compile(files, modules, parOptions)
+
+        val seqMessages = messages(seqRes)
+        assertEquals(seqMessages, messages(parRes))
+        assertEquals(seqRes.files, parRes.files)
+        assertEquals(seqRes.app?.modules?.map { it.name }, parRes.app?.modules?.map { it.name })
+
+        // Same with the parse cache, which is then used by several threads.
+        val parCacheOptions = parOptions.toBuilder().parseCache(true).build()
+        assertEquals(seqMessages, messages(compile(files, modules, parCacheOptions)))
+        assertEquals(seqMessages, messages(compile(files, modules, parCacheOptions)))
+
+        return seqMessages
+    }
+
+    private fun messages(res: C_CompilationResult): List<String> {
+        return res.messages.map { "${it.pos} ${it.type} ${it.code}" }
+    }
+
+    private fun compile(
+        files: Map<String, String>,
+        modules: List<R_ModuleName>?,
+        options: C_CompilerOptions,
+    ): C_CompilationResult {
+        val sourceDir = C_SourceDir.mapDirOf(files)
+        val modSel = C_CompilerModuleSelection(modules)
+        return RellTestUtils.compileApp(sourceDir, modSel, options)
+    }
+}
@@ -0,0 +1,137 @@
+/*
+ * Copyright (C) 2023 ChromaWay AB. See LICENSE for license information.
+ */
+
+package net.postchain.rell.base.lang.misc
+
+import net.postchain.rell.base.compiler.ast.S_Node
+import net.postchain.rell.base.compiler.ast.S_RellFile
+import net.postchain.rell.base.compiler.base.core.C_CompilationResult
+import net.postchain.rell.base.compiler.base.core.C_CompilerModuleSelection
+import net.postchain.rell.base.compiler.base.core.C_CompilerOptions
+import net.postchain.rell.base.compiler.base.utils.C_ParseCache
+import net.postchain.rell.base.compiler.base.utils.C_SourceDir
+import net.postchain.rell.base.compiler.base.utils.C_SourcePath
+import net.postchain.rell.base.compiler.base.utils.IdeSourcePathFilePath
+import net.postchain.rell.base.model.R_ModuleName
+import net.postchain.rell.base.testutils.RellTestUtils
+import net.postchain.rell.base.utils.ide.IdeFilePath
+import org.junit.Test
+import kotlin.test.assertEquals
+import kotlin.test.assertNotSame
+import kotlin.test.assertSame
+
+class ParseCacheTest {
+    private val options = C_CompilerOptions.builder().parseCache(true).build()
+
+    @Test fun testSameText() {
+        val code = "function f() = 123; // testSameText"
+        chkCompile(code, options, hits = 0, misses = 1)
+        chkCompile(code, options, hits = 1, misses = 0)
+        chkCompile(code, options, hits = 1, misses = 0)
+    }
+
+    @Test fun testChangedText() {
+        chkCompile("function f() = 123; // testChangedText", options, hits = 0, misses = 1)
+        chkCompile("function f() = 456; // testChangedText", options, hits = 0, misses = 1)
+        chkCompile("function f() = 123; // testChangedText", options, hits = 1, misses = 0)
+    }
+
+    @Test fun testMultipleFiles() {
+        val files = mapOf(
+            "main.rell" to "import lib; function f() = lib.g(); // testMultipleFiles",
+            "lib.rell" to "module; function g() = 123; // testMultipleFiles",
+        )
+        chkCompile(files, options, hits = 0, misses = 2)
+        chkCompile(files, options, hits = 2, misses = 0)
+        val files2 = files + ("lib.rell" to "module; function g() = 456; // testMultipleFiles")
+        chkCompile(files2, options, hits = 1, misses = 1)
+    }
+
+    @Test fun testSyntaxError() {
+        val code = "// testSyntaxError\nbob$"
+        val expected = "main.rell(2:4) syntax"
+        chkCompile(code, options, hits = 0, misses = 1, expected)
+        chkCompile(code, options, hits = 0, misses = 1, expected)
+        chkCompile(code, C_CompilerOptions.DEFAULT, hits = 0, misses = 0, expected)
+    }
+
+    @Test fun testDisabled() {
+        val code = "function f() = 123; // testDisabled"
+        chkCompile(code, C_CompilerOptions.DEFAULT, hits = 0, misses = 0)
+        chkCompile(code, C_CompilerOptions.DEFAULT, hits = 0, misses = 0)
+    }
+
+    @Test fun testPath() {
+        val text = "function f() = 123; // testPath"
+        val path1 = C_SourcePath.parse("a.rell")
+        val path2 = C_SourcePath.parse("b.rell")
+        val ast1 = C_ParseCache.parse(path1, idePath(path1), text)
+        assertSame(ast1, C_ParseCache.parse(path1, idePath(path1), text))
+        assertNotSame(ast1, C_ParseCache.parse(path2, idePath(path2), text))
+    }
+
+    @Test fun testAttachmentProvider() {
+        val text = "function f() = 123; // testAttachmentProvider"
+        val path = C_SourcePath.parse("a.rell")
+
+        val astA = parseWithAttachment(path, text, "A")
+        val astB = parseWithAttachment(path, text, "B")
+        assertNotSame(astA, astB)
+        assertEquals("A", astA.attachment)
+        assertEquals("B", astB.attachment)
+
+        val ast = C_ParseCache.parse(path, idePath(path), text)
+        assertEquals(null, ast.attachment)
+        assertSame(ast, C_ParseCache.parse(path, idePath(path), text))
+    }
+
+    @Test fun testAttachmentProviderCompile() {
+        val code = "function f() = 123; // testAttachmentProviderCompile"
+        chkCompile(code, options, hits = 0, misses = 1)
+        S_Node.runWithAttachmentProvider({ "A" }) {
+            chkCompile(code, options, hits = 0, misses = 0)
+        }
+        S_Node.runWithAttachmentProvider({ "B" }) {
+            chkCompile(code, options, hits = 0, misses = 0)
+        }
+        chkCompile(code, options, hits = 1, misses = 0)
+    }
+
+    private fun parseWithAttachment(path: C_SourcePath, text: String, attachment: Any): S_RellFile {
+        val stats0 = C_ParseCache.stats()
+        lateinit var ast: S_RellFile
+        S_Node.runWithAttachmentProvider({ attachment }) {
+            ast = C_ParseCache.parse(path, idePath(path), text)
+        }
+        val stats1 = C_ParseCache.stats()
+        assertEquals(stats0, stats1)
+        return ast
+    }
+
+    private fun idePath(path: C_SourcePath): IdeFilePath = IdeSourcePathFilePath(path)
+
+    private fun chkCompile(code: String, options: C_CompilerOptions, hits: Long, misses: Long, vararg errors: String) {
+        chkCompile(mapOf(RellTestUtils.MAIN_FILE to code), options, hits, misses, *errors)
+    }
+
+    private fun chkCompile(
+        files: Map<String, String>,
+        options: C_CompilerOptions,
+        hits: Long,
+        misses: Long,
+        vararg errors: String,
+    ) {
+        val stats0 = C_ParseCache.stats()
+        val res = compile(files, options)
+        val stats1 = C_ParseCache.stats()
+        assertEquals(errors.toList(), res.errors.map { "${it.pos} ${it.code}" })
+        assertEquals(hits to misses, (stats1.hits - stats0.hits) to (stats1.misses - stats0.misses))
+    }
+
+    private fun compile(files: Map<String, String>, options: C_CompilerOptions): C_CompilationResult {
+        val sourceDir = C_SourceDir.mapDirOf(files)
+        val modSel = C_CompilerModuleSelection(listOf(R_ModuleName.EMPTY))
+        return RellTestUtils.compileApp(sourceDir, modSel, options)
+    }
+}
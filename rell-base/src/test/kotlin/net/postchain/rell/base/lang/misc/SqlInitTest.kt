@@ -7,6 +7,7 @@ package net.postchain.rell.base.lang.misc
 import net.postchain.rell.base.sql.NullSqlInitProjExt
 import net.postchain.rell.base.sql.SqlInit
 import net.postchain.rell.base.sql.SqlInitLogging
+import net.postchain.rell.base.sql.SqlRowidMode
 import net.postchain.rell.base.sql.SqlUtils
 import net.postchain.rell.base.testutils.*
 import org.junit.Test
@@ -14,6 +15,7 @@ import kotlin.test.assertEquals
 
 class SqlInitTest: BaseContextTest(useSql = true) {
     private var lastDefs = ""
+    private var rowidMode = SqlRowidMode.TABLE
 
     @Test fun testNoMeta() {
         chkTables()
@@ -603,6 +605,52 @@ class SqlInitTest: BaseContextTest(useSql = true) {
         chkAll("0,user,class,false", "0,name,sys:text", "c0.user(name:text,rowid:int8)")
     }
 
+    @Test fun testExtIndexes() {
+        chkInit("entity user { name; }")
+        chkMetaIndexes("NO_TABLE")
+
+        chkInit("entity user { name; index name.lower_case(); }")
+        chkAll("0,user,class,false", "0,name,sys:text", "c0.user(name:text,rowid:int8)")
+        chkMetaIndexes("0,IDX_c0.user_X0,(LOWER(\"name\"))")
+        chkSqlIndexes("c0.user", "IDX_c0.user_X0", "PK_c0.user")
+
+        chkInit("entity user { name; index name.lower_case(); }")
+        chkMetaIndexes("0,IDX_c0.user_X0,(LOWER(\"name\"))")
+        chkSqlIndexes("c0.user", "IDX_c0.user_X0", "PK_c0.user")
+
+        chkInit("entity user { name; active: boolean = true; index name.lower_case(); index name @ { .active }; }")
+        chkMetaIndexes("0,IDX_c0.user_X0,(LOWER(\"name\"))", "0,IDX_c0.user_X1,(\"name\") WHERE \"active\"")
+        chkSqlIndexes("c0.user", "IDX_c0.user_X0", "IDX_c0.user_X1", "PK_c0.user")
+
+        chkInit("entity user { name; active: boolean = true; index name @ { .active }; }",
+                "rt_err:dbinit:index_diff:user:database:index:(LOWER(\"name\"))")
+        chkSqlIndexes("c0.user", "IDX_c0.user_X0", "IDX_c0.user_X1", "PK_c0.user")
+    }
+
+    @Test fun testExtIndexesNewEntity() {
+        val code = "entity user { name; score: integer; index score include (name) @ { .score > 0, .name != 'Bob' }; }"
+        chkInit(code)
+        chkMetaIndexes("0,IDX_c0.user_X0,(\"score\") INCLUDE (\"name\") WHERE \"score\" > 0 AND \"name\" <> 'Bob'")
+        chkSqlIndexes("c0.user", "IDX_c0.user_X0", "PK_c0.user")
+
+        execSql("""DROP INDEX "IDX_c0.user_X0";""")
+        chkSqlIndexes("c0.user", "PK_c0.user")
+
+        chkInit(code)
+        chkMetaIndexes("0,IDX_c0.user_X0,(\"score\") INCLUDE (\"name\") WHERE \"score\" > 0 AND \"name\" <> 'Bob'")
+        chkSqlIndexes("c0.user", "IDX_c0.user_X0", "PK_c0.user")
+    }
+
+    @Test fun testExtIndexesPlainIndexes() {
+        chkInit("entity user { key name; index name.upper_case(); }")
+        chkInit("entity user { key name; index name.upper_case(); index name @ { .name != '' }; }")
+        chkMetaIndexes("0,IDX_c0.user_X0,(UPPER(\"name\"))", "0,IDX_c0.user_X1,(\"name\") WHERE \"name\" <> ''")
+        chkSqlIndexes("c0.user", "IDX_c0.user_X0", "IDX_c0.user_X1", "K_c0.user_0", "PK_c0.user")
+
+        chkInit("entity user { name; index name.upper_case(); index name @ { .name != '' }; }",
+                "rt_err:dbinit:index_diff:user:database:key:name")
+    }
+
     @Test fun testDropAll() {
         RellTestContext().use { ctx ->
             val t = RellCodeTester(ctx)
@@ -651,9 +699,44 @@ class SqlInitTest: BaseContextTest(useSql = true) {
         chkFunctions(expectedFuns)
     }
 
+    @Test fun testRowidMode() {
+        chkInit("entity user { name; }")
+        chkRowidStorage("c0.rowid_gen", "")
+        chkOp("create user('Bob'); create user('Alice');", "OK")
+
+        rowidMode = SqlRowidMode.SEQUENCE
+        chkInit("entity user { name; }")
+        chkRowidStorage("", "c0.rowid_seq")
+        chkOp("create user('Carol');", "OK")
+        chkData("c0.user(1,Bob)", "c0.user(2,Alice)", "c0.user(3,Carol)")
+
+        rowidMode = SqlRowidMode.TABLE
+        chkInit("entity user { name; }")
+        chkRowidStorage("c0.rowid_gen", "")
+        chkOp("create user('Dave');", "OK")
+        chkData("c0.user(1,Bob)", "c0.user(2,Alice)", "c0.user(3,Carol)", "c0.user(4,Dave)")
+    }
+
+    @Test fun testRowidModeNewDatabase() {
+        rowidMode = SqlRowidMode.SEQUENCE
+        chkInit("entity user { name; }")
+        chkRowidStorage("", "c0.rowid_seq")
+        chkOp("create user('Bob'); create user('Alice');", "OK")
+        chkData("c0.user(1,Bob)", "c0.user(2,Alice)")
+    }
+
+    private fun chkRowidStorage(expectedTable: String, expectedSequence: String) {
+        val (tables, sequences) = tstCtx.sqlMgr().access { sqlExec ->
+            SqlUtils.getExistingTables(sqlExec) to SqlUtils.getExistingSequences(sqlExec)
+        }
+        assertEquals(expectedTable, tables.filter { it == "c0.rowid_gen" }.joinToString(","))
+        assertEquals(expectedSequence, sequences.filter { it == "c0.rowid_seq" }.joinToString(","))
+    }
+
     private fun chkInit(code: String, expected: String = "OK", expectedWarnings: String = "") {
         val tst = RellCodeTester(tstCtx)
         tst.chainId = 0
+        tst.rowidMode = rowidMode
         createSysTables(tst)
 
         val globalCtx = tst.createInitGlobalCtx()
@@ -702,6 +785,19 @@ class SqlInitTest: BaseContextTest(useSql = true) {
         chkDataSql("c0.sys.attributes", sql, *expected)
     }
 
+    private fun chkMetaIndexes(vararg expected: String) {
+        val sql = """SELECT I.class_id, I.name, I.def FROM "c0.sys.indexes" I ORDER BY I.class_id, I.name;"""
+        chkDataSql("c0.sys.indexes", sql, *expected)
+    }
+
+    private fun chkSqlIndexes(table: String, vararg expected: String) {
+        val sql = "SELECT indexname FROM pg_indexes WHERE tablename = '$table' ORDER BY indexname;"
+        val actual = tstCtx.sqlMgr().access { sqlExec ->
+            SqlTestUtils.dumpSql(sqlExec, sql)
+        }
+        assertEquals(expected.toList(), actual)
+    }
+
     private fun chkDataSql(table: String, sql: String, vararg expected: String) {
         val actual = dumpDataSql(table, sql)
         assertEquals(expected.toList(), actual)
@@ -730,8 +826,8 @@ class SqlInitTest: BaseContextTest(useSql = true) {
 
         val res = mutableListOf<String>()
         for (table in map.keys) {
-            if (table in listOf("c0.rowid_gen", "c0.blocks", "c0.transactions", "c0.configurations", "c0.sys.faulty_configuration")) continue
-            if (!meta && (table == "c0.sys.attributes" || table == "c0.sys.classes")) continue
+            if (table in listOf("c0.rowid_gen", "c0.rowid_seq", "c0.blocks", "c0.transactions", "c0.configurations", "c0.sys.faulty_configuration")) continue
+            if (!meta && table in listOf("c0.sys.attributes", "c0.sys.classes", "c0.sys.indexes")) continue
             val attrs = map.getValue(table).map { (name, type) -> "$name:$type" } .joinToString(",")
             res.add(if (columns) "$table($attrs)" else table)
         }
@@ -764,7 +860,8 @@ class SqlInitTest: BaseContextTest(useSql = true) {
     private fun chkData(vararg expected: String) {
         val actualMap = SqlTestUtils.dumpDatabaseTables(tstCtx.sqlMgr())
         val actual = actualMap.keys
-                .filter { it != "c0.rowid_gen" && it != "c0.sys.classes" && it != "c0.sys.attributes" }
+                .filter { it !in listOf("c0.rowid_gen", "c0.rowid_seq") }
+                .filter { it !in listOf("c0.sys.classes", "c0.sys.attributes", "c0.sys.indexes") }
                 .flatMap { table -> actualMap.getValue(table).map { "$table($it)" } }
         assertEquals(expected.toList(), actual)
     }
@@ -783,6 +880,7 @@ class SqlInitTest: BaseContextTest(useSql = true) {
         val t = RellCodeTester(tstCtx)
         t.def(lastDefs)
         t.dropTables = false
+        t.rowidMode = rowidMode
         return t
     }
 
@@ -41,6 +41,27 @@ class LibCryptoTest: BaseRellTest(false) {
         chk("verify_signature(x'DEADBEFF', x'$pubKey', x'')", "boolean[false]")
     }
 
+    @Test fun testVerifySignatureBatch() {
+        val privKeyBytes = ByteArray(32) { it.toByte() }
+        val pubKey = CommonUtils.bytesToHex(secp256k1_derivePubKey(privKeyBytes))
+        val keyPair = KeyPair(pubKey.hexStringToByteArray(), privKeyBytes)
+
+        val messages = (0 until 10).map { String.format("DEADBE%02X", it) }
+        val signs = messages.map { calcSignature(it, keyPair) }
+        val items = messages.indices.map { i ->
+            val sign = if (i % 3 == 0) signs[(i + 1) % signs.size] else signs[i]
+            "(x'${messages[i]}', x'$pubKey', x'$sign')"
+        }
+        val exp = messages.indices.map { "boolean[${it % 3 != 0}]" }
+
+        chk("verify_signature_batch(list<(byte_array,byte_array,byte_array)>())", "list<boolean>[]")
+        chk("verify_signature_batch([${items.take(3).joinToString()}])", "list<boolean>[${exp.take(3).joinToString(",")}]")
+        chk("verify_signature_batch([${items.joinToString()}])", "list<boolean>[${exp.joinToString(",")}]")
+
+        val bad = "(x'0123', x'4567', x'89AB')"
+        chk("verify_signature_batch([${(items + bad).joinToString()}])", "rt_err:verify_signature")
+    }
+
     @Test fun testKeccak256() {
         chk("keccak256(x'')", "byte_array[c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470]")
         chk("keccak256('1'.to_bytes())", "byte_array[c89efdaa54c0f20c7adf612882df0950f5a951637e0307cdcb4c672f298b8bc6]")
@@ -94,6 +115,32 @@ class LibCryptoTest: BaseRellTest(false) {
         }
     }
 
+    @Test fun testEthEcrecoverBatch() {
+        val cases = loadJsonResource("/eth_ecrecover_testcases.json").asArray().map { obj ->
+            val r = getBytes(obj, "r", "0x")
+            val s = getBytes(obj, "s", "0x")
+            val h = getBytes(obj, "h", "0x")
+            val v = getBytes(obj, "v", "0x")
+            val res = obj.asDict().getValue("res").asString()
+            val recId = Integer.parseInt(v, 16) - 27
+            "(x'$r', x'$s', $recId, x'$h')" to if (res == "error") null else res.substring(2).toLowerCase()
+        }
+
+        val good = cases.filter { it.second != null }.take(20)
+        val items = good.joinToString { it.first }
+        val exp = good.joinToString(",") { "byte_array[${it.second}]" }
+        chk("eth_ecrecover_batch([$items]) @* {} (keccak256($).sub(12))", "list<byte_array>[$exp]")
+        chk("eth_ecrecover_batch(list<(byte_array,byte_array,integer,byte_array)>())", "list<byte_array>[]")
+
+        // The error of the first failing signature is reported, regardless of the order of processing.
+        val bad1 = cases.first { it.second == null }.first
+        val bad2 = "(x'00', x'00', -1, x'00')"
+        val goodItems = good.map { it.first }
+        val err = "rt_err:fn:error:crypto.eth_ecrecover_batch"
+        chk("eth_ecrecover_batch([${(goodItems + bad1 + bad2).joinToString()}])", "$err:java.lang.IllegalArgumentException")
+        chk("eth_ecrecover_batch([${(goodItems + bad2 + bad1).joinToString()}])", "$err:java.lang.IllegalStateException")
+    }
+
     @Test fun testEthSignViaEthEcrecover() {
         tst.testLib = true
         def("""
@@ -405,6 +452,23 @@ class LibCryptoTest: BaseRellTest(false) {
         chk("(123,y='Hello').hash()", "0x74443c7de4d4fee6f6f4d9b0aa5d4749dbfb0965b422e578802701b9ac2e063a")
     }
 
+    @Test fun testHashCached() {
+        tst.strictToString = false
+        def("struct rec { i: integer; t: text; }")
+        def("struct mrec { mutable i: integer; mutable t: text; }")
+
+        val h1 = "0x74443c7de4d4fee6f6f4d9b0aa5d4749dbfb0965b422e578802701b9ac2e063a"
+        val h2 = "0x7758916e7f9f1a9e0a84351f402dbc9c906492879a9d71dc4ff1f5b7d67bdf53"
+
+        chkEx("{ val r = rec(123,'Hello'); val h = r.hash(); return (h, r.hash()); }", "($h1,$h1)")
+        chkEx("{ val r = (123,'Hello'); val h = r.hash(); return (h, r.hash()); }", "($h1,$h1)")
+        chkEx("{ val r = mrec(123,'Hello'); val h = r.hash(); r.i = 456; r.t = 'Bye'; return (h, r.hash()); }", "($h1,$h2)")
+        chkEx("{ val r = (123,[1]); val h = r.hash(); r[1].clear(); return h == r.hash(); }", "false")
+
+        val v = "virtual<rec>.from_gtv(rec(123,'Hello').to_gtv())"
+        chkEx("{ val v = $v; val h = v.hash(); return (h, v.hash()); }", "($h1,$h1)")
+    }
+
     @Test fun testHashEntityObject() {
         tstCtx.useSql = true
         tst.strictToString = false
@@ -0,0 +1,91 @@
+/*
+ * Copyright (C) 2023 ChromaWay AB. See LICENSE for license information.
+ */
+
+package net.postchain.rell.base.misc
+
+import net.postchain.rell.base.sql.ConnectionSqlManager
+import net.postchain.rell.base.sql.SqlExecutor
+import net.postchain.rell.base.testutils.SqlTestUtils
+import org.junit.Test
+import kotlin.test.assertEquals
+
+class SqlStatementCacheTest {
+    @Test fun testReuse() {
+        SqlTestUtils.createSqlConnection().use { con ->
+            ConnectionSqlManager(con, false).use { mgr ->
+                mgr.access { sqlExec ->
+                    for (i in 1 .. 5) {
+                        assertEquals(i.toLong(), selectValue(sqlExec, i.toLong()))
+                    }
+                }
+                chkStats(mgr, "hits=4 misses=1 evictions=0 ratio=0.800")
+            }
+        }
+    }
+
+    @Test fun testNested() {
+        SqlTestUtils.createSqlConnection().use { con ->
+            ConnectionSqlManager(con, false).use { mgr ->
+                mgr.access { sqlExec ->
+                    val res = mutableListOf<Long>()
+                    sqlExec.executeQuery("SELECT ?::BIGINT;", { it.setLong(1, 1) }) { rs ->
+                        res.add(rs.getLong(1))
+                        res.add(selectValue(sqlExec, 2))
+                    }
+                    res.add(selectValue(sqlExec, 3))
+                    assertEquals(listOf(1L, 2L, 3L), res)
+                }
+                chkStats(mgr, "hits=1 misses=2 evictions=0 ratio=0.333")
+            }
+        }
+    }
+
+    @Test fun testEviction() {
+        SqlTestUtils.createSqlConnection().use { con ->
+            ConnectionSqlManager(con, false, statementCacheSize = 2).use { mgr ->
+                mgr.access { sqlExec ->
+                    for (sql in listOf("SELECT 1;", "SELECT 2;", "SELECT 1;", "SELECT 3;", "SELECT 2;")) {
+                        sqlExec.executeQuery(sql, {}) {}
+                    }
+                }
+                chkStats(mgr, "hits=1 misses=4 evictions=2 ratio=0.200")
+            }
+        }
+    }
+
+    @Test fun testTransaction() {
+        SqlTestUtils.createSqlConnection().use { con ->
+            ConnectionSqlManager(con, false).use { mgr ->
+                mgr.access { selectValue(it, 1) }
+                mgr.transaction { selectValue(it, 2); selectValue(it, 3) }
+                mgr.access { selectValue(it, 4) }
+                chkStats(mgr, "hits=1 misses=3 evictions=0 ratio=0.250")
+            }
+        }
+    }
+
+    @Test fun testDisabled() {
+        SqlTestUtils.createSqlConnection().use { con ->
+            ConnectionSqlManager(con, false, statementCacheSize = 0).use { mgr ->
+                mgr.access { sqlExec ->
+                    assertEquals(1L, selectValue(sqlExec, 1))
+                    assertEquals(2L, selectValue(sqlExec, 2))
+                }
+                chkStats(mgr, "hits=0 misses=0 evictions=0 ratio=0.000")
+            }
+        }
+    }
+
+    private fun selectValue(sqlExec: SqlExecutor, value: Long): Long {
+        var res = -1L
+        sqlExec.executeQuery("SELECT ?::BIGINT + 0;", { it.setLong(1, value) }) { rs ->
+            res = rs.getLong(1)
+        }
+        return res
+    }
+
+    private fun chkStats(mgr: ConnectionSqlManager, expected: String) {
+        assertEquals(expected, mgr.statementCacheStats().toString())
+    }
+}
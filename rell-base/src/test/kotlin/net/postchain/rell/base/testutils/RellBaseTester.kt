@@ -42,6 +42,7 @@ abstract class RellBaseTester(
     var allowDbModificationsInObjectExprs = C_CompilerOptions.DEFAULT.allowDbModificationsInObjectExprs
     var complexWhatEnabled = true
     var ideDefIdConflictError = true
+    var constantFolding = false
     var compatibilityVer = C_CompilerOptions.DEFAULT.compatibility
 
     var blockchainRid = RellTestUtils.strToRidHex("DEADBEEF")
@@ -136,6 +137,7 @@ abstract class RellBaseTester(
         ide = false,
         ideDocSymbolsEnabled = false,
         ideDefIdConflictError = ideDefIdConflictError,
+        constantFolding = constantFolding,
     )
 
     fun def(defs: List<String>) {
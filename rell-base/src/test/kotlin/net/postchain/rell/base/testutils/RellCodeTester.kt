@@ -38,6 +38,12 @@ class RellCodeTester(
     var strictToString = true
     var opContext: Rt_OpContext = Rt_NullOpContext
     var sqlUpdatePortionSize = 1000
+    var sqlFetchSize = 1000
+    var rowidMode = SqlRowidMode.TABLE
+    var rowidBlockSize = 0
+    var sqlBulkInsertThreshold = 0
+    var entityCacheSize = 0
+    val entityCacheCounters = Rt_EntityCacheCounters()
     var replModule: String? = null
     var typeCheck: Boolean = true
     var wrapFunctionCallErrors = true
@@ -71,6 +77,7 @@ class RellCodeTester(
                 Rt_FailingPrinter,
                 logSqlErrors = false,
                 typeCheck = true,
+                rowidMode = rowidMode,
         )
     }
 
@@ -248,7 +255,7 @@ class RellCodeTester(
         init()
         val moduleCode = moduleCode(code)
         return processWithAppSqlCtx(moduleCode) { appCtx, sqlCtx ->
-            RellTestUtils.callOpGeneric(appCtx, opContext, sqlCtx, tstCtx.sqlMgr(), name, args, decoder)
+            RellTestUtils.callOpGeneric(appCtx, opContext, sqlCtx, tstCtx.sqlMgr(), name, args, decoder, rowidBlockSize)
         }
     }
 
@@ -396,6 +403,11 @@ class RellCodeTester(
                 sqlUpdatePortionSize = sqlUpdatePortionSize,
                 typeCheck = typeCheck,
                 wrapFunctionCallErrors = wrapFunctionCallErrors,
+                sqlFetchSize = sqlFetchSize,
+                rowidMode = rowidMode,
+                sqlBulkInsertThreshold = sqlBulkInsertThreshold,
+                entityCacheSize = entityCacheSize,
+                entityCacheCounters = entityCacheCounters,
         )
     }
 
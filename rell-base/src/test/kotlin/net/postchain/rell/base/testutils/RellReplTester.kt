@@ -43,6 +43,11 @@ class RellReplTester(
                 logSqlErrors = globalCtx.logSqlErrors,
                 sqlUpdatePortionSize = globalCtx.sqlUpdatePortionSize,
                 typeCheck = globalCtx.typeCheck,
+                sqlFetchSize = globalCtx.sqlFetchSize,
+                rowidMode = globalCtx.rowidMode,
+                sqlBulkInsertThreshold = globalCtx.sqlBulkInsertThreshold,
+                entityCacheSize = globalCtx.entityCacheSize,
+                entityCacheCounters = globalCtx.entityCacheCounters,
             )
 
             val blockRunnerFactory = tstProjExt.getReplInterpreterProjExt()
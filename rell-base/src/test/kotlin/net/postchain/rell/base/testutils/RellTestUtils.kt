@@ -180,7 +180,8 @@ object RellTestUtils {
             sqlMgr: SqlManager,
             name: String,
             args: List<T>,
-            decoder: (List<R_FunctionParam>, List<T>) -> List<Rt_Value>
+            decoder: (List<R_FunctionParam>, List<T>) -> List<Rt_Value>,
+            rowidBlockSize: Int = 0,
     ): String {
         val mName = R_MountName.of(name)
         val op = appCtx.app.operations[mName]
@@ -193,8 +194,9 @@ object RellTestUtils {
 
         return catchRtErr {
             sqlMgr.transaction { sqlExec ->
-                val exeCtx = Rt_ExecutionContext(appCtx, opCtx, sqlCtx, sqlExec)
+                val exeCtx = Rt_ExecutionContext(appCtx, opCtx, sqlCtx, sqlExec, rowidBlockSize = rowidBlockSize)
                 op.call(exeCtx, rtArgs!!)
+                exeCtx.rowidAllocator.release(sqlExec, sqlCtx.mainChainMapping())
                 "OK"
             }
         }
@@ -0,0 +1,47 @@
+/*
+ * Copyright (C) 2023 ChromaWay AB. See LICENSE for license information.
+ */
+
+package net.postchain.rell.base.testutils.tools
+
+import net.postchain.rell.base.testutils.RellCodeTester
+import net.postchain.rell.base.testutils.RellTestContext
+import java.time.Duration
+
+/**
+ * Compares a sorted collection at-expression with `limit` (top-K heap) and the same expression without a limit,
+ * sliced afterwards (collecting and sorting all rows), over 1M-element lists.
+ */
+fun main() {
+    val size = 1_000_000
+    val limits = listOf(1, 10, 100, 1000)
+    val iterations = 5
+
+    RellTestContext(useSql = false).use { tstCtx ->
+        val t = RellCodeTester(tstCtx)
+        t.strictToString = false
+        t.def("function data(n: integer) = range(n) @* {} ( (k = ($ * 7919) % 1000003, v = $) );")
+        t.def("function top(d: list<(k:integer,v:integer)>, n: integer) = d @* {} ( @omit @sort_desc .k, .v ) limit n;")
+        t.def("function full(d: list<(k:integer,v:integer)>, n: integer) = (d @* {} ( @omit @sort_desc .k, .v )).sub(0, n);")
+
+        println(String.format("%8s %12s %12s", "limit", "top-k", "full sort"))
+        for (limit in limits) {
+            val expected = "$limit"
+            val code = "{ val d = data($size); return %s(d, $limit).size(); }"
+
+            // Warm-up: compilation of the module and JIT of the runtime.
+            t.chkEx(String.format(code, "top"), expected)
+            t.chkEx(String.format(code, "full"), expected)
+
+            val top = measure(iterations) { t.chkEx(String.format(code, "top"), expected) }
+            val full = measure(iterations) { t.chkEx(String.format(code, "full"), expected) }
+            println(String.format("%8d %12s %12s", limit, durationToStr(top), durationToStr(full)))
+        }
+    }
+}
+
+private fun measure(iterations: Int, block: () -> Unit): Duration {
+    val t0 = System.currentTimeMillis()
+    repeat(iterations) { block() }
+    return Duration.ofMillis((System.currentTimeMillis() - t0) / iterations)
+}
@@ -0,0 +1,42 @@
+/*
+ * Copyright (C) 2023 ChromaWay AB. See LICENSE for license information.
+ */
+
+package net.postchain.rell.base.testutils.tools
+
+import net.postchain.rell.base.testutils.RellCodeTester
+import net.postchain.rell.base.testutils.RellTestContext
+import java.time.Duration
+
+/** Compares `create` of many entities via paged multi-row INSERTs and via COPY. Needs the test database. */
+fun main() {
+    val sizes = listOf(1_000, 10_000, 100_000)
+
+    println(String.format("%8s %12s %12s", "rows", "paged", "copy"))
+    for (size in sizes) {
+        val paged = benchmarkCreate(size, bulkInsertThreshold = 0)
+        val copy = benchmarkCreate(size, bulkInsertThreshold = 1)
+        println(String.format("%8d %12s %12s", size, durationToStr(paged), durationToStr(copy)))
+    }
+}
+
+private fun benchmarkCreate(rows: Int, bulkInsertThreshold: Int): Duration {
+    RellTestContext().use { tstCtx ->
+        val t = RellCodeTester(tstCtx)
+        t.def("entity user { name; score: integer; data: byte_array; }")
+        t.sqlBulkInsertThreshold = bulkInsertThreshold
+        t.init()
+
+        val code = "create user(range(%d) @* {} (struct<user>(name = 'user_' + $, score = $, data = x'0102030405')));"
+
+        // Warm-up: compilation of the module and JIT of the runtime.
+        t.chkOp(String.format(code, 1000))
+
+        val t0 = System.currentTimeMillis()
+        t.chkOp(String.format(code, rows))
+        val res = Duration.ofMillis(System.currentTimeMillis() - t0)
+
+        t.chk("user @ {} ( @sum 1 )", "int[${rows + 1000}]")
+        return res
+    }
+}
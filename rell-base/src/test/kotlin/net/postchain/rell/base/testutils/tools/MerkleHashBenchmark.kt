@@ -0,0 +1,73 @@
+/*
+ * Copyright (C) 2023 ChromaWay AB. See LICENSE for license information.
+ */
+
+package net.postchain.rell.base.testutils.tools
+
+import net.postchain.rell.base.testutils.RellCodeTester
+import net.postchain.rell.base.testutils.RellTestContext
+import java.time.Duration
+
+/**
+ * Measures repeated `.hash()` of the same value: a deep immutable struct and a 10k-element list (as a virtual value),
+ * compared with hashing the same data as a plain `gtv` or `list`, which is not cached.
+ */
+fun main() {
+    val depth = 10
+    val listSize = 10_000
+    val hashes = 100
+    val iterations = 5
+
+    RellTestContext(useSql = false).use { tstCtx ->
+        val t = RellCodeTester(tstCtx)
+        t.strictToString = false
+
+        t.def("struct n0 { v: integer; t: text; }")
+        for (i in 1 .. depth) {
+            t.def("struct n$i { a: n${i - 1}; b: n${i - 1}; }")
+        }
+        t.def("function make_n0(k: integer) = n0(k, 'Node #' + k);")
+        for (i in 1 .. depth) {
+            t.def("function make_n$i(k: integer) = n$i(make_n${i - 1}(k * 2), make_n${i - 1}(k * 2 + 1));")
+        }
+
+        t.def("function hash_struct(s: n$depth, n: integer) { var h = x''; for (i in range(n)) h = s.hash(); return h.size(); }")
+        t.def("function hash_gtv(g: gtv, n: integer) { var h = x''; for (i in range(n)) h = g.hash(); return h.size(); }")
+        t.def("function hash_list(l: list<integer>, n: integer) { var h = x''; for (i in range(n)) h = l.hash(); return h.size(); }")
+        t.def("""
+            function hash_virtual(v: virtual<list<integer>>, n: integer) {
+                var h = x'';
+                for (i in range(n)) h = v.hash();
+                return h.size();
+            }
+        """)
+
+        val s = "make_n$depth(1)"
+        val l = "range($listSize) @* {} ($)"
+        val v = "virtual<list<integer>>.from_gtv(($l).to_gtv())"
+
+        val cases = listOf(
+            Case("struct (depth $depth)", "hash_struct($s, $hashes)", "hash_gtv($s.to_gtv(), $hashes)"),
+            Case("list ($listSize)", "hash_virtual($v, $hashes)", "hash_list($l, $hashes)"),
+        )
+
+        println(String.format("%24s %12s %12s", "value", "cached", "not cached"))
+        for (case in cases) {
+            // Warm-up: compilation of the module and JIT of the runtime.
+            t.chk(case.cached, "32")
+            t.chk(case.uncached, "32")
+
+            val cached = measure(iterations) { t.chk(case.cached, "32") }
+            val uncached = measure(iterations) { t.chk(case.uncached, "32") }
+            println(String.format("%24s %12s %12s", case.name, durationToStr(cached), durationToStr(uncached)))
+        }
+    }
+}
+
+private class Case(val name: String, val cached: String, val uncached: String)
+
+private fun measure(iterations: Int, block: () -> Unit): Duration {
+    val t0 = System.currentTimeMillis()
+    repeat(iterations) { block() }
+    return Duration.ofMillis((System.currentTimeMillis() - t0) / iterations)
+}
@@ -0,0 +1,76 @@
+/*
+ * Copyright (C) 2023 ChromaWay AB. See LICENSE for license information.
+ */
+
+package net.postchain.rell.base.testutils.tools
+
+import net.postchain.rell.base.compiler.base.core.C_CompilerModuleSelection
+import net.postchain.rell.base.compiler.base.core.C_CompilerOptions
+import net.postchain.rell.base.compiler.base.utils.C_SourceDir
+import net.postchain.rell.base.testutils.RellTestUtils
+import java.time.Duration
+
+/**
+ * Compiles a synthetic project (all modules) with and without parallel parsing, and prints the average wall-clock
+ * time of a compilation. Only parsing is parallel, so the speedup depends on how much of the time parsing takes.
+ */
+fun main() {
+    val dirs = 20
+    val filesPerDir = 20
+    val functionsPerFile = 50
+    val iterations = 5
+
+    val files = makeProject(dirs, filesPerDir, functionsPerFile)
+    val sourceDir = C_SourceDir.mapDirOf(files)
+    val modSel = C_CompilerModuleSelection(null)
+
+    val sequential = C_CompilerOptions.DEFAULT
+    val parallel = C_CompilerOptions.builder().parallelParsing(true).build()
+
+    // Warm-up: JIT of the parser and the compiler.
+    repeat(3) {
+        compile(sourceDir, modSel, sequential)
+        compile(sourceDir, modSel, parallel)
+    }
+
+    val seqTime = measure(iterations) { compile(sourceDir, modSel, sequential) }
+    val parTime = measure(iterations) { compile(sourceDir, modSel, parallel) }
+
+    println("Files: ${files.size}, cores: ${Runtime.getRuntime().availableProcessors()}")
+    println(String.format("%12s %12s %8s", "sequential", "parallel", "speedup"))
+    val speedup = seqTime.toMillis().toDouble() / parTime.toMillis().coerceAtLeast(1)
+    println(String.format("%12s %12s %8.2f", durationToStr(seqTime), durationToStr(parTime), speedup))
+}
+
+private fun makeProject(dirs: Int, filesPerDir: Int, functionsPerFile: Int): Map<String, String> {
+    val files = mutableMapOf<String, String>()
+    for (d in 0 until dirs) {
+        for (f in 0 until filesPerDir) {
+            val code = (0 until functionsPerFile).joinToString("\n") { i ->
+                val name = "f_${f}_$i"
+                """
+                    function $name(x: integer, s: text): list<text> {
+                        val res = list<text>();
+                        for (i in range(x)) {
+                            if (i % 3 == 0) res.add(s + i.to_text()); else res.add(s.upper_case());
+                        }
+                        return res;
+                    }
+                """.trimIndent()
+            }
+            files["dir_$d/file_$f.rell"] = code
+        }
+    }
+    return files
+}
+
+private fun compile(sourceDir: C_SourceDir, modSel: C_CompilerModuleSelection, options: C_CompilerOptions) {
+    val res = RellTestUtils.compileApp(sourceDir, modSel, options)
+    check(res.errors.isEmpty()) { res.errors.toString() }
+}
+
+private fun measure(iterations: Int, block: () -> Unit): Duration {
+    val t0 = System.currentTimeMillis()
+    repeat(iterations) { block() }
+    return Duration.ofMillis((System.currentTimeMillis() - t0) / iterations)
+}
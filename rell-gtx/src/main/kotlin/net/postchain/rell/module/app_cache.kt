@@ -0,0 +1,201 @@
+/*
+ * Copyright (C) 2023 ChromaWay AB. See LICENSE for license information.
+ */
+
+package net.postchain.rell.module
+
+import net.postchain.gtv.Gtv
+import net.postchain.gtv.GtvFactory.gtv
+import net.postchain.gtv.GtvNull
+import net.postchain.rell.base.compiler.base.core.C_CompilerOptions
+import net.postchain.rell.base.compiler.base.utils.C_SourcePath
+import net.postchain.rell.base.model.R_ModuleName
+import net.postchain.rell.base.utils.Bytes
+import net.postchain.rell.base.utils.PostchainGtvUtils
+import net.postchain.rell.base.utils.RellGtxModuleApp
+import net.postchain.rell.base.utils.RellVersions
+import java.security.MessageDigest
+import java.util.*
+import java.util.concurrent.atomic.AtomicBoolean
+
+class RellAppCacheStats(
+    val hits: Long,
+    val misses: Long,
+    val evictions: Long,
+    /** Number of apps in use by at least one module. */
+    val usedApps: Int,
+    /** Total number of modules using the apps. */
+    val users: Int,
+) {
+    override fun toString() = "hits=$hits misses=$misses evictions=$evictions used=$usedApps users=$users"
+}
+
+/**
+ * Identifies a compiled app: SHA-256 of the source files (paths and texts), the main modules, the compiler options
+ * and the Rell version. Any change of these gives a different key, so a stale app is never returned.
+ */
+class RellAppCacheKey private constructor(private val hash: Bytes) {
+    override fun equals(other: Any?) = other is RellAppCacheKey && hash == other.hash
+    override fun hashCode() = hash.hashCode()
+    override fun toString() = hash.toHex()
+
+    companion object {
+        fun of(
+            files: Map<C_SourcePath, String>,
+            modules: List<R_ModuleName>,
+            options: C_CompilerOptions,
+        ): RellAppCacheKey {
+            val gtv = gtv(mapOf(
+                "rell" to gtv(RellVersions.VERSION_STR),
+                "files" to gtv(files.entries.associate { it.key.str() to gtv(it.value) }),
+                "modules" to gtv(modules.map { gtv(it.str()) }),
+                "options" to optionsToGtv(options),
+            ))
+            val bytes = PostchainGtvUtils.gtvToBytes(gtv)
+            val hash = MessageDigest.getInstance("SHA-256").digest(bytes)
+            return RellAppCacheKey(Bytes.of(hash))
+        }
+
+        // Options affecting the compiled app, listed explicitly; parseCache and parallelParsing do not affect it.
+        private fun optionsToGtv(options: C_CompilerOptions): Gtv {
+            return gtv(mapOf(
+                "compatibility" to (options.compatibility?.let { gtv(it.str()) } ?: GtvNull),
+                "gtv" to flag(options.gtv),
+                "deprecatedError" to flag(options.deprecatedError),
+                "blockCheck" to flag(options.blockCheck),
+                "atAttrShadowing" to gtv(options.atAttrShadowing.name),
+                "testLib" to flag(options.testLib),
+                "hiddenLib" to flag(options.hiddenLib),
+                "allowDbModificationsInObjectExprs" to flag(options.allowDbModificationsInObjectExprs),
+                "symbolInfoFile" to (options.symbolInfoFile?.let { gtv(it.str()) } ?: GtvNull),
+                "complexWhatEnabled" to flag(options.complexWhatEnabled),
+                "mountConflictError" to flag(options.mountConflictError),
+                "appModuleInTestsError" to flag(options.appModuleInTestsError),
+                "useTestDependencyExtensions" to flag(options.useTestDependencyExtensions),
+                "ide" to flag(options.ide),
+                "ideDocSymbolsEnabled" to flag(options.ideDocSymbolsEnabled),
+                "ideDefIdConflictError" to flag(options.ideDefIdConflictError),
+                "constantFolding" to flag(options.constantFolding),
+            ))
+        }
+
+        private fun flag(v: Boolean): Gtv = gtv(if (v) 1L else 0L)
+    }
+}
+
+/** A use of a shared app; [release] shall be called when the app is not used anymore (repeated calls do nothing). */
+class RellAppRef internal constructor(
+    private val cache: RellAppCache,
+    val key: RellAppCacheKey,
+    val app: RellGtxModuleApp,
+) {
+    private val released = AtomicBoolean()
+
+    fun release() {
+        if (released.compareAndSet(false, true)) {
+            cache.release(key)
+        }
+    }
+}
+
+/**
+ * Registry of apps compiled by [RellPostchainModuleFactory], to not compile the same sources again when a chain's
+ * configuration is reloaded or another chain uses the same sources, and to keep one `R_App` in memory for all chains
+ * running the same sources. Only successfully compiled apps are registered: if compilation fails, it is repeated the
+ * next time.
+ *
+ * An app is kept while it has users (reference counting, see [acquire]). When the last user releases it, it is moved
+ * to an LRU list of at most `maxSize` unused apps, so that it can be reused by a configuration reload; size 0 means
+ * that only apps in use are shared.
+ *
+ * Apps are kept in memory only: an `R_App` holds compiled code and library functions, and cannot be serialized.
+ */
+class RellAppCache(private val maxSize: Int) {
+    private val used = mutableMapOf<RellAppCacheKey, UsedEntry>()
+
+    private val unused = object: LinkedHashMap<RellAppCacheKey, RellGtxModuleApp>(16, 0.75f, true) {
+        override fun removeEldestEntry(eldest: MutableMap.MutableEntry<RellAppCacheKey, RellGtxModuleApp>): Boolean {
+            if (size <= maxSize) return false
+            ++evictions
+            return true
+        }
+    }
+
+    private var hits = 0L
+    private var misses = 0L
+    private var evictions = 0L
+
+    fun acquire(key: RellAppCacheKey, compiler: () -> RellGtxModuleApp): RellAppRef {
+        synchronized(this) {
+            val app = acquireExisting(key)
+            if (app != null) {
+                ++hits
+                return RellAppRef(this, key, app)
+            }
+            ++misses
+        }
+
+        // Compiled outside the lock, as chains are started concurrently. If the same app is compiled by two threads,
+        // the first one is kept, so that the chains share it.
+        val newApp = compiler()
+
+        synchronized(this) {
+            val app = acquireExisting(key) ?: let {
+                used[key] = UsedEntry(newApp)
+                newApp
+            }
+            return RellAppRef(this, key, app)
+        }
+    }
+
+    private fun acquireExisting(key: RellAppCacheKey): RellGtxModuleApp? {
+        val usedEntry = used[key]
+        if (usedEntry != null) {
+            ++usedEntry.refCount
+            return usedEntry.app
+        }
+
+        val app = unused.remove(key)
+        if (app != null) {
+            used[key] = UsedEntry(app)
+        }
+        return app
+    }
+
+    @Synchronized
+    internal fun release(key: RellAppCacheKey) {
+        val entry = used.getValue(key)
+        check(entry.refCount > 0) { key }
+        --entry.refCount
+        if (entry.refCount == 0) {
+            used.remove(key)
+            unused[key] = entry.app
+        }
+    }
+
+    /** Removes unused apps; apps in use are still shared. */
+    @Synchronized
+    fun clear() {
+        unused.clear()
+    }
+
+    @Synchronized
+    fun stats(): RellAppCacheStats {
+        val users = used.values.sumOf { it.refCount }
+        return RellAppCacheStats(
+            hits = hits,
+            misses = misses,
+            evictions = evictions,
+            usedApps = used.size,
+            users = users,
+        )
+    }
+
+    private class UsedEntry(val app: RellGtxModuleApp) {
+        var refCount = 1
+    }
+
+    companion object {
+        const val DEFAULT_SIZE = 16
+    }
+}
@@ -21,6 +21,7 @@ import net.postchain.gtx.GTXModuleFactory
 import net.postchain.gtx.GTXOperation
 import net.postchain.gtx.NON_STRICT_QUERY_ARGUMENT
 import net.postchain.gtx.data.ExtOpData
+import net.postchain.gtx.data.OpData
 import net.postchain.gtx.special.GTXSpecialTxExtension
 import net.postchain.rell.base.compiler.base.core.C_CompilationResult
 import net.postchain.rell.base.compiler.base.core.C_Compiler
@@ -32,14 +33,20 @@ import net.postchain.rell.base.runtime.utils.Rt_SqlExecutor
 import net.postchain.rell.base.runtime.utils.Rt_Utils
 import net.postchain.rell.base.sql.ConnectionSqlExecutor
 import net.postchain.rell.base.sql.NullSqlInitProjExt
+import net.postchain.rell.base.sql.SqlConnectionLogger
+import net.postchain.rell.base.sql.SqlExecutor
 import net.postchain.rell.base.sql.SqlInit
 import net.postchain.rell.base.sql.SqlInitLogging
+import net.postchain.rell.base.sql.SqlStatementCache
 import net.postchain.rell.base.utils.*
 import net.postchain.rell.gtx.PostchainBaseUtils
 import net.postchain.rell.gtx.Rt_DefaultPostchainTxContextFactory
 import net.postchain.rell.gtx.Rt_PostchainOpContext
+import net.postchain.rell.gtx.Rt_PostchainTxContext
 import net.postchain.rell.gtx.Rt_PostchainTxContextFactory
 import org.apache.commons.lang3.time.FastDateFormat
+import java.lang.ref.Cleaner
+import java.sql.Connection
 
 private fun convertArgs(ctx: GtvToRtContext, params: List<R_FunctionParam>, args: List<Gtv>): List<Rt_Value> {
     return args.mapIndexed { index, arg ->
@@ -144,34 +151,53 @@ private class RellGTXOperation(
     }
 
     override fun apply(ctx: TxEContext): Boolean {
+        try {
+            apply0(ctx)
+        } catch (e: Throwable) {
+            // The transaction will be rolled back, so the state built within it must not be reused.
+            module.dropTxState()
+            throw e
+        }
+        return true
+    }
+
+    private fun apply0(ctx: TxEContext) {
         handleError {
-            val blockHeight = DatabaseAccess.of(ctx).getLastBlockHeight(ctx)
-            val txCtx = module.env.txContextFactory.createTxContext(ctx)
+            val txState = module.getTxState(ctx, data.operations)
+            val blockState = txState.blockState
 
             val opCtx = Rt_PostchainOpContext(
-                    txCtx = txCtx,
+                    txCtx = txState.txCtx,
                     lastBlockTime = ctx.timestamp,
                     transactionIid = ctx.txIID,
-                    blockHeight = blockHeight,
+                    blockHeight = blockState.blockHeight,
                     opIndex = data.opIndex,
                     signers = data.signers.map { it.toBytes() }.toImmList(),
                     allOperations = data.operations.toImmList(),
             )
 
-            val heightProvider = Rt_TxChainHeightProvider(ctx)
-            val exeCtx = module.createExecutionContext(ctx, opCtx, heightProvider)
+            SqlStatementCache(module.config.sqlStatementCacheSize).use { stmtCache ->
+                val exeCtx = module.createExecutionContext(ctx, opCtx, blockState.sqlCtx, stmtCache)
 
-            val opArgs = getOpArgs()
+                val opArgs = getOpArgs()
 
-            // It's important to not reuse old Rt args: function apply() may be called multiple times, and args may
-            // be mutable, thus every call must use a new copy of Rt args.
-            mOpArgs = null
+                // It's important to not reuse old Rt args: function apply() may be called multiple times, and args may
+                // be mutable, thus every call must use a new copy of Rt args.
+                mOpArgs = null
 
-            opArgs.gtvCtx.finish(exeCtx)
-            rOperation.call(exeCtx, opArgs.args)
-        }
+                try {
+                    opArgs.gtvCtx.finish(exeCtx, txState.existingRecords(exeCtx))
+                    rOperation.call(exeCtx, opArgs.args)
+                } finally {
+                    if (exeCtx.recordsDeleted) {
+                        txState.invalidateExistingRecords()
+                    }
+                }
 
-        return true
+                // Must be done before the transaction is committed, so the rowid counter is the same on all nodes.
+                exeCtx.rowidAllocator.release(exeCtx.sqlExec, exeCtx.sqlCtx.mainChainMapping())
+            }
+        }
     }
 
     private fun getOpArgs(): Rt_OperationArgs {
@@ -204,23 +230,130 @@ private class RellGTXOperation(
     }
 
     private class Rt_OperationArgs(val gtvCtx: GtvToRtContext, val args: List<Rt_Value>)
+}
+
+private class Rt_TxChainHeightProvider(private val ctx: TxEContext): Rt_ChainHeightProvider {
+    override fun getChainHeight(rid: WrappedByteArray, id: Long): Long? {
+        return try {
+            ctx.getChainDependencyHeight(id)
+        } catch (e: Exception) {
+            null
+        }
+    }
+}
+
+/**
+ * State shared by all operations of a block: the last block height and the heights of external chains do not change
+ * while a block is being built.
+ */
+private class RellBlockState(
+    private val conn: Connection,
+    private val chainId: Long,
+    private val blockIid: Long,
+    private val timestamp: Long,
+    val blockHeight: Long,
+    val sqlCtx: Rt_SqlContext,
+) {
+    fun matches(ctx: TxEContext): Boolean {
+        return conn === ctx.conn && chainId == ctx.chainID && blockIid == ctx.blockIID && timestamp == ctx.timestamp
+    }
+}
+
+/**
+ * State shared by all operations of a transaction. Records referenced by arguments of all operations are checked for
+ * existence with one query per entity when the first operation is applied; an operation then checks only records
+ * not known to exist (e.g. created by a preceding operation), so errors are the same as with per-operation checks.
+ * Known records are forgotten once an operation deletes records. If the batched check fails, it is rolled back and
+ * every operation checks its own records, so the failure is reported by the operation which causes it.
+ */
+private class RellTxState(
+    private val ctx: TxEContext,
+    val blockState: RellBlockState,
+    val txCtx: Rt_PostchainTxContext,
+    private val rApp: R_App,
+    private val operations: Array<OpData>,
+) {
+    private val txIid = ctx.txIID
+    private var existingRecords: Map<R_EntityDefinition, Set<Long>>? = null
 
-    private class Rt_TxChainHeightProvider(private val ctx: TxEContext): Rt_ChainHeightProvider {
-        override fun getChainHeight(rid: WrappedByteArray, id: Long): Long? {
-            return try {
-                ctx.getChainDependencyHeight(id)
+    fun matches(ctx: TxEContext, operations: Array<OpData>): Boolean {
+        return this.ctx === ctx && txIid == ctx.txIID && this.operations === operations
+    }
+
+    fun existingRecords(exeCtx: Rt_ExecutionContext): Map<R_EntityDefinition, Set<Long>> {
+        var res = existingRecords
+        if (res == null) {
+            res = selectExistingRecords(exeCtx)
+            existingRecords = res
+        }
+        return res
+    }
+
+    fun invalidateExistingRecords() {
+        existingRecords = immMapOf()
+    }
+
+    private fun selectExistingRecords(exeCtx: Rt_ExecutionContext): Map<R_EntityDefinition, Set<Long>> {
+        val records = collectRecords()
+        if (records.isEmpty()) {
+            return immMapOf()
+        }
+
+        val savepoint = ctx.conn.setSavepoint()
+        return try {
+            val res = records
+                .mapValues { (entity, rowids) -> GtvToRtContext.selectExistingRecords(exeCtx, entity, rowids) }
+                .toImmMap()
+            ctx.conn.releaseSavepoint(savepoint)
+            res
+        } catch (e: Exception) {
+            ctx.conn.rollback(savepoint)
+            immMapOf()
+        }
+    }
+
+    private fun collectRecords(): Map<R_EntityDefinition, Set<Long>> {
+        val records = mutableMapOf<R_EntityDefinition, MutableSet<Long>>()
+
+        for (op in operations) {
+            val mountName = R_MountName.ofOpt(op.opName)
+            val rOperation = if (mountName == null) null else rApp.operations[mountName]
+            val params = rOperation?.params()
+            if (params == null || params.size != op.args.size) continue
+
+            val gtvCtx = GtvToRtContext.make(pretty = GTV_OPERATION_PRETTY, validateOnly = true)
+            try {
+                convertArgs(gtvCtx, params, op.args.toList())
             } catch (e: Exception) {
-                null
+                // Reported by the operation itself.
+                continue
+            }
+
+            for ((entity, rowids) in gtvCtx.trackedRecords()) {
+                records.getOrPut(entity) { mutableSetOf() }.addAll(rowids)
             }
         }
+
+        return records
     }
 }
 
+/** Gives the entity cache counters summed over all operations and queries executed by a module. */
+interface RellEntityCacheStatsProvider {
+    fun entityCacheStats(): Rt_EntityCacheStats
+}
+
 private class RellModuleConfig(
         val sqlLogging: Boolean,
         val typeCheck: Boolean,
         val dbInitLogLevel: Int,
-        val compilerOptions: C_CompilerOptions
+        val compilerOptions: C_CompilerOptions,
+        val sqlStatementCacheSize: Int,
+        val rowidBlockSize: Int,
+        val sqlBulkInsertThreshold: Int,
+        val entityCacheSize: Int,
+        val queryCacheSize: Int,
+        val queryCacheQueries: List<R_MountName>,
 )
 
 private class RellPostchainModule(
@@ -233,15 +366,19 @@ private class RellPostchainModule(
     private val errorHandler: ErrorHandler,
     moduleArgsSource: Rt_ModuleArgsSource,
     val config: RellModuleConfig,
-): GTXModule {
+): GTXModule, RellQueryCacheStatsProvider, RellEntityCacheStatsProvider {
     private val operationNames = rApp.operations.keys.map { it.str() }.toImmSet()
     private val queryNames = rApp.queries.keys.map { it.str() }.toImmSet()
 
+    private val queryCache = RellQueryCache(config.queryCacheSize, config.queryCacheQueries)
+
     private val globalCtx = Rt_GlobalContext(
         compilerOptions = config.compilerOptions,
         outPrinter = outPrinter,
         logPrinter = logPrinter,
         typeCheck = config.typeCheck,
+        sqlBulkInsertThreshold = config.sqlBulkInsertThreshold,
+        entityCacheSize = config.entityCacheSize,
     )
 
     private val appCtx = Rt_AppContext(
@@ -253,6 +390,14 @@ private class RellPostchainModule(
         moduleArgsSource = moduleArgsSource,
     )
 
+    // Chain IIDs and validated metadata of external chains do not change while the blockchain configuration
+    // (and thus the module) stays the same, so they are resolved once; heights are still taken per call.
+    @Volatile private var resolvedExternalChains: Rt_ResolvedExternalChains? = null
+
+    // Operations of a block (transaction) are applied one by one, so only the current block (transaction) is kept.
+    @Volatile private var blockState: RellBlockState? = null
+    @Volatile private var txState: RellTxState? = null
+
     override fun getOperations(): Set<String> {
         return operationNames
     }
@@ -292,17 +437,34 @@ private class RellPostchainModule(
     private fun query0(ctx: EContext, name: String, args: Gtv): Gtv {
         val rQuery = getRoutine("Query", rApp.queries, name)
 
+        if (!queryCache.isCached(rQuery.mountName)) {
+            return executeQuery(ctx, rQuery, args)
+        }
+
+        val blockHeight = DatabaseAccess.of(ctx).getLastBlockHeight(ctx)
+        return queryCache.get(rQuery.mountName, args, blockHeight) {
+            executeQuery(ctx, rQuery, args)
+        }
+    }
+
+    private fun executeQuery(ctx: EContext, rQuery: R_QueryDefinition, args: Gtv): Gtv {
         val heightProvider = Rt_ConstantChainHeightProvider(Long.MAX_VALUE)
 
-        val exeCtx = createExecutionContext(ctx, Rt_NullOpContext, heightProvider)
-        val rtArgs = translateQueryArgs(exeCtx, rQuery, args)
-        val rtResult = rQuery.call(exeCtx, rtArgs)
+        val rtResult = SqlStatementCache(config.sqlStatementCacheSize).use { stmtCache ->
+            val exeCtx = createExecutionContext(ctx, Rt_NullOpContext, heightProvider, stmtCache)
+            val rtArgs = translateQueryArgs(exeCtx, rQuery, args)
+            rQuery.call(exeCtx, rtArgs)
+        }
 
         val type = rQuery.type()
         val gtvResult = type.rtToGtv(rtResult, GTV_QUERY_PRETTY)
         return gtvResult
     }
 
+    override fun queryCacheStats() = queryCache.stats()
+
+    override fun entityCacheStats() = globalCtx.entityCacheCounters.stats()
+
     private fun <T> getRoutine(kind: String, map: Map<R_MountName, T>, name: String): T {
         val mountName = R_MountName.ofOpt(name)
         mountName ?: throw UserMistake("$kind mount name is invalid: '$name")
@@ -314,16 +476,88 @@ private class RellPostchainModule(
     fun createExecutionContext(
             eCtx: EContext,
             opCtx: Rt_OpContext,
-            heightProvider: Rt_ChainHeightProvider
+            heightProvider: Rt_ChainHeightProvider,
+            stmtCache: SqlStatementCache? = null,
     ): Rt_ExecutionContext {
-        val sqlMapping = Rt_ChainSqlMapping(eCtx.chainID)
+        val sqlExec = createSqlExecutor(eCtx, stmtCache)
+        val sqlCtx = createSqlContext(eCtx, sqlExec, heightProvider)
+        return Rt_ExecutionContext(appCtx, opCtx, sqlCtx, sqlExec)
+    }
 
-        val chainDeps = chainDeps.mapValues { (_, rid) -> Rt_ChainDependency(rid) }
+    fun createExecutionContext(
+            eCtx: EContext,
+            opCtx: Rt_OpContext,
+            sqlCtx: Rt_SqlContext,
+            stmtCache: SqlStatementCache?,
+    ): Rt_ExecutionContext {
+        val sqlExec = createSqlExecutor(eCtx, stmtCache)
+        // Reserved rowids are released by the operation (RellGTXOperation.apply).
+        return Rt_ExecutionContext(appCtx, opCtx, sqlCtx, sqlExec, rowidBlockSize = config.rowidBlockSize)
+    }
 
-        val sqlExec = Rt_SqlExecutor(ConnectionSqlExecutor(eCtx.conn, config.sqlLogging), globalCtx.logSqlErrors)
-        val sqlCtx = Rt_RegularSqlContext.create(rApp, sqlMapping, chainDeps, sqlExec, heightProvider)
+    private fun createSqlExecutor(eCtx: EContext, stmtCache: SqlStatementCache?): SqlExecutor {
+        return Rt_SqlExecutor(
+            ConnectionSqlExecutor(eCtx.conn, SqlConnectionLogger(config.sqlLogging), stmtCache),
+            globalCtx.logSqlErrors,
+        )
+    }
 
-        return Rt_ExecutionContext(appCtx, opCtx, sqlCtx, sqlExec)
+    private fun createSqlContext(
+            eCtx: EContext,
+            sqlExec: SqlExecutor,
+            heightProvider: Rt_ChainHeightProvider,
+    ): Rt_SqlContext {
+        val externalChains = resolveExternalChains(eCtx, sqlExec)
+        return Rt_RegularSqlContext.create(externalChains, heightProvider)
+    }
+
+    fun getTxState(ctx: TxEContext, operations: Array<OpData>): RellTxState {
+        val cached = txState
+        if (cached != null && cached.matches(ctx, operations) && cached.blockState.matches(ctx)) {
+            return cached
+        }
+
+        val blockState = getBlockState(ctx)
+        val txCtx = env.txContextFactory.createTxContext(ctx)
+        val res = RellTxState(ctx, blockState, txCtx, rApp, operations)
+        txState = res
+        return res
+    }
+
+    /** Called when an operation fails: the transaction (and possibly the block) is rolled back. */
+    fun dropTxState() {
+        txState = null
+        blockState = null
+    }
+
+    private fun getBlockState(ctx: TxEContext): RellBlockState {
+        val cached = blockState
+        if (cached != null && cached.matches(ctx)) {
+            return cached
+        }
+
+        val blockHeight = DatabaseAccess.of(ctx).getLastBlockHeight(ctx)
+        val sqlExec = createSqlExecutor(ctx, null)
+        val sqlCtx = createSqlContext(ctx, sqlExec, Rt_TxChainHeightProvider(ctx))
+
+        val res = RellBlockState(ctx.conn, ctx.chainID, ctx.blockIID, ctx.timestamp, blockHeight, sqlCtx)
+        blockState = res
+        return res
+    }
+
+    private fun resolveExternalChains(eCtx: EContext, sqlExec: SqlExecutor): Rt_ResolvedExternalChains {
+        val cached = resolvedExternalChains
+        if (cached != null && cached.mainChainMapping.chainId == eCtx.chainID) {
+            return cached
+        }
+
+        val sqlMapping = Rt_ChainSqlMapping(eCtx.chainID)
+        val chainDeps = chainDeps.mapValues { (_, rid) -> Rt_ChainDependency(rid) }
+
+        // Failures are not cached: the resolution is retried by the next query or operation.
+        val res = Rt_RegularSqlContext.resolveExternalChains(rApp, sqlMapping, chainDeps, sqlExec)
+        resolvedExternalChains = res
+        return res
     }
 
     private fun translateQueryArgs(exeCtx: Rt_ExecutionContext, rQuery: R_QueryDefinition, gtvArgs: Gtv): List<Rt_Value> {
@@ -364,8 +598,25 @@ class RellPostchainModuleEnvironment(
     val dbInitLogLevel: Int = DEFAULT_DB_INIT_LOG_LEVEL,
     val hiddenLib: Boolean = false,
     val sqlLog: Boolean = false,
+    /** Max. number of prepared statements reused within one operation or query; 0 disables reuse. */
+    val sqlStatementCacheSize: Int = SqlStatementCache.DEFAULT_SIZE,
+    /** Number of rowids reserved at once by an operation; 0 disables reservation. */
+    val rowidBlockSize: Int = 0,
+    /** Min. number of records of a `create` expression to insert them with `COPY`; 0 disables `COPY`. */
+    val sqlBulkInsertThreshold: Int = 0,
+    /** Max. number of rows per entity cached within one operation or query; 0 disables the cache. */
+    val entityCacheSize: Int = 0,
+    /** Max. number of cached query results (valid until the next block); 0 disables the cache. */
+    val queryCacheSize: Int = 0,
+    /**
+     * Mount names of queries whose results are cached, required if [queryCacheSize] is not 0. Queries reading data of
+     * external chains must not be listed.
+     */
+    val queryCacheQueries: List<String> = immListOf(),
     val fallbackModules: List<R_ModuleName> = immListOf(R_ModuleName.EMPTY),
     val precompiledApp: RellGtxModuleApp? = null,
+    /** Compiled apps shared by all factories using this environment; `null` means compiling every time. */
+    val appCache: RellAppCache? = null,
     val txContextFactory: Rt_PostchainTxContextFactory = Rt_DefaultPostchainTxContextFactory,
 ) {
     companion object {
@@ -398,54 +649,102 @@ class RellPostchainModuleFactory(env: RellPostchainModuleEnvironment? = null): G
         val errorHandler = ErrorHandler(combinedPrinter, env.wrapCtErrors, env.wrapRtErrors)
 
         return errorHandler.handleError({ "Module initialization failed" }) {
-            val modApp = getApp(rellNode, errorHandler, copyOutput)
-            val bcRid = Bytes32(blockchainRID.data)
-            val chainCtx = Rt_ChainContext(config, bcRid)
-            val chainDeps = getGtxChainDependencies(config)
-            val moduleArgsSource = PostchainBaseUtils.createModuleArgsSource(modApp.app, config)
-
-            val modLogPrinter = getModulePrinter(env.logPrinter, Rt_TimestampPrinter(combinedPrinter), copyOutput)
-            val modOutPrinter = getModulePrinter(env.outPrinter, combinedPrinter, copyOutput)
-
-            val typeCheck = env.forceTypeCheck || (rellNode["typeCheck"]?.asBoolean() ?: false)
-            val dbInitLogLevel = rellNode["dbInitLogLevel"]?.asInteger()?.toInt() ?: env.dbInitLogLevel
-
-            val moduleConfig = RellModuleConfig(
-                sqlLogging = env.sqlLog,
-                typeCheck = typeCheck,
-                dbInitLogLevel = dbInitLogLevel,
-                compilerOptions = modApp.compilerOptions,
-            )
+            val (modApp, appRef) = getApp(rellNode, errorHandler, copyOutput)
+            try {
+                val bcRid = Bytes32(blockchainRID.data)
+                val chainCtx = Rt_ChainContext(config, bcRid)
+                val chainDeps = getGtxChainDependencies(config)
+                val moduleArgsSource = PostchainBaseUtils.createModuleArgsSource(modApp.app, config)
+
+                val modLogPrinter = getModulePrinter(env.logPrinter, Rt_TimestampPrinter(combinedPrinter), copyOutput)
+                val modOutPrinter = getModulePrinter(env.outPrinter, combinedPrinter, copyOutput)
+
+                val typeCheck = env.forceTypeCheck || (rellNode["typeCheck"]?.asBoolean() ?: false)
+                val dbInitLogLevel = rellNode["dbInitLogLevel"]?.asInteger()?.toInt() ?: env.dbInitLogLevel
+                val stmtCacheSize = rellNode["sqlStatementCacheSize"]?.asInteger()?.toInt() ?: env.sqlStatementCacheSize
+                val rowidBlockSize = rellNode["rowidBlockSize"]?.asInteger()?.toInt() ?: env.rowidBlockSize
+                val bulkInsertThreshold = rellNode["sqlBulkInsertThreshold"]?.asInteger()?.toInt()
+                    ?: env.sqlBulkInsertThreshold
+                val entityCacheSize = rellNode["entityCacheSize"]?.asInteger()?.toInt() ?: env.entityCacheSize
+                val queryCacheSize = rellNode["queryCacheSize"]?.asInteger()?.toInt() ?: env.queryCacheSize
+                val queryCacheQueries = rellNode["queryCacheQueries"]?.asArray()?.map { it.asString() }
+                    ?: env.queryCacheQueries
+                if (queryCacheSize > 0 && queryCacheQueries.isEmpty()) {
+                    // Caching all queries by default would include ones reading external chains.
+                    throw UserMistake("queryCacheQueries must be specified when queryCacheSize is set")
+                }
 
-            RellPostchainModule(
-                env,
-                modApp.app,
-                chainCtx,
-                chainDeps,
-                logPrinter = modLogPrinter,
-                outPrinter = modOutPrinter,
-                errorHandler = errorHandler,
-                moduleArgsSource = moduleArgsSource,
-                config = moduleConfig,
-            )
+                val moduleConfig = RellModuleConfig(
+                    sqlLogging = env.sqlLog,
+                    typeCheck = typeCheck,
+                    dbInitLogLevel = dbInitLogLevel,
+                    compilerOptions = modApp.compilerOptions,
+                    sqlStatementCacheSize = stmtCacheSize,
+                    rowidBlockSize = rowidBlockSize,
+                    sqlBulkInsertThreshold = bulkInsertThreshold,
+                    entityCacheSize = entityCacheSize,
+                    queryCacheSize = queryCacheSize,
+                    queryCacheQueries = parseQueryNames(modApp.app, queryCacheQueries),
+                )
+
+                val module = RellPostchainModule(
+                    env,
+                    modApp.app,
+                    chainCtx,
+                    chainDeps,
+                    logPrinter = modLogPrinter,
+                    outPrinter = modOutPrinter,
+                    errorHandler = errorHandler,
+                    moduleArgsSource = moduleArgsSource,
+                    config = moduleConfig,
+                )
+
+                // Chains running the same sources share the app; the reference is dropped with the module.
+                if (appRef != null) APP_CLEANER.register(module, appRef::release)
+                module
+            } catch (e: Throwable) {
+                appRef?.release()
+                throw e
+            }
         }
     }
 
+    private fun parseQueryNames(app: R_App, names: List<String>): List<R_MountName> {
+        return names.map { s ->
+            val mountName = R_MountName.ofOpt(s)
+            if (mountName == null || mountName !in app.queries) {
+                throw UserMistake("Invalid query in queryCacheQueries: '$s'")
+            }
+            mountName
+        }.toImmList()
+    }
+
+    /** Returns the app and, if it is taken from the app cache, the reference to be released when not used anymore. */
     private fun getApp(
         rellNode: Map<String, Gtv>,
         errorHandler: ErrorHandler,
         copyOutput: Boolean,
-    ): RellGtxModuleApp {
+    ): Pair<RellGtxModuleApp, RellAppRef?> {
         if (env.precompiledApp != null) {
-            return env.precompiledApp
+            return env.precompiledApp to null
         }
 
         val sourceCfg = SourceCodeConfig(rellNode)
-        val sourceDir = sourceCfg.dir
         val modules = getModuleNames(rellNode)
         val compilerOptions = getCompilerOptions(sourceCfg.version)
-        val app = compileApp(sourceDir, modules, compilerOptions, errorHandler, copyOutput)
-        return RellGtxModuleApp(app, compilerOptions)
+
+        val appCache = env.appCache
+        if (appCache == null) {
+            val app = compileApp(sourceCfg.dir, modules, compilerOptions, errorHandler, copyOutput)
+            return RellGtxModuleApp(app, compilerOptions) to null
+        }
+
+        val key = RellAppCacheKey.of(sourceCfg.files, modules, compilerOptions)
+        val ref = appCache.acquire(key) {
+            val app = compileApp(sourceCfg.dir, modules, compilerOptions, errorHandler, copyOutput)
+            RellGtxModuleApp(app, compilerOptions)
+        }
+        return ref.app to ref
     }
 
     private fun getCompilerOptions(langVersion: R_LangVersion): C_CompilerOptions {
@@ -554,10 +853,13 @@ class RellPostchainModuleFactory(env: RellPostchainModuleEnvironment? = null): G
         return deps.toMap()
     }
 
-    companion object : KLogging()
+    companion object : KLogging() {
+        private val APP_CLEANER = Cleaner.create()
+    }
 }
 
 private class SourceCodeConfig(rellNode: Map<String, Gtv>) {
+    val files: Map<C_SourcePath, String>
     val dir: C_SourceDir
     val version: R_LangVersion
 
@@ -588,10 +890,10 @@ private class SourceCodeConfig(rellNode: Map<String, Gtv>) {
                     if (source.files) CommonUtils.readFileText(s) else s
                 }
                 .mapKeys { (k, _) -> parseSourcePath(k) }
-                .mapValues { (k, v) -> C_TextSourceFile(k, v) }
                 .toImmMap()
 
-        dir = C_SourceDir.mapDir(fileMap)
+        files = fileMap
+        dir = C_SourceDir.mapDir(fileMap.mapValues { (k, v) -> C_TextSourceFile(k, v) })
         version = source.version
     }
 
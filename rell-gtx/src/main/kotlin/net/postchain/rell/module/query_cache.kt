@@ -0,0 +1,94 @@
+/*
+ * Copyright (C) 2023 ChromaWay AB. See LICENSE for license information.
+ */
+
+package net.postchain.rell.module
+
+import net.postchain.common.types.WrappedByteArray
+import net.postchain.gtv.Gtv
+import net.postchain.rell.base.model.R_MountName
+import net.postchain.rell.base.utils.PostchainGtvUtils
+import net.postchain.rell.base.utils.toImmSet
+import java.util.*
+
+class RellQueryCacheStats(val hits: Long, val misses: Long, val evictions: Long) {
+    val hitRatio: Double = if (hits + misses == 0L) 0.0 else hits.toDouble() / (hits + misses)
+
+    override fun toString(): String {
+        val ratioStr = "%.3f".format(Locale.US, hitRatio)
+        return "hits=$hits misses=$misses evictions=$evictions ratio=$ratioStr"
+    }
+}
+
+/** Implemented by the GTX module created by [RellPostchainModuleFactory]. */
+interface RellQueryCacheStatsProvider {
+    fun queryCacheStats(): RellQueryCacheStats
+}
+
+/**
+ * LRU cache of GTV results of queries, keyed by query mount name and merkle hash of GTV arguments. Entries are valid
+ * only for the last block height they were computed at: when a query comes at a different height, all entries are
+ * evicted. Only successful results of the listed queries are cached. Size 0 disables caching.
+ *
+ * A query result may also depend on data of external chains, which is not bound to the block height of this chain;
+ * queries reading external chains must not be listed.
+ */
+class RellQueryCache(private val maxSize: Int, queries: Collection<R_MountName>) {
+    private val queries = queries.toImmSet()
+
+    private val entries = object: LinkedHashMap<Key, Gtv>(16, 0.75f, true) {
+        override fun removeEldestEntry(eldest: MutableMap.MutableEntry<Key, Gtv>): Boolean {
+            if (size <= maxSize) return false
+            ++evictions
+            return true
+        }
+    }
+
+    private var height = -1L
+
+    private var hits = 0L
+    private var misses = 0L
+    private var evictions = 0L
+
+    /** If `false`, the query must not be passed to [get]. */
+    fun isCached(mountName: R_MountName): Boolean {
+        return maxSize > 0 && mountName in queries
+    }
+
+    fun get(mountName: R_MountName, args: Gtv, blockHeight: Long, executor: () -> Gtv): Gtv {
+        check(isCached(mountName)) { mountName }
+
+        val key = Key(mountName, WrappedByteArray(PostchainGtvUtils.merkleHash(args)))
+
+        synchronized(this) {
+            if (blockHeight != height) {
+                evictions += entries.size
+                entries.clear()
+                height = blockHeight
+            }
+
+            val cached = entries[key]
+            if (cached != null) {
+                ++hits
+                return cached
+            }
+            ++misses
+        }
+
+        // Executed outside the lock: queries are run concurrently, and a slow query shall not block other queries.
+        val res = executor()
+
+        synchronized(this) {
+            if (blockHeight == height) {
+                entries[key] = res
+            }
+        }
+
+        return res
+    }
+
+    @Synchronized
+    fun stats() = RellQueryCacheStats(hits = hits, misses = misses, evictions = evictions)
+
+    private data class Key(val mountName: R_MountName, val argsHash: WrappedByteArray)
+}
@@ -0,0 +1,163 @@
+/*
+ * Copyright (C) 2023 ChromaWay AB. See LICENSE for license information.
+ */
+
+package net.postchain.rell.gtx
+
+import net.postchain.common.BlockchainRid
+import net.postchain.common.exception.UserMistake
+import net.postchain.gtv.Gtv
+import net.postchain.gtv.GtvFactory.gtv
+import net.postchain.rell.base.compiler.base.core.C_Compiler
+import net.postchain.rell.base.compiler.base.core.C_CompilerOptions
+import net.postchain.rell.base.compiler.base.utils.C_SourceDir
+import net.postchain.rell.base.compiler.base.utils.C_SourcePath
+import net.postchain.rell.base.model.R_ModuleName
+import net.postchain.rell.base.utils.RellGtxModuleApp
+import net.postchain.rell.base.utils.RellVersions
+import net.postchain.rell.module.RellAppCache
+import net.postchain.rell.module.RellAppCacheKey
+import net.postchain.rell.module.RellPostchainModuleEnvironment
+import net.postchain.rell.module.RellPostchainModuleFactory
+import org.junit.Test
+import java.lang.ref.Reference
+import kotlin.test.*
+
+class AppCacheTest {
+    private val bcRid = BlockchainRid(ByteArray(32))
+    private val options = C_CompilerOptions.forLangVersion(RellVersions.VERSION)
+
+    @Test fun testSameSources() {
+        val cache = RellAppCache(10)
+        val factory = factory(cache)
+        val config = config("query q() = 123;")
+
+        assertEquals(setOf("q"), factory.makeModule(config, bcRid).getQueries())
+        chkStats(cache, "hits=0 misses=1 evictions=0")
+        assertEquals(setOf("q"), factory.makeModule(config, bcRid).getQueries())
+        chkStats(cache, "hits=1 misses=1 evictions=0")
+
+        // Another factory with the same environment, e.g. for another chain.
+        assertEquals(setOf("q"), factory(cache).makeModule(config, bcRid).getQueries())
+        chkStats(cache, "hits=2 misses=1 evictions=0")
+    }
+
+    @Test fun testChangedSources() {
+        val cache = RellAppCache(10)
+        val factory = factory(cache)
+
+        assertEquals(setOf("q"), factory.makeModule(config("query q() = 123;"), bcRid).getQueries())
+        assertEquals(setOf("p"), factory.makeModule(config("query p() = 123;"), bcRid).getQueries())
+        assertEquals(setOf("q"), factory.makeModule(config("query q() = 123;"), bcRid).getQueries())
+        chkStats(cache, "hits=1 misses=2 evictions=0")
+    }
+
+    @Test fun testCompilationError() {
+        val cache = RellAppCache(10)
+        val factory = factory(cache)
+        val config = config("query q() = foo;")
+
+        assertFailsWith<UserMistake> { factory.makeModule(config, bcRid) }
+        assertFailsWith<UserMistake> { factory.makeModule(config, bcRid) }
+        chkStats(cache, "hits=0 misses=2 evictions=0")
+    }
+
+    @Test fun testSizeLimit() {
+        val cache = RellAppCache(1)
+        val (k1, k2) = listOf(key("query q() = 1;"), key("query q() = 2;"))
+
+        cache.acquire(k1) { modApp("query q() = 1;") }.release()
+        cache.acquire(k2) { modApp("query q() = 2;") }.release()
+        chkStats(cache, "hits=0 misses=2 evictions=1", used = 0, users = 0)
+
+        cache.acquire(k2) { fail() }.release()
+        cache.acquire(k1) { modApp("query q() = 1;") }.release()
+        chkStats(cache, "hits=1 misses=3 evictions=2", used = 0, users = 0)
+    }
+
+    @Test fun testRefCount() {
+        val cache = RellAppCache(0)
+        val key = key("query q() = 1;")
+
+        val ref1 = cache.acquire(key) { modApp("query q() = 1;") }
+        val ref2 = cache.acquire(key) { fail() }
+        assertSame(ref1.app, ref2.app)
+        chkStats(cache, "hits=1 misses=1 evictions=0", used = 1, users = 2)
+
+        ref1.release()
+        ref1.release()
+        chkStats(cache, "hits=1 misses=1 evictions=0", used = 1, users = 1)
+
+        val ref3 = cache.acquire(key) { fail() }
+        assertSame(ref1.app, ref3.app)
+        ref2.release()
+        ref3.release()
+        chkStats(cache, "hits=2 misses=1 evictions=1", used = 0, users = 0)
+
+        val ref4 = cache.acquire(key) { modApp("query q() = 1;") }
+        assertNotSame(ref1.app, ref4.app)
+        chkStats(cache, "hits=2 misses=2 evictions=1", used = 1, users = 1)
+    }
+
+    @Test fun testSharedByModules() {
+        val cache = RellAppCache(0)
+        val factory = factory(cache)
+        val config = config("query q() = 123;")
+
+        val modules = (0 until 3).map { factory.makeModule(config, bcRid) }
+        chkStats(cache, "hits=2 misses=1 evictions=0", used = 1, users = 3)
+        Reference.reachabilityFence(modules)
+    }
+
+    @Test fun testKey() {
+        val mainPath = C_SourcePath.parse("main.rell")
+        val files = mapOf(mainPath to "query q() = 1;")
+        val modules = listOf(R_ModuleName.EMPTY)
+        val key = RellAppCacheKey.of(files, modules, options)
+
+        assertEquals(key, RellAppCacheKey.of(files.toMap(), modules.toList(), options.toBuilder().build()))
+
+        val otherPath = mapOf(C_SourcePath.parse("x.rell") to "query q() = 1;")
+        val otherText = mapOf(mainPath to "query q() = 2;")
+        assertNotEquals(key, RellAppCacheKey.of(otherPath, modules, options))
+        assertNotEquals(key, RellAppCacheKey.of(otherText, modules, options))
+        assertNotEquals(key, RellAppCacheKey.of(files, listOf(R_ModuleName.of("foo")), options))
+        assertNotEquals(key, RellAppCacheKey.of(files, modules, options.toBuilder().hiddenLib(true).build()))
+        assertNotEquals(key, RellAppCacheKey.of(files, modules, options.toBuilder().constantFolding(true).build()))
+        val blockCheck = options.toBuilder().blockCheck(!options.blockCheck).build()
+        assertNotEquals(key, RellAppCacheKey.of(files, modules, blockCheck))
+        assertEquals(key, RellAppCacheKey.of(files, modules, options.toBuilder().parallelParsing(true).build()))
+    }
+
+    private fun factory(cache: RellAppCache): RellPostchainModuleFactory {
+        val env = RellPostchainModuleEnvironment(appCache = cache)
+        return RellPostchainModuleFactory(env)
+    }
+
+    private fun config(code: String): Gtv {
+        val rell = gtv(mapOf(
+            "modules" to gtv(gtv("")),
+            "sources" to gtv(mapOf("main.rell" to gtv(code))),
+            "version" to gtv(RellVersions.VERSION_STR),
+        ))
+        return gtv(mapOf("gtx" to gtv(mapOf("rell" to rell))))
+    }
+
+    private fun key(code: String): RellAppCacheKey {
+        val files = mapOf(C_SourcePath.parse("main.rell") to code)
+        return RellAppCacheKey.of(files, listOf(R_ModuleName.EMPTY), options)
+    }
+
+    private fun modApp(code: String): RellGtxModuleApp {
+        val sourceDir = C_SourceDir.mapDirOf("main.rell" to code)
+        val res = C_Compiler.compile(sourceDir, listOf(R_ModuleName.EMPTY), options)
+        return RellGtxModuleApp(res.app!!, options)
+    }
+
+    private fun chkStats(cache: RellAppCache, expected: String, used: Int? = null, users: Int? = null) {
+        val stats = cache.stats()
+        assertEquals(expected, "hits=${stats.hits} misses=${stats.misses} evictions=${stats.evictions}")
+        if (used != null) assertEquals(used, stats.usedApps)
+        if (users != null) assertEquals(users, stats.users)
+    }
+}
@@ -9,6 +9,7 @@ import net.postchain.rell.base.testutils.RellCodeTester
 import net.postchain.rell.base.testutils.RellTestUtils
 import net.postchain.rell.gtx.testutils.BaseGtxTest
 import org.junit.Test
+import kotlin.test.assertEquals
 
 class GtxExternalTest: BaseGtxTest() {
     private val depBcRid = RellTestUtils.strToRidHex("beefdead").toLowerCase()
@@ -26,6 +27,40 @@ class GtxExternalTest: BaseGtxTest() {
         chk("123", "rt_err:external_chain_no_rid:foo:$depBcRid")
     }
 
+    @Test fun testUnknownUnusedChain() {
+        tst.wrapRtErrors = false
+        tst.extraModuleConfig["dependencies"] = "[['foo','$depBcRid']]"
+        chk("123", "rt_err:external_chain_no_rid:foo:$depBcRid")
+    }
+
+    @Test fun testChainResolvedOncePerModule() {
+        tstCtx.blockchain(333, "beefdead")
+
+        run {
+            val t = RellCodeTester(tstCtx)
+            t.def("@log entity user { name; }")
+            t.chainId = 333
+            t.insert(LibBlockTransactionTest.BLOCK_INSERTS_333)
+            t.insert("c333.user", "name,transaction", "15,'Bob',444")
+            t.init()
+        }
+
+        def("@external('foo') namespace { @log entity user { name; } }")
+        def("query q() = user @ {} ( .name );")
+        tst.wrapRtErrors = false
+        tst.extraModuleConfig["dependencies"] = "[['foo','$depBcRid']]"
+
+        val module = tst.createModule()
+        assertEquals("'Bob'", tst.callQuery(module, "q", mapOf()))
+
+        // The module does not look up the chain again, so it does not see the change; a new module does.
+        tstCtx.sqlMgr().transaction { sqlExec ->
+            sqlExec.execute("UPDATE blockchains SET blockchain_rid = E'\\\\x00' WHERE chain_iid = 333;")
+        }
+        assertEquals("'Bob'", tst.callQuery(module, "q", mapOf()))
+        chkCallQuery("q", "", "rt_err:external_chain_no_rid:foo:$depBcRid")
+    }
+
     @Test fun testUnknownChain3() {
         tstCtx.blockchain(333, "beefdead")
 
@@ -5,11 +5,15 @@
 package net.postchain.rell.gtx
 
 import net.postchain.gtv.GtvBigInteger
+import net.postchain.gtv.GtvFactory.gtv
 import net.postchain.rell.base.lang.type.DecimalTest
 import net.postchain.rell.base.lib.LibBlockTransactionTest
 import net.postchain.rell.gtx.testutils.BaseGtxTest
+import net.postchain.rell.module.RellEntityCacheStatsProvider
+import net.postchain.rell.module.RellQueryCacheStatsProvider
 import org.junit.Test
 import java.math.BigInteger
+import kotlin.test.assertEquals
 
 class GtxTest : BaseGtxTest() {
     @Test fun testObject() {
@@ -123,6 +127,64 @@ class GtxTest : BaseGtxTest() {
         chkCallOperation("otext", listOf("{}"), "gtv_err:type:[text]:STRING:DICT:param:x")
     }
 
+    @Test fun testOperationsRecordArgs() {
+        tst.wrapRtErrors = false
+        def("entity user { name; }")
+        def("operation use(u: user) { print(u.name); }")
+        def("operation del(u: user) { delete u; }")
+        insert("c0.user", "name", "1,'Bob'", "2,'Alice'", "3,'Trudy'")
+
+        chkCallOperations(listOf("use" to listOf("1"), "use" to listOf("2"), "use" to listOf("1")))
+        chkOut("Bob", "Alice", "Bob")
+
+        chkCallOperations(listOf("use" to listOf("1"), "use" to listOf("4")), "gtv_err:obj_missing:[user]:4")
+        chkCallOperations(listOf("use" to listOf("5"), "use" to listOf("1")), "gtv_err:obj_missing:[user]:5")
+        chkOut("Bob")
+
+        // Records known to exist before a deletion are checked again.
+        chkCallOperations(listOf("del" to listOf("1"), "use" to listOf("2"), "use" to listOf("1")),
+            "gtv_err:obj_missing:[user]:1")
+        chkOut("Alice")
+        chkCallOperations(listOf("del" to listOf("3"), "use" to listOf("2"), "del" to listOf("2")))
+        chkOut("Alice")
+    }
+
+    @Test fun testEntityCacheStats() {
+        tst.entityCacheSize = 100
+        def("entity user { name; score: integer; }")
+        def("query q() { var s = 0; for (u in user @* {}) s += u.score; return s; }")
+        insert("c0.user", "name,score", "1,'Bob',10", "2,'Alice',20", "3,'Trudy',30")
+
+        chkCallQuery("q", "", "60")
+        val stats = (tst.lastModule as RellEntityCacheStatsProvider).entityCacheStats()
+        assertEquals("hits=2 misses=1 loads=1 rows=3 fallbacks=0 saved=2", stats.toString())
+    }
+
+    @Test fun testQueryCache() {
+        tst.queryCacheSize = 10
+        tst.queryCacheQueries = listOf("q")
+        def("query q(x: integer) = x * 2;")
+        def("query r(x: integer) = x * 3;")
+
+        val module = tst.createModule()
+        val args = mapOf("x" to gtv(2))
+        assertEquals("4", tst.callQuery(module, "q", args))
+        assertEquals("4", tst.callQuery(module, "q", args))
+        assertEquals("6", tst.callQuery(module, "r", args))
+        assertEquals("6", tst.callQuery(module, "r", args))
+
+        val stats = (module as RellQueryCacheStatsProvider).queryCacheStats()
+        assertEquals("hits=1 misses=1 evictions=0 ratio=0.500", stats.toString())
+    }
+
+    @Test fun testQueryCacheQueries() {
+        def("query q() = 123;")
+        tst.queryCacheSize = 10
+        chkUserMistake("", "queryCacheQueries must be specified when queryCacheSize is set")
+        tst.queryCacheQueries = listOf("foo")
+        chkUserMistake("", "Invalid query in queryCacheQueries: 'foo'")
+    }
+
     @Test fun testBigInteger() {
         tst.wrapRtErrors = false
         def("query qint(x: integer) = x;")
@@ -0,0 +1,99 @@
+/*
+ * Copyright (C) 2023 ChromaWay AB. See LICENSE for license information.
+ */
+
+package net.postchain.rell.gtx
+
+import net.postchain.gtv.Gtv
+import net.postchain.gtv.GtvFactory.gtv
+import net.postchain.rell.base.model.R_MountName
+import net.postchain.rell.module.RellQueryCache
+import org.junit.Test
+import kotlin.test.assertEquals
+import kotlin.test.assertFailsWith
+import kotlin.test.assertFalse
+import kotlin.test.assertTrue
+
+class QueryCacheTest {
+    private val foo = R_MountName.of("foo")
+    private val bar = R_MountName.of("bar")
+
+    @Test fun testHitMiss() {
+        val cache = RellQueryCache(10, listOf(foo, bar))
+        chkGet(cache, foo, args(1), 5, "foo:1", executed = true)
+        chkGet(cache, foo, args(1), 5, "foo:1", executed = false)
+        chkGet(cache, foo, args(2), 5, "foo:2", executed = true)
+        chkGet(cache, bar, args(1), 5, "bar:1", executed = true)
+        chkGet(cache, bar, args(1), 5, "bar:1", executed = false)
+        chkStats(cache, "hits=2 misses=3 evictions=0 ratio=0.400")
+    }
+
+    @Test fun testArgsOrder() {
+        val cache = RellQueryCache(10, listOf(foo, bar))
+        val args1 = gtv(mapOf("a" to gtv(1), "b" to gtv("x")))
+        val args2 = gtv(mapOf("b" to gtv("x"), "a" to gtv(1)))
+        chkGet(cache, foo, args1, 5, "foo:1", executed = true)
+        chkGet(cache, foo, args2, 5, "foo:1", executed = false)
+        chkStats(cache, "hits=1 misses=1 evictions=0 ratio=0.500")
+    }
+
+    @Test fun testNewBlock() {
+        val cache = RellQueryCache(10, listOf(foo, bar))
+        chkGet(cache, foo, args(1), 5, "foo:1", executed = true)
+        chkGet(cache, foo, args(2), 5, "foo:2", executed = true)
+        chkGet(cache, foo, args(1), 6, "foo:1", executed = true)
+        chkGet(cache, foo, args(1), 6, "foo:1", executed = false)
+        chkGet(cache, foo, args(2), 6, "foo:2", executed = true)
+        chkStats(cache, "hits=1 misses=4 evictions=2 ratio=0.200")
+    }
+
+    @Test fun testSizeLimit() {
+        val cache = RellQueryCache(2, listOf(foo))
+        chkGet(cache, foo, args(1), 5, "foo:1", executed = true)
+        chkGet(cache, foo, args(2), 5, "foo:2", executed = true)
+        chkGet(cache, foo, args(1), 5, "foo:1", executed = false)
+        chkGet(cache, foo, args(3), 5, "foo:3", executed = true)
+        chkGet(cache, foo, args(1), 5, "foo:1", executed = false)
+        chkGet(cache, foo, args(2), 5, "foo:2", executed = true)
+        chkStats(cache, "hits=2 misses=4 evictions=2 ratio=0.333")
+    }
+
+    @Test fun testQueryFilter() {
+        val cache = RellQueryCache(10, listOf(foo))
+        assertTrue(cache.isCached(foo))
+        assertFalse(cache.isCached(bar))
+
+        val none = RellQueryCache(10, listOf())
+        assertFalse(none.isCached(foo))
+        assertFalse(none.isCached(bar))
+
+        val disabled = RellQueryCache(0, listOf(foo, bar))
+        assertFalse(disabled.isCached(foo))
+        assertFalse(disabled.isCached(bar))
+    }
+
+    @Test fun testError() {
+        val cache = RellQueryCache(10, listOf(foo, bar))
+        assertFailsWith<IllegalStateException> {
+            cache.get(foo, args(1), 5) { throw IllegalStateException("fail") }
+        }
+        chkGet(cache, foo, args(1), 5, "foo:1", executed = true)
+        chkStats(cache, "hits=0 misses=2 evictions=0 ratio=0.000")
+    }
+
+    private fun args(x: Long): Gtv = gtv(mapOf("x" to gtv(x)))
+
+    private fun chkGet(cache: RellQueryCache, name: R_MountName, args: Gtv, height: Long, exp: String, executed: Boolean) {
+        var actExecuted = false
+        val res = cache.get(name, args, height) {
+            actExecuted = true
+            gtv(exp)
+        }
+        assertEquals(exp, res.asString())
+        assertEquals(executed, actExecuted)
+    }
+
+    private fun chkStats(cache: RellQueryCache, expected: String) {
+        assertEquals(expected, cache.stats().toString())
+    }
+}
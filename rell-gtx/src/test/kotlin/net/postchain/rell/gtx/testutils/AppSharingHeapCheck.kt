@@ -0,0 +1,68 @@
+/*
+ * Copyright (C) 2023 ChromaWay AB. See LICENSE for license information.
+ */
+
+package net.postchain.rell.gtx.testutils
+
+import net.postchain.common.BlockchainRid
+import net.postchain.gtv.Gtv
+import net.postchain.gtv.GtvFactory.gtv
+import net.postchain.gtx.GTXModule
+import net.postchain.rell.module.RellAppCache
+import net.postchain.rell.module.RellPostchainModuleEnvironment
+import net.postchain.rell.module.RellPostchainModuleFactory
+import java.lang.ref.Reference
+
+/**
+ * Creates modules for 20 chains with identical sources, with and without the app cache, and prints the time and the
+ * heap retained by the modules (measured after GC, so run with a fixed heap, e.g. `-Xms2g -Xmx2g`).
+ */
+fun main() {
+    val chains = 20
+
+    val code = (0 .. 999)
+        .flatMap { i ->
+            listOf(
+                "struct s$i { a: integer; b: text; }",
+                "function f$i(x: integer): s$i = s$i(x + $i, 'f$i');",
+                "query q$i(x: integer) = f$i(x).to_gtv_pretty();",
+            )
+        }
+        .joinToString("\n")
+
+    val rellNode = gtv(mapOf(
+        "version" to gtv("0.14.0"),
+        "modules" to gtv(gtv("main")),
+        "sources" to gtv(mapOf("main.rell" to gtv("module; $code"))),
+    ))
+    val config = gtv(mapOf("gtx" to gtv(mapOf("rell" to rellNode))))
+
+    // Warm-up.
+    makeModules(config, 2, null)
+
+    for ((name, cache) in listOf("separate apps" to null, "shared app" to RellAppCache(0))) {
+        val heap0 = usedHeap()
+        val t0 = System.currentTimeMillis()
+        val modules = makeModules(config, chains, cache)
+        val time = System.currentTimeMillis() - t0
+        val heap = usedHeap() - heap0
+        println(String.format("%16s: %d chains, %6d ms, %8.1f MB", name, chains, time, heap / 1024.0 / 1024.0))
+        Reference.reachabilityFence(modules)
+    }
+}
+
+private fun makeModules(config: Gtv, count: Int, cache: RellAppCache?): List<GTXModule> {
+    val env = RellPostchainModuleEnvironment(appCache = cache)
+    return (0 until count).map { i ->
+        RellPostchainModuleFactory(env).makeModule(config, BlockchainRid.buildRepeat(i.toByte()))
+    }
+}
+
+private fun usedHeap(): Long {
+    val rt = Runtime.getRuntime()
+    repeat(3) {
+        System.gc()
+        Thread.sleep(100)
+    }
+    return rt.totalMemory() - rt.freeMemory()
+}
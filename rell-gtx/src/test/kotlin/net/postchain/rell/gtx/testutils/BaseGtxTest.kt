@@ -18,6 +18,9 @@ abstract class BaseGtxTest(useSql: Boolean = true): BaseTesterTest(useSql) {
     fun chkCallOperation(name: String, args: List<String>, expected: String = "OK") =
             tst.chkCallOperation(name, args, expected)
 
+    fun chkCallOperations(ops: List<Pair<String, List<String>>>, expected: String = "OK") =
+            tst.chkCallOperations(ops, expected)
+
     fun chkCallQuery(name: String, args: String, expected: String) = tst.chkCallQuery(name, args, expected)
     fun chkCallQuery(name: String, args: Map<String, Gtv>, expected: String) = tst.chkCallQuery(name, args, expected)
 }
@@ -0,0 +1,124 @@
+/*
+ * Copyright (C) 2023 ChromaWay AB. See LICENSE for license information.
+ */
+
+package net.postchain.rell.gtx.testutils
+
+import net.postchain.base.BaseBlockEContext
+import net.postchain.base.BaseEContext
+import net.postchain.base.BaseTxEContext
+import net.postchain.base.TxEventSink
+import net.postchain.common.BlockchainRid
+import net.postchain.common.hexStringToByteArray
+import net.postchain.core.Transaction
+import net.postchain.core.TxEContext
+import net.postchain.gtv.Gtv
+import net.postchain.gtv.GtvFactory.gtv
+import net.postchain.gtx.GTXModule
+import net.postchain.gtx.data.ExtOpData
+import net.postchain.gtx.data.OpData
+import net.postchain.rell.base.testutils.RellTestContext
+import net.postchain.rell.base.utils.PostchainGtvUtils
+import net.postchain.rell.gtx.PostchainBaseUtils
+import net.postchain.rell.module.RellPostchainModuleEnvironment
+import net.postchain.rell.module.RellPostchainModuleFactory
+import java.security.MessageDigest
+
+/**
+ * Applies blocks of many small operations (each taking an entity argument) and prints the number of operations per
+ * second, for different numbers of operations per transaction. Needs the test database.
+ */
+fun main() {
+    val opsPerBlock = 2000
+    val blocks = 10
+
+    val code = """
+        entity user { name; mutable score: integer; }
+        operation add_score(u: user, value: integer) { u.score += value; }
+    """.trimIndent()
+
+    RellTestContext().use { tstCtx ->
+        val t = RellGtxTester(tstCtx)
+        t.def(code)
+        t.insert("c0.user", "name,score", *(1 .. 100).map { "$it,'user_$it',0" }.toTypedArray())
+        t.init()
+
+        val env = RellPostchainModuleEnvironment(outPrinter = t.outPrinter, logPrinter = t.logPrinter)
+        val bcRid = BlockchainRid(t.blockchainRid.hexStringToByteArray())
+        val module = RellPostchainModuleFactory(env).makeModule(t.getModuleConfig(code), bcRid)
+
+        // Warm-up: JIT of the runtime and the SQL driver.
+        applyBlocks(tstCtx, module, bcRid, 3, opsPerBlock, 10)
+
+        println(String.format("%12s %12s", "ops/tx", "ops/s"))
+        for (opsPerTx in listOf(1, 10, 100)) {
+            val t0 = System.currentTimeMillis()
+            applyBlocks(tstCtx, module, bcRid, blocks, opsPerBlock, opsPerTx)
+            val time = (System.currentTimeMillis() - t0).coerceAtLeast(1)
+            println(String.format("%12d %12d", opsPerTx, blocks * opsPerBlock * 1000L / time))
+        }
+    }
+}
+
+private var nextBlockIid = 1L
+private var nextTxIid = 1L
+
+private fun applyBlocks(
+    tstCtx: RellTestContext,
+    module: GTXModule,
+    bcRid: BlockchainRid,
+    blocks: Int,
+    opsPerBlock: Int,
+    opsPerTx: Int,
+) {
+    val eventSink = object: TxEventSink {
+        override fun processEmittedEvent(ctxt: TxEContext, type: String, data: Gtv) = Unit
+    }
+
+    repeat(blocks) {
+        tstCtx.sqlMgr().execute(true) { sqlExec ->
+            sqlExec.connection { con ->
+                val ctx = BaseEContext(con, 0, PostchainBaseUtils.createDatabaseAccess())
+                val blkCtx = BaseBlockEContext(ctx, nextBlockIid++, 0, System.currentTimeMillis(), mapOf(), eventSink)
+                for (tx in 0 until opsPerBlock / opsPerTx) {
+                    applyTx(module, bcRid, blkCtx, tx, opsPerTx)
+                }
+            }
+            true
+        }
+    }
+}
+
+private fun applyTx(module: GTXModule, bcRid: BlockchainRid, blkCtx: BaseBlockEContext, tx: Int, opsPerTx: Int) {
+    val allOps = (0 until opsPerTx)
+        .map { i -> OpData("add_score", arrayOf(gtv((tx * opsPerTx + i) % 100 + 1L), gtv(1L))) }
+        .toTypedArray()
+
+    val transactors = allOps.mapIndexed { i, op ->
+        module.makeTransactor(ExtOpData(op.opName, i, op.args, bcRid, arrayOf(), allOps))
+    }
+
+    val txIid = nextTxIid++
+    val txCtx = BaseTxEContext(blkCtx, txIid, BenchmarkTransaction(txIid, allOps))
+    for (transactor in transactors) {
+        transactor.checkCorrectness()
+        transactor.apply(txCtx)
+    }
+}
+
+/** The operations are applied by the benchmark; the transaction only provides its data, encoded as a Gtv. */
+private class BenchmarkTransaction(txIid: Long, ops: Array<OpData>): Transaction {
+    private val rawData = PostchainGtvUtils.gtvToBytes(gtv(
+        gtv(txIid),
+        gtv(ops.map { gtv(gtv(it.opName), gtv(it.args.toList())) }),
+    ))
+
+    private val hash = MessageDigest.getInstance("SHA-256").digest(rawData)
+
+    override fun apply(ctx: TxEContext) = true
+    override fun checkCorrectness() {}
+    override fun isSpecial() = false
+    override fun getHash(): ByteArray = hash.clone()
+    override fun getRID(): ByteArray = hash.clone()
+    override fun getRawData(): ByteArray = rawData.clone()
+}
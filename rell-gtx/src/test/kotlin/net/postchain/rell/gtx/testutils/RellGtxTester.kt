@@ -24,6 +24,7 @@ import net.postchain.gtv.GtvType
 import net.postchain.gtx.GTXModule
 import net.postchain.gtx.GTXSchemaManager
 import net.postchain.gtx.data.ExtOpData
+import net.postchain.gtx.data.OpData
 import net.postchain.rell.base.model.R_App
 import net.postchain.rell.base.sql.SqlExecutor
 import net.postchain.rell.base.testutils.GtvTestUtils
@@ -49,6 +50,13 @@ class RellGtxTester(
     val extraModuleConfig = mutableMapOf<String, String>()
     var modules: List<String>? = listOf("")
     var configTemplate: String = getDefaultConfigTemplate()
+    var entityCacheSize = 0
+    var queryCacheSize = 0
+    var queryCacheQueries = listOf<String>()
+
+    /** The module created by the last query or operation call. */
+    var lastModule: GTXModule? = null
+        private set
 
     init {
         super.chainId = chainId
@@ -113,36 +121,54 @@ class RellGtxTester(
     private fun callQuery0(moduleCode: String, name: String, args: Map<String, Gtv>): String {
         return eval.eval {
             eval.wrapRt { init() }
+            val module = eval.wrapAll { createGtxModule(moduleCode) }
+            callQuery1(module, name, args)
+        }
+    }
 
-            val queryGtv = GtvFactory.gtv(args)
+    /** Creates a module for the current definitions, to call multiple queries on the same module. */
+    fun createModule(): GTXModule {
+        init()
+        return createGtxModule(defsCode())
+    }
 
-            val module = eval.wrapAll { createGtxModule(moduleCode) }
+    fun callQuery(module: GTXModule, name: String, args: Map<String, Gtv>): String {
+        return eval.eval {
+            callQuery1(module, name, args)
+        }
+    }
 
-            withEContext(false) { ctx ->
-                val res = eval.wrapRt {
-                    module.query(ctx, name, queryGtv)
-                }
-                GtvTestUtils.gtvToStr(res)
+    private fun callQuery1(module: GTXModule, name: String, args: Map<String, Gtv>): String {
+        val queryGtv = GtvFactory.gtv(args)
+        return withEContext(false) { ctx ->
+            val res = eval.wrapRt {
+                module.query(ctx, name, queryGtv)
             }
+            GtvTestUtils.gtvToStr(res)
         }
     }
 
     fun chkCallOperation(name: String, args: List<String>, expected: String = "OK") {
-        val gtvArgs = args.map { GtvTestUtils.decodeGtvStr(it.replace('\'', '"')) }
+        chkCallOperations(listOf(name to args), expected)
+    }
+
+    /** Applies the operations in one transaction. */
+    fun chkCallOperations(ops: List<Pair<String, List<String>>>, expected: String = "OK") {
+        val gtvOps = ops.map { (name, args) -> name to args.map { GtvTestUtils.decodeGtvStr(it.replace('\'', '"')) } }
         val moduleCode = defsCode()
-        val actual = callOperation0(moduleCode, name, gtvArgs)
+        val actual = callOperations0(moduleCode, gtvOps)
         assertEquals(expected, actual)
     }
 
     fun chkOpEx(code: String, args: List<Gtv>, expected: String = "OK") {
         val moduleCode = moduleCode(code)
-        val actual = callOperation0(moduleCode, "o", args)
+        val actual = callOperations0(moduleCode, listOf("o" to args))
         assertEquals(expected, actual)
     }
 
     private fun hexToRid(s: String): BlockchainRid = BlockchainRid(CommonUtils.hexToBytes(s))
 
-    private fun callOperation0(moduleCode: String, name: String, args: List<Gtv>): String {
+    private fun callOperations0(moduleCode: String, ops: List<Pair<String, List<Gtv>>>): String {
         return eval.eval {
             eval.wrapRt { init() }
 
@@ -157,17 +183,20 @@ class RellGtxTester(
             val res = withEContext(true) { ctx ->
                 val blkCtx = BaseBlockEContext(ctx, 0, 0, System.currentTimeMillis(), mapOf(), dummyEventSink)
                 val bcRid = hexToRid(blockchainRid)
-                val opData = ExtOpData(name, 0, args.toTypedArray(), bcRid, arrayOf(), arrayOf())
-                val transactor = module.makeTransactor(opData)
+                val allOps = ops.map { (name, args) -> OpData(name, args.toTypedArray()) }.toTypedArray()
+                val transactors = ops.mapIndexed { i, (name, args) ->
+                    val opData = ExtOpData(name, i, args.toTypedArray(), bcRid, arrayOf(), allOps)
+                    module.makeTransactor(opData)
+                }
 
                 eval.wrapRt {
-                    transactor.checkCorrectness()
+                    transactors.forEach { it.checkCorrectness() }
                 }
 
-                val tx = TransactorTransaction(transactor)
+                val tx = TransactorTransaction(transactors.first())
                 val txCtx = BaseTxEContext(blkCtx, 0, tx)
 
-                transactor.apply(txCtx)
+                transactors.all { it.apply(txCtx) }
             }
 
             check(res)
@@ -205,13 +234,17 @@ class RellGtxTester(
                 wrapCtErrors = false,
                 wrapRtErrors = wrapRtErrors,
                 forceTypeCheck = true,
-                hiddenLib = hiddenLib
+                hiddenLib = hiddenLib,
+                entityCacheSize = entityCacheSize,
+                queryCacheSize = queryCacheSize,
+                queryCacheQueries = queryCacheQueries,
         )
         val factory = RellPostchainModuleFactory(env)
 
         val moduleCfg = getModuleConfig(moduleCode)
         val bcRid = hexToRid(blockchainRid)
         val module = factory.makeModule(moduleCfg, bcRid)
+        lastModule = module
         return module
     }
 
@@ -404,6 +404,10 @@ private fun parseExtraOption(s: String): ExtraOption {
             require(params.size == 0)
             ExtraOption_HiddenLib
         }
+        "ConstantFolding" -> {
+            require(params.size == 0)
+            ExtraOption_ConstantFolding
+        }
         else -> throw IllegalArgumentException()
     }
 }
@@ -424,6 +428,12 @@ private object ExtraOption_HiddenLib: ExtraOption() {
     }
 }
 
+private object ExtraOption_ConstantFolding: ExtraOption() {
+    override fun toCompilerOption(b: C_CompilerOptions.Builder) {
+        b.constantFolding(true)
+    }
+}
+
 private class RellAppLauncher(
     private val args: RellInterpreterCliArgs,
     private val entryPoint: RellEntryPoint
@@ -31,6 +31,7 @@ import net.postchain.rell.base.runtime.*
 import net.postchain.rell.base.sql.SqlInitLogging
 import net.postchain.rell.base.utils.*
 import net.postchain.rell.gtx.PostchainBaseUtils
+import net.postchain.rell.module.RellAppCache
 import net.postchain.rell.module.RellPostchainModuleEnvironment
 import net.postchain.rell.tools.RellToolsLogUtils
 import net.postchain.rell.tools.RellToolsUtils
@@ -64,7 +65,11 @@ private fun main0(args: RellRunConfigLaunchCliArgs) {
         }
         runTests(commonArgs, matcher, targetChains)
     } else {
-        val env = RellPostchainModuleEnvironment(sqlLog = args.sqlLog)
+        // Chains of a run config often use the same sources, so they can share compiled apps.
+        val env = RellPostchainModuleEnvironment(
+            sqlLog = args.sqlLog,
+            appCache = RellAppCache(RellAppCache.DEFAULT_SIZE),
+        )
         RellPostchainModuleEnvironment.set(env) {
             runApp(commonArgs)
         }